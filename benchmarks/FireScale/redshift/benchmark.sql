@@ -127,7 +127,7 @@ where countrycode = 'PAN'
   and searchword in ('sxmtgekwngjwyjerk','jamyfanaoacldwi','hucii','xrlxwsikfsbuf','wubrrjursvtqteia','jfkjvramnrvuyp')
 Limit 65;
 
--- query 13
+-- query 12
 SELECT
   countrycode,
   languagecode,
@@ -20,10 +20,32 @@ if (vendor === 'firebolt') {
   throw new Error(`Unsupported VENDOR: ${vendor}`);
 }
 
+// Stages as k6 expects them, without the optional names the Python client records
+const stages = (config.stages ?? []).map(({ duration, target }) => ({ duration, target }));
+
+// k6 scenario of the load profile in the config, see the Python client's load_profile.py
+function scenario() {
+  const executor = config.executor ?? (config.stages ? 'ramping-vus' : 'constant-vus');
+  const preAllocatedVUs = config.preAllocatedVUs ?? config.VUs ?? 10;
+  switch (executor) {
+    case 'constant-vus':
+      return { executor, vus: config.VUs ?? 10, duration: config.duration };
+    case 'ramping-vus':
+      return { executor, startVUs: config.startVUs ?? 1, stages };
+    case 'constant-arrival-rate':
+      return { executor, rate: config.rate, timeUnit: config.timeUnit ?? '1s', duration: config.duration, preAllocatedVUs, maxVUs: config.maxVUs ?? preAllocatedVUs };
+    case 'ramping-arrival-rate':
+      return { executor, startRate: config.startRate ?? 0, timeUnit: config.timeUnit ?? '1s', stages, preAllocatedVUs, maxVUs: config.maxVUs ?? preAllocatedVUs };
+    default:
+      throw new Error(`Unsupported executor: ${executor}`);
+  }
+}
+
 // k6 Options
 export const options = {
-  vus: config.VUs ?? 10,  // Get VUs from config, default to 10 virtual users (parallel streams)
-  duration: config.duration
+  scenarios: {
+    benchmark: scenario(),
+  },
 };
 
 
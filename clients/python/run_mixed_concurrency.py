@@ -1,59 +1,43 @@
-import subprocess
+import logging
 import os
-import json
-import shutil
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from runner import ConcurrentBenchmarkRunner, StreamSpec
+from workload import load_workload
 
 VENDOR = "trino"  # Change to "trino" to test Trino
 BENCHMARK = "custom_schema"
 DURATION = 60  # seconds for each query
+WORKERS_PER_QUERY = 1
+NUM_QUERIES = 10
 OUTPUT_DIR = "benchmark_results/mixed_concurrency"
 BENCHMARK_DIR = f"../../benchmarks/{BENCHMARK}"
-QUERIES_PATH = os.path.join(BENCHMARK_DIR, "queries.json")
-BACKUP_PATH = os.path.join(BENCHMARK_DIR, "queries.json.bak")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# Load all queries
-with open(QUERIES_PATH, "r") as f:
-    all_queries = json.load(f)
-
-def get_query_by_index(idx):
-    if idx <= len(all_queries):
-        return [all_queries[idx-1]]
-    else:
-        raise IndexError(f"Query index {idx} out of range (only {len(all_queries)} queries available)")
-
-def run_query(query_id):
-    # Write only the selected query to queries.json
-    with open(QUERIES_PATH, "w") as f:
-        json.dump(get_query_by_index(query_id), f)
-    # Run the benchmark for this query only
-    cmd = [
-        "python", "-m", "src.main", BENCHMARK,
-        "--vendors", VENDOR,
-        "--concurrency", "1",
-        "--concurrency-duration-s", str(DURATION),
-        "--output-dir", OUTPUT_DIR
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    # Save stdout/stderr for debugging
-    with open(f"{OUTPUT_DIR}/query_{query_id}_output.txt", "w") as f:
-        f.write(result.stdout)
-        f.write("\n--- STDERR ---\n")
-        f.write(result.stderr)
-    return query_id, result.returncode
+CREDS_FILE = "../../config/credentials/credentials.json"
+SEED = 1
 
 if __name__ == "__main__":
-    # Backup the original queries.json
-    shutil.copyfile(QUERIES_PATH, BACKUP_PATH)
-    try:
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(run_query, i) for i in range(1, 11)]
-            for future in as_completed(futures):
-                query_id, code = future.result()
-                print(f"Query {query_id} finished with exit code {code}")
-    finally:
-        # Restore the original queries.json
-        shutil.move(BACKUP_PATH, QUERIES_PATH)
-    print(f"All queries complete. Check {OUTPUT_DIR} for results.") 
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    # One stream per query, all of them running at the same time in this process
+    query_names = load_workload(os.path.join(BENCHMARK_DIR, "queries.json")).query_names[:NUM_QUERIES]
+    streams = [
+        StreamSpec(query_name=query_name, workers=WORKERS_PER_QUERY, duration_secs=DURATION)
+        for query_name in query_names
+    ]
+    runner = ConcurrentBenchmarkRunner(
+        benchmark_name=BENCHMARK,
+        creds_file=CREDS_FILE,
+        vendor=VENDOR,
+        concurrency=len(streams) * WORKERS_PER_QUERY,
+        benchmark_duration_secs=DURATION,
+        output_dir=OUTPUT_DIR,
+        benchmark_path=BENCHMARK_DIR,
+        seed=SEED,
+        streams=streams,
+    )
+    runner.run_benchmark()
+    print(f"All queries complete. Check {OUTPUT_DIR} for results.")
@@ -0,0 +1,432 @@
+"""
+Steady-state analysis of the query log of a concurrency run (`<vendor>_concurrency.csv`).
+
+Usage:
+    python src/analysis.py <vendor>_concurrency.csv [--window 10] [--ramp-secs 5] [--drain-secs 5] [--open-loop] [--markdown analysis.md]
+
+The ramp-up and drain periods are excluded: by default the steady state is the interval in which
+every worker was running, i.e. from the latest first query start to the earliest last query stop
+of the workers (per stream in a mixed workload). Open-loop workers only run while arrivals are
+pending, so with `--open-loop` the ramp-up is instead detected from the latencies with the MSER-5
+warm-up rule, and the drain is the p99 latency before the last query stop. All statistics are vectorized with numpy and
+pandas, so query logs of millions of rows are analyzed in seconds.
+"""
+import argparse
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from histogram import REPORTED_PERCENTILES
+
+# Columns of the query log the analysis reads
+ANALYSIS_COLUMNS = ["worker_id", "stream", "query_name", "has_error", "start_unix_time", "stop_unix_time", "latency_secs"]
+
+DEFAULT_WINDOW_SECS = 10.0
+
+# Resolution of the windowed throughput
+WINDOW_STEP_SECS = 1.0
+
+# Queries per batch mean of the MSER-5 warm-up detection of open-loop runs
+MSER_BATCH_SIZE = 5
+
+# Percentile of the latency excluded as drain at the end of open-loop runs
+DRAIN_PERCENTILE = 99
+
+
+def load_query_log(path: str) -> pd.DataFrame:
+    """Read the columns of a `<vendor>_concurrency.csv` (or a Parquet partition of it) the analysis needs."""
+    if path.endswith(".parquet") or os.path.isdir(path):
+        return pd.read_parquet(path, columns=ANALYSIS_COLUMNS)
+    # Query logs written before mixed workloads have no stream column
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [column for column in ANALYSIS_COLUMNS if column != "stream" or column in header]
+    # The multithreaded pyarrow parser reads millions of rows several times faster than the default one
+    df = pd.read_csv(
+        path,
+        usecols=columns,
+        dtype={"stream": "string", "query_name": "string"},
+        engine="pyarrow",
+    )
+    if "stream" not in df:
+        df.insert(ANALYSIS_COLUMNS.index("stream"), "stream", pd.Series(pd.NA, index=df.index, dtype="string"))
+    return df
+
+
+def jain_fairness(values: np.ndarray) -> Optional[float]:
+    """Jain's fairness index of `values`: 1 if they are all equal, 1/n if one of n gets everything."""
+    squares = float(np.square(values).sum())
+    if not len(values) or squares == 0:
+        return None
+    return float(values.sum()) ** 2 / (len(values) * squares)
+
+
+@dataclass
+class ConcurrencyAnalysis:
+    """Steady-state statistics of a concurrency run."""
+    start_unix_time: float
+    stop_unix_time: float
+    # Queries of the ramp-up and drain periods
+    excluded_queries: int
+    # Per query (per stream in a mixed workload) and overall ('ALL') count, errors, error rate,
+    # throughput and latency percentiles of the successful queries
+    summary: List[Dict[str, Any]]
+    # Throughput and error rate over sliding windows, one row per `WINDOW_STEP_SECS`
+    throughput: pd.DataFrame
+    # Completed queries and throughput per worker
+    workers: pd.DataFrame
+    # Jain's fairness index of the worker throughputs
+    fairness: Optional[float]
+    window_secs: float = DEFAULT_WINDOW_SECS
+
+    @property
+    def duration_secs(self) -> float:
+        return self.stop_unix_time - self.start_unix_time
+
+    def window_qps_stats(self) -> Dict[str, Optional[float]]:
+        """Minimum, median and maximum windowed throughput and its coefficient of variation."""
+        qps = self.throughput["qps"].to_numpy()
+        if not len(qps):
+            return dict.fromkeys(["min", "median", "max", "cv"])
+        mean = qps.mean()
+        return {
+            "min": round(float(qps.min()), 2),
+            "median": round(float(np.median(qps)), 2),
+            "max": round(float(qps.max()), 2),
+            "cv": round(float(qps.std() / mean), 4) if mean else None,
+        }
+
+    def _overview(self) -> List[List[Any]]:
+        window = self.window_qps_stats()
+        worker_qps = self.workers["qps"]
+        return [
+            ["Steady state", f"{self.duration_secs:.1f}s ({self.excluded_queries} ramp-up/drain queries excluded)"],
+            [f"Windowed QPS ({self.window_secs:g}s)", f"min {window['min']}, median {window['median']}, "
+                                                      f"max {window['max']}, cv {window['cv']}"],
+            ["Worker QPS", f"min {worker_qps.min():.2f}, max {worker_qps.max():.2f}" if len(worker_qps) else ""],
+            ["Jain fairness", f"{self.fairness:.4f}" if self.fairness is not None else ""],
+        ]
+
+    def to_text(self) -> str:
+        """Tables in the layout of `<vendor>_concurrency_summary.txt`."""
+        return (
+            "Steady-State Analysis\n"
+            "=====================\n"
+            + tabulate(self._overview(), tablefmt="plain") + "\n\n"
+            + tabulate(self.summary, headers="keys", tablefmt="grid")
+        )
+
+    def to_markdown(self, title: str = "Steady-State Analysis") -> str:
+        return "\n".join([
+            f"## {title}\n",
+            tabulate(self._overview(), headers=["Metric", "Value"], tablefmt="github") + "\n",
+            tabulate(self.summary, headers="keys", tablefmt="github") + "\n",
+        ])
+
+
+def _steady_state_bounds(
+    segments: np.ndarray,
+    worker_ids: np.ndarray,
+    start_times: np.ndarray,
+    stop_times: np.ndarray,
+    ramp_secs: Optional[float],
+    drain_secs: Optional[float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and stop of the steady state of every segment (stream, or the whole run) by segment code."""
+    per_worker = pd.DataFrame({
+        "segment": segments, "worker_id": worker_ids, "start": start_times, "stop": stop_times
+    }).groupby(["segment", "worker_id"]).agg(first_start=("start", "min"), last_stop=("stop", "max"))
+    per_segment = per_worker.groupby(level="segment")
+    if ramp_secs is None:
+        start = per_segment["first_start"].max()
+    else:
+        start = per_segment["first_start"].min() + ramp_secs
+    if drain_secs is None:
+        stop = per_segment["last_stop"].min()
+    else:
+        stop = per_segment["last_stop"].max() - drain_secs
+    return start.to_numpy(), stop.to_numpy()
+
+
+def mser_truncation(values: np.ndarray) -> int:
+    """
+    Number of leading `values` to discard as warm-up by the Marginal Standard Error Rule: the
+    truncation within the first half that minimizes the standard error of the mean of the rest.
+    """
+    n = len(values)
+    if n < 2:
+        return 0
+    # Sums over `values[d:]` for every truncation d
+    counts = np.arange(n, 0, -1)
+    tail_sums = np.cumsum(values[::-1])[::-1]
+    tail_squares = np.cumsum(np.square(values)[::-1])[::-1]
+    variances = np.maximum(tail_squares / counts - np.square(tail_sums / counts), 0.0)
+    return int(np.argmin((variances / counts)[:n // 2 + 1]))
+
+
+def _open_loop_bounds(
+    segments: np.ndarray,
+    start_times: np.ndarray,
+    stop_times: np.ndarray,
+    has_error: np.ndarray,
+    latencies: np.ndarray,
+    ramp_secs: Optional[float],
+    drain_secs: Optional[float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start and stop of the steady state of every segment of an open-loop run by segment code.
+
+    The ramp-up lasts until the first batch of `MSER_BATCH_SIZE` successful queries (in start
+    order) that MSER keeps of the batch mean latencies. The drain is the `DRAIN_PERCENTILE`
+    latency before the last stop: queries still running at the end of the run are not logged, so
+    the completions of the last moments are biased towards fast queries.
+    """
+    num_segments = int(segments.max()) + 1
+    starts, stops = np.empty(num_segments), np.empty(num_segments)
+    for segment in range(num_segments):
+        in_segment = segments == segment
+        successful = in_segment & ~has_error
+        if ramp_secs is not None:
+            starts[segment] = start_times[in_segment].min() + ramp_secs
+        else:
+            order = np.argsort(start_times[successful], kind="stable")
+            num_batches = len(order) // MSER_BATCH_SIZE
+            batch_means = latencies[successful][order][:num_batches * MSER_BATCH_SIZE] \
+                .reshape(num_batches, MSER_BATCH_SIZE).mean(axis=1)
+            truncation = mser_truncation(batch_means) * MSER_BATCH_SIZE
+            starts[segment] = start_times[successful][order][truncation] if truncation else start_times[in_segment].min()
+        if drain_secs is None:
+            drained = latencies[successful] if successful.any() else latencies[in_segment]
+            drain = float(np.percentile(drained, DRAIN_PERCENTILE))
+        else:
+            drain = drain_secs
+        stops[segment] = stop_times[in_segment].max() - drain
+    return starts, stops
+
+
+def _window_sums(values: np.ndarray, width: int) -> np.ndarray:
+    """Sums of every `width` consecutive values."""
+    if len(values) < width:
+        return np.empty(0)
+    cumulative = np.concatenate([[0], np.cumsum(values)])
+    return cumulative[width:] - cumulative[:-width]
+
+
+def _latency_rows(
+    key: str,
+    labels: List[str],
+    codes: np.ndarray,
+    has_error: np.ndarray,
+    latencies: np.ndarray,
+    durations: np.ndarray,
+) -> List[Dict[str, Any]]:
+    """Summary rows of the groups of `codes`, whose names are `labels`."""
+    totals = np.bincount(codes, minlength=len(labels))
+    errors = np.bincount(codes[has_error], minlength=len(labels))
+    successful = ~has_error
+    successful_codes = codes[successful]
+    successful_latencies = latencies[successful]
+    sums = np.bincount(successful_codes, weights=successful_latencies, minlength=len(labels))
+    quantiles = [percentile / 100 for percentile in REPORTED_PERCENTILES]
+    percentiles = (
+        pd.Series(successful_latencies).groupby(successful_codes).quantile(quantiles).unstack()
+        .reindex(index=range(len(labels)), columns=quantiles).to_numpy()
+    )
+
+    rows = []
+    for code, label in enumerate(labels):
+        count = int(totals[code] - errors[code])
+        row = {
+            key: label,
+            # Successful queries, like the histogram summary
+            "count": count,
+            "errors": int(errors[code]),
+            "error_rate": round(errors[code] / totals[code], 4) if totals[code] else None,
+            "qps": round(count / durations[code], 2),
+            "mean": round(sums[code] / count, 4) if count else None,
+        }
+        for percentile, value in zip(REPORTED_PERCENTILES, percentiles[code]):
+            row[f"p{percentile:g}"] = None if np.isnan(value) else round(float(value), 4)
+        rows.append(row)
+    return rows
+
+
+def analyze_query_log(
+    df: pd.DataFrame,
+    window_secs: float = DEFAULT_WINDOW_SECS,
+    ramp_secs: Optional[float] = None,
+    drain_secs: Optional[float] = None,
+    open_loop: bool = False,
+) -> ConcurrencyAnalysis:
+    """
+    Steady-state throughput, latency, fairness and error statistics of a concurrency query log.
+
+    Queries count towards the steady state if they stopped within it. Throughput is the rate of
+    successful queries, overall and over sliding windows of `window_secs`. Query names, streams
+    and workers are factorized once and aggregated by their integer codes.
+
+    Args:
+        df: Query log with the `ANALYSIS_COLUMNS`.
+        window_secs: Width of the sliding throughput windows.
+        ramp_secs: (Optional) Seconds after the first query start to exclude instead of the
+            detected ramp-up period.
+        drain_secs: (Optional) Seconds before the last query stop to exclude instead of the
+            detected drain period.
+        open_loop: Whether the queries followed an arrival schedule, whose ramp-up and drain
+            are detected from the latencies instead of the workers (see `_open_loop_bounds`).
+    """
+    if window_secs <= 0:
+        raise ValueError(f"Window must be positive, got: {window_secs}")
+    if df.empty:
+        raise ValueError("The query log is empty")
+    streams = "stream" in df and df["stream"].notna().any()
+    key = "stream" if streams else "query_name"
+    # Every stream has its own workers and duration, and thus its own steady state
+    names = df["stream"].fillna(df["query_name"]) if streams else df["query_name"]
+    name_codes, name_labels = pd.factorize(names, sort=True)
+    segments = name_codes if streams else np.zeros(len(df), dtype=np.int64)
+    worker_ids = df["worker_id"].to_numpy()
+    start_times = df["start_unix_time"].to_numpy(dtype=np.float64)
+    stop_times = df["stop_unix_time"].to_numpy(dtype=np.float64)
+    has_error = df["has_error"].to_numpy(dtype=bool)
+    latencies = df["latency_secs"].to_numpy(dtype=np.float64)
+
+    if open_loop:
+        segment_starts, segment_stops = _open_loop_bounds(
+            segments, start_times, stop_times, has_error, latencies, ramp_secs, drain_secs
+        )
+    else:
+        segment_starts, segment_stops = _steady_state_bounds(
+            segments, worker_ids, start_times, stop_times, ramp_secs, drain_secs
+        )
+    if (segment_stops <= segment_starts).any():
+        raise ValueError(
+            "No steady state: the ramp-up and drain periods cover the whole run, set them explicitly"
+            if open_loop else
+            "No steady state: the workers never ran at the same time, set the ramp-up and drain periods explicitly"
+        )
+    segment_durations = segment_stops - segment_starts
+    steady = (stop_times >= segment_starts[segments]) & (stop_times <= segment_stops[segments])
+    start, stop = float(segment_starts.min()), float(segment_stops.max())
+
+    # Per query or stream, and overall
+    summary = _latency_rows(
+        key,
+        [str(label) for label in name_labels],
+        name_codes[steady],
+        has_error[steady],
+        latencies[steady],
+        segment_durations if streams else np.full(len(name_labels), segment_durations[0]),
+    )
+    summary += _latency_rows(
+        key, ["ALL"], np.zeros(int(steady.sum()), dtype=np.int64), has_error[steady], latencies[steady],
+        np.array([stop - start]),
+    )
+
+    # Sliding windows from the completions per step
+    num_steps = int((stop - start) // WINDOW_STEP_SECS)
+    steps = ((stop_times[steady] - start) // WINDOW_STEP_SECS).astype(np.int64)
+    steady_errors = has_error[steady]
+    in_range = steps < num_steps
+    completed = np.bincount(steps[in_range], minlength=num_steps)
+    failed = np.bincount(steps[in_range & steady_errors], minlength=num_steps)
+    # Windows longer than the steady state shrink to it
+    window_steps = max(min(int(round(window_secs / WINDOW_STEP_SECS)), num_steps), 1)
+    completed_sums = _window_sums(completed, window_steps)
+    failed_sums = _window_sums(failed, window_steps)
+    window_duration = window_steps * WINDOW_STEP_SECS
+    throughput = pd.DataFrame({
+        "window_start_secs": np.arange(len(completed_sums)) * WINDOW_STEP_SECS,
+        "qps": (completed_sums - failed_sums) / window_duration,
+        "error_rate": failed_sums / np.maximum(completed_sums, 1),
+    })
+
+    # Per worker, over the steady state of its segment; workers without steady-state queries count as 0
+    worker_codes, worker_labels = pd.factorize(worker_ids, sort=True)
+    worker_segments = np.zeros(len(worker_labels), dtype=np.int64)
+    worker_segments[worker_codes] = segments
+    worker_completed = np.bincount(worker_codes[steady & ~has_error], minlength=len(worker_labels))
+    workers = pd.DataFrame({
+        "worker_id": worker_labels,
+        "completed": worker_completed,
+        "qps": worker_completed / segment_durations[worker_segments],
+    })
+
+    return ConcurrencyAnalysis(
+        start_unix_time=start,
+        stop_unix_time=stop,
+        excluded_queries=int(len(df) - steady.sum()),
+        summary=summary,
+        throughput=throughput,
+        workers=workers,
+        fairness=jain_fairness(workers["qps"].to_numpy()),
+        window_secs=window_duration,
+    )
+
+
+def latency_timeline(df: pd.DataFrame, step_secs: float = WINDOW_STEP_SECS) -> pd.DataFrame:
+    """
+    Throughput, error rate and p50/p95/p99 latency of the queries completed in every `step_secs`
+    since the first query start, for timeline charts.
+    """
+    if df.empty:
+        raise ValueError("The query log is empty")
+    stop_times = df["stop_unix_time"].to_numpy(dtype=np.float64)
+    steps = ((stop_times - df["start_unix_time"].min()) // step_secs).astype(np.int64)
+    has_error = df["has_error"].to_numpy(dtype=bool)
+    num_steps = int(steps.max()) + 1
+    completed = np.bincount(steps, minlength=num_steps)
+    failed = np.bincount(steps[has_error], minlength=num_steps)
+    percentiles = (
+        pd.Series(df["latency_secs"].to_numpy(dtype=np.float64)[~has_error])
+        .groupby(steps[~has_error]).quantile([0.5, 0.95, 0.99]).unstack()
+        .reindex(index=range(num_steps), columns=[0.5, 0.95, 0.99])
+    )
+    return pd.DataFrame({
+        "elapsed_secs": np.arange(num_steps) * step_secs,
+        "qps": (completed - failed) / step_secs,
+        "error_rate": failed / np.maximum(completed, 1),
+        "p50": percentiles[0.5].to_numpy(),
+        "p95": percentiles[0.95].to_numpy(),
+        "p99": percentiles[0.99].to_numpy(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Steady-state analysis of a concurrency query log')
+    parser.add_argument('query_log', help='<vendor>_concurrency.csv, or a Parquet file or partition of it')
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW_SECS,
+                        help=f'Width of the sliding throughput windows in seconds (default: {DEFAULT_WINDOW_SECS:g})')
+    parser.add_argument('--ramp-secs', type=float, default=None,
+                        help='Seconds after the first query to exclude (default: until every worker started)')
+    parser.add_argument('--drain-secs', type=float, default=None,
+                        help='Seconds before the last query to exclude (default: from the first worker that stopped)')
+    parser.add_argument('--open-loop', action='store_true',
+                        help='The run followed an arrival rate: detect the ramp-up from the latencies (MSER-5) '
+                             f'and exclude the p{DRAIN_PERCENTILE} latency before the last query as drain')
+    parser.add_argument('--markdown', default=None, help='Markdown file to write the tables to')
+    parser.add_argument('--throughput-csv', default=None, help='CSV file to write the windowed throughput to')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    analysis = analyze_query_log(
+        load_query_log(args.query_log), args.window, args.ramp_secs, args.drain_secs, open_loop=args.open_loop
+    )
+    print(analysis.to_text())
+    if args.markdown:
+        with open(args.markdown, 'w') as f:
+            f.write(analysis.to_markdown())
+        logger.info(f"Analysis exported to {args.markdown}")
+    if args.throughput_csv:
+        analysis.throughput.to_csv(args.throughput_csv, index=False)
+        logger.info(f"Windowed throughput exported to {args.throughput_csv}")
+
+
+if __name__ == "__main__":
+    main()
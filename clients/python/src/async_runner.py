@@ -0,0 +1,172 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import connectors
+from runner import ConcurrentBenchmarkRunner
+
+# Upper bound on the number of virtual users that open their connection at the same time
+MAX_PARALLEL_CONNECTS = 64
+
+
+class AsyncConcurrentBenchmarkRunner(ConcurrentBenchmarkRunner):
+    """
+    Concurrency benchmark on an asyncio event loop.
+
+    Every virtual user is a coroutine with its own async connector instead of an OS thread, so
+    thousands of in-flight queries are multiplexed over one event loop thread plus a small executor
+    for SDK calls that can only block. Supports the same closed-loop and open-loop modes and writes
+    the same `<vendor>_concurrency.csv` as `ConcurrentBenchmarkRunner`.
+    """
+
+    def __init__(self, *args, executor_threads: int = 32, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connector_class = connectors.get_async_connector_class(self.vendor)
+        self.executor_threads = executor_threads
+
+    async def _wait_for_stop(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for the stop event and return whether it is set, like `threading.Event.wait`."""
+        try:
+            await asyncio.wait_for(self.stop_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.stop_event.is_set()
+
+    async def _run_async_worker(self, worker_id: int, seed: int, connector):
+        worker = self._new_worker(worker_id, seed)
+
+        # Wait until all workers are connected
+        await self.start_event.wait()
+        worker.deadline = self._stream_deadline(worker.stream)
+
+        while True:
+            # A load profile ramps the number of active workers: the others wait for their turn
+            inactive_secs = self._inactive_secs(worker_id)
+            if inactive_secs is None:
+                break
+            if inactive_secs > 0:
+                if await self._wait_for_stop(inactive_secs):
+                    break
+                continue
+            intended_start_time = None
+            if self.open_loop:
+                # Open loop: wait for the dispatcher to release the next arrival
+                arrival = await self.arrivals.get()
+                if arrival is None or self.stop_event.is_set():
+                    break
+                intended_start_time, query_name = arrival
+                query_name = query_name or worker.next_query_name()
+            else:
+                query_name = worker.next_query_name()
+            instance, result = self._start_query(worker, query_name, intended_start_time)
+            error, num_output_rows, num_output_bytes = None, 0, None
+            try:
+                if self.result_mode == "drain":
+                    num_output_rows, num_output_bytes = await connector.drain_query(instance.text)
+                else:
+                    num_output_rows = len(await connector.execute_query(instance.text))
+            except Exception as e:
+                error = e
+            self._query_done(worker, result, error, num_output_rows, num_output_bytes)
+            if not result.has_error and self.keep_query_log:
+                try:
+                    result.engine_stats = await connector.get_last_query_stats()
+                except Exception:
+                    pass
+
+            if not self._record_query(worker, result):
+                break
+            think_time_secs = self._think_time_secs(query_name)
+            if think_time_secs > 0 and await self._wait_for_stop(think_time_secs):
+                break
+
+        self._end_worker(worker)
+
+    async def _run_async_dispatcher(self, seed: int):
+        rng = random.Random(seed)
+        await self.start_event.wait()
+
+        for arrival in self._arrival_schedule(time.time(), rng):
+            delay = arrival[0] - time.time()
+            if self.stop_event.is_set() or (delay > 0 and await self._wait_for_stop(delay)):
+                break
+            self.arrivals.put_nowait(arrival)
+        await self.stop_event.wait()
+
+        backlog = self.unstarted_arrivals = self.arrivals.qsize()
+        if backlog:
+            self.logger.warning(
+                f"{backlog} scheduled queries were never started for {self.vendor}; "
+                f"consider increasing the concurrency for an arrival rate of {self.total_arrival_rate:g} QPS"
+            )
+        # Wake up the workers still waiting for an arrival
+        for _ in range(self.concurrency):
+            self.arrivals.put_nowait(None)
+
+    async def _connect(self, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            connector = self.connector_class(config=self.credentials)
+            await connector.connect()
+            return connector
+
+    async def _run(self, random_seeds, dispatcher_seed):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.executor_threads))
+        self.start_event = asyncio.Event()
+        self.stop_event = asyncio.Event()
+        self.arrivals = asyncio.Queue()
+
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_CONNECTS)
+        worker_connectors = await asyncio.gather(
+            *(self._connect(semaphore) for _ in range(self.concurrency))
+        )
+        tasks = [
+            asyncio.create_task(self._run_async_worker(i, random_seeds[i], connector))
+            for i, connector in enumerate(worker_connectors)
+        ]
+        if self.open_loop:
+            tasks.append(asyncio.create_task(self._run_async_dispatcher(dispatcher_seed)))
+
+        if self.start_gate is not None:
+            await loop.run_in_executor(None, self.start_gate)
+
+        # Let the workers work for `self.benchmark_duration_secs` seconds after the settle period
+        self.measurement_start_time = time.time() + self.settle_secs
+        self.start_event.set()
+        await asyncio.sleep(self.settle_secs + self.benchmark_duration_secs)
+        self.stop_event.set()
+
+        await asyncio.gather(*tasks)
+        await asyncio.gather(*(connector.close() for connector in worker_connectors))
+
+    def run_workers(self):
+        self.worker_thread_results = [[] for _ in range(self.concurrency)]
+        self.worker_histograms = [None] * self.concurrency
+        self.unstarted_arrivals = 0
+
+        # Derive the worker seeds exactly like the threaded runner for reproducibility
+        rng = random.Random(self.seed)
+        random_seeds = rng.sample(range(42_000_000), self.concurrency)
+        dispatcher_seed = rng.randrange(42_000_000)
+
+        self._start_journal()
+        self._start_live_metrics()
+        try:
+            asyncio.run(self._run(random_seeds, dispatcher_seed))
+        finally:
+            self._stop_live_metrics()
+            self._stop_journal()
+
+    def run_benchmark(self):
+        self.logger.info(
+            f"Running asyncio concurrency benchmark for {self.vendor.upper()} with {self.concurrency} "
+            f"virtual users{f' at {self.total_arrival_rate:g} QPS' if self.open_loop else ''}..."
+        )
+
+        self.run_workers()
+
+        self._collect_engine_stats()
+        self._write_csv()
+        self._write_summary()
+        self.logger.info(f"Finished concurrency benchmark for {self.vendor.upper()}...")
@@ -0,0 +1,240 @@
+"""
+Capacity search: the highest open-loop arrival rate an engine sustains within a latency SLO.
+"""
+import csv
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from tabulate import tabulate
+
+from histogram import REPORTED_PERCENTILES
+from runner import ConcurrentBenchmarkRunner
+
+# Credential fields that identify the engine configuration of each vendor
+ENGINE_LABEL_FIELDS = {
+    "firebolt": "engine_name",
+    "snowflake": "warehouse",
+    "redshift": "host",
+    "bigquery": "project_id",
+    "trino": "host",
+}
+
+
+def engine_label(vendor: str, credentials: Dict[str, Any]) -> str:
+    """Engine configuration of a vendor from its credentials, e.g. the Firebolt engine or Snowflake warehouse."""
+    value = credentials.get(ENGINE_LABEL_FIELDS.get(vendor, ""))
+    return f"{vendor} ({value})" if value else vendor
+
+
+@dataclass
+class CapacitySLO:
+    """Conditions an arrival rate has to meet to count as sustained."""
+    latency_secs: float
+    # Latency percentile that has to stay within `latency_secs`, one of `REPORTED_PERCENTILES`
+    percentile: float = 95
+    max_error_rate: float = 0.01
+    # Share of the scheduled arrivals that have to start before the trial ends; below it the
+    # engine (or the client's concurrency limit) did not keep up and queries queued up
+    min_started_ratio: float = 0.99
+
+    def __post_init__(self):
+        if self.percentile not in REPORTED_PERCENTILES:
+            raise ValueError(f"Unsupported SLO percentile: {self.percentile}, expected one of {REPORTED_PERCENTILES}")
+        if self.latency_secs <= 0:
+            raise ValueError(f"Latency SLO must be positive, got: {self.latency_secs}")
+
+    @property
+    def latency_key(self) -> str:
+        return f"p{self.percentile:g}"
+
+
+@dataclass
+class CapacityTrial:
+    phase: str
+    offered_qps: float
+    completed_qps: float
+    latency_secs: Optional[float]
+    error_rate: float
+    passed: bool
+    reason: str
+
+
+class CapacitySearch:
+    """
+    Binary search for the maximum sustainable QPS of one vendor.
+
+    Every trial is an open-loop concurrency benchmark at a fixed arrival rate for `trial_secs`.
+    Starting at `start_qps`, the rate doubles until a trial fails (or `max_qps` passes), then the
+    interval between the highest passing and the lowest failing rate is bisected until it is
+    narrower than `precision`. The result is confirmed with a run of `confirm_secs` at the final
+    rate, stepping down by `precision` if the confirmation fails.
+    """
+
+    def __init__(
+        self,
+        vendor: str,
+        engine: str,
+        make_runner: Callable[[float, float, str], ConcurrentBenchmarkRunner],
+        slo: CapacitySLO,
+        output_dir: str,
+        trial_secs: float = 30,
+        confirm_secs: float = 60,
+        start_qps: float = 10,
+        max_qps: Optional[float] = None,
+        precision: float = 0.05,
+        max_trials: int = 20,
+        max_confirmations: int = 3,
+    ):
+        """
+        Args:
+            vendor: Benchmarked vendor.
+            engine: Engine configuration the result is reported for.
+            make_runner: Builds the runner of a trial from the arrival rate, the duration and its
+                output directory.
+            slo: Conditions of a passing trial.
+            output_dir: Directory of the combined results.
+            trial_secs: Duration of a search trial.
+            confirm_secs: Duration of the confirmation run.
+            start_qps: Rate of the first trial.
+            max_qps: (Optional) Highest rate to try.
+            precision: Relative width of the search interval at which the search stops.
+            max_trials: Upper bound on the number of search trials.
+            max_confirmations: Upper bound on the number of confirmation runs.
+        """
+        if start_qps <= 0 or (max_qps is not None and max_qps < start_qps):
+            raise ValueError(f"Invalid capacity search range: start {start_qps}, max {max_qps}")
+        if not 0 < precision < 1:
+            raise ValueError(f"Capacity search precision must be between 0 and 1, got: {precision}")
+        self.vendor = vendor
+        self.engine = engine
+        self.make_runner = make_runner
+        self.slo = slo
+        self.output_dir = output_dir
+        self.trial_secs = trial_secs
+        self.confirm_secs = confirm_secs
+        self.start_qps = start_qps
+        self.max_qps = max_qps
+        self.precision = precision
+        self.max_trials = max_trials
+        self.max_confirmations = max_confirmations
+        self.trials: List[CapacityTrial] = []
+        self.logger = logging.getLogger(__name__)
+
+    def _evaluate(self, phase: str, rate: float, duration_secs: float) -> CapacityTrial:
+        trial_dir = os.path.join(
+            self.output_dir, f"{self.vendor}_capacity", f"{len(self.trials) + 1:02d}_{phase}_{rate:g}qps"
+        )
+        runner = self.make_runner(rate, duration_secs, trial_dir)
+        if runner.workload.rates:
+            raise ValueError("The capacity search sets the arrival rate, per-query rates are not supported")
+        runner.run_benchmark()
+        overall = runner.summary_rows()[-1]
+
+        completed = overall["count"] + overall["errors"]
+        completed_qps = completed / runner.benchmark_duration_secs
+        error_rate = overall["errors"] / completed if completed else 1.0
+        latency = overall[self.slo.latency_key]
+        scheduled = completed + runner.unstarted_arrivals
+        if scheduled and completed / scheduled < self.slo.min_started_ratio:
+            passed, reason = False, f"{runner.unstarted_arrivals} of {scheduled} scheduled queries never started"
+        elif error_rate > self.slo.max_error_rate:
+            passed, reason = False, f"error rate {error_rate:.2%}"
+        elif latency is None or latency > self.slo.latency_secs:
+            passed, reason = False, f"{self.slo.latency_key} {latency}s"
+        else:
+            passed, reason = True, "ok"
+
+        trial = CapacityTrial(
+            phase=phase,
+            offered_qps=round(rate, 3),
+            completed_qps=round(completed_qps, 3),
+            latency_secs=latency,
+            error_rate=round(error_rate, 4),
+            passed=passed,
+            reason=reason,
+        )
+        self.trials.append(trial)
+        self.logger.info(
+            f"Capacity {phase} trial for {self.vendor} at {rate:g} QPS: {'pass' if passed else 'fail'} ({reason})"
+        )
+        return trial
+
+    def _search(self) -> Optional[float]:
+        """Highest passing rate of the search trials, or None if even the lowest rate failed."""
+        highest_pass = None
+        lowest_fail = None
+        rate = self.start_qps
+        for _ in range(self.max_trials):
+            if self._evaluate("search", rate, self.trial_secs).passed:
+                highest_pass = rate
+            else:
+                lowest_fail = rate
+
+            if lowest_fail is None:
+                # Still scaling up
+                if self.max_qps is not None and rate >= self.max_qps:
+                    break
+                rate = rate * 2 if self.max_qps is None else min(rate * 2, self.max_qps)
+            elif highest_pass is None:
+                # Even the first rate failed: scale down until a rate passes
+                rate /= 2
+            else:
+                if (lowest_fail - highest_pass) / lowest_fail <= self.precision:
+                    break
+                rate = (highest_pass + lowest_fail) / 2
+        return highest_pass
+
+    def run(self) -> Dict[str, Any]:
+        """Search, confirm and report the sustainable QPS."""
+        self.logger.info(
+            f"Searching the maximum sustainable QPS of {self.engine} with "
+            f"{self.slo.latency_key} <= {self.slo.latency_secs}s and error rate <= {self.slo.max_error_rate:.2%}"
+        )
+        rate = self._search()
+        sustainable_qps = None
+        for _ in range(self.max_confirmations if rate is not None else 0):
+            if self._evaluate("confirm", rate, self.confirm_secs).passed:
+                sustainable_qps = rate
+                break
+            rate *= 1 - self.precision
+
+        result = {
+            "vendor": self.vendor,
+            "engine": self.engine,
+            "sustainable_qps": None if sustainable_qps is None else round(sustainable_qps, 3),
+            "slo": f"{self.slo.latency_key} <= {self.slo.latency_secs}s",
+            "max_error_rate": self.slo.max_error_rate,
+            "trials": len(self.trials),
+        }
+        if sustainable_qps is None:
+            self.logger.warning(f"No sustainable arrival rate found for {self.engine} within the SLO")
+        else:
+            self.logger.info(f"Maximum sustainable QPS of {self.engine}: {sustainable_qps:g}")
+        self._write_trials()
+        return result
+
+    def _write_trials(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        csv_file_path = os.path.join(self.output_dir, f"{self.vendor}_capacity.csv")
+        with open(csv_file_path, mode="w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(CapacityTrial.__dataclass_fields__))
+            writer.writeheader()
+            writer.writerows(asdict(trial) for trial in self.trials)
+        self.logger.info(f"Capacity search trials exported to {csv_file_path}")
+
+
+def write_capacity_report(results: List[Dict[str, Any]], output_dir: str) -> str:
+    """Write the sustainable QPS of every vendor of a capacity search to `capacity_report.csv` and `.txt`."""
+    os.makedirs(output_dir, exist_ok=True)
+    csv_file_path = os.path.join(output_dir, "capacity_report.csv")
+    with open(csv_file_path, mode="w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+    with open(os.path.join(output_dir, "capacity_report.txt"), "w") as f:
+        f.write("Maximum Sustainable QPS\n")
+        f.write("=======================\n")
+        f.write(tabulate(results, headers="keys", tablefmt="grid"))
+    return csv_file_path
@@ -0,0 +1,311 @@
+"""
+Compare two benchmark result sets and detect statistically significant regressions.
+
+Usage:
+    python src/compare.py <baseline> <candidate> [--alpha 0.05] [--max-regression 0.05] [--output comparison.csv]
+
+Either result set is an output directory, a `results.csv` or a `<vendor>_concurrency.csv`. The
+exit code is 1 if a regression exceeds the budget, 2 if the result sets cannot be compared and 3
+if no query has enough samples to ever show a significant change, so the command can gate engine
+upgrades.
+
+The Mann-Whitney U test cannot reach an arbitrarily small p-value with few samples: 4 against 4
+samples give at least 0.029, which the Holm correction multiplies by the number of queries. At
+alpha 0.05, one query needs 4 warm samples per side, up to 6 queries need 5, up to 23 need 6 and
+up to 85 need 7. The sequential benchmark's first run is cold, so `--iterations` must be one more,
+or use `--adaptive-iterations` with a matching `--min-iterations`. Queries with fewer samples are
+reported as 'insufficient data' rather than 'unchanged'.
+"""
+import argparse
+import csv
+import glob
+import logging
+import os
+import statistics
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from tabulate import tabulate
+
+from stats import bootstrap_median_ratio_ci, holm_adjust, mann_whitney_min_p_value, mann_whitney_u
+
+# (kind, vendor, query name) of a latency sample
+SampleKey = Tuple[str, str, str]
+
+CONCURRENCY_CSV_SUFFIX = "_concurrency.csv"
+
+# Fewer samples per side than this are not compared
+MIN_SAMPLES = 3
+
+
+def _sequential_samples(csv_file_path: str) -> Dict[SampleKey, List[float]]:
+    """Warm execution times of the successful queries of a `results.csv`."""
+    df = pd.read_csv(csv_file_path)
+    successful = df[df["success"].astype(bool)]
+    if "is_cold" in successful:
+        successful = successful[~successful["is_cold"].astype(bool)]
+    return {
+        ("sequential", vendor, str(query_name)): group["execution_time"].tolist()
+        for (vendor, query_name), group in successful.groupby(["vendor", "query_name"])
+    }
+
+
+def _concurrency_samples(csv_file_path: str) -> Dict[SampleKey, List[float]]:
+    """Latencies of the successful queries of a `<vendor>_concurrency.csv`, per query or stream."""
+    vendor = os.path.basename(csv_file_path)[:-len(CONCURRENCY_CSV_SUFFIX)]
+    df = pd.read_csv(csv_file_path)
+    successful = df[~df["has_error"].astype(bool)]
+    series = successful["stream"].where(successful["stream"].notna(), successful["query_name"]) \
+        if "stream" in successful else successful["query_name"]
+    return {
+        ("concurrency", vendor, str(name)): group["latency_secs"].tolist()
+        for name, group in successful.groupby(series)
+    }
+
+
+def load_samples(path: str) -> Dict[SampleKey, List[float]]:
+    """
+    Latency samples of a result set by (kind, vendor, query name).
+
+    Args:
+        path: Output directory of a run, with a `results.csv` and/or `<vendor>_concurrency.csv`
+            files, or one of these files.
+    """
+    if os.path.isdir(path):
+        files = glob.glob(os.path.join(path, "results.csv")) + sorted(
+            glob.glob(os.path.join(path, f"*{CONCURRENCY_CSV_SUFFIX}"))
+        )
+    elif os.path.exists(path):
+        files = [path]
+    else:
+        raise ValueError(f"Result set {path} not found")
+
+    samples = {}
+    for file_path in files:
+        if file_path.endswith(CONCURRENCY_CSV_SUFFIX):
+            samples.update(_concurrency_samples(file_path))
+        else:
+            samples.update(_sequential_samples(file_path))
+    if not samples:
+        raise ValueError(f"No results found in {path}")
+    return samples
+
+
+@dataclass
+class Comparison:
+    kind: str
+    vendor: str
+    query_name: str
+    baseline_count: int
+    candidate_count: int
+    baseline_median: Optional[float] = None
+    candidate_median: Optional[float] = None
+    # median(candidate) / median(baseline) and its bootstrap confidence interval; above 1 is slower
+    ratio: Optional[float] = None
+    ratio_ci_low: Optional[float] = None
+    ratio_ci_high: Optional[float] = None
+    p_value: Optional[float] = None
+    # p-value adjusted for the number of comparisons
+    adjusted_p_value: Optional[float] = None
+    # Smallest adjusted p-value the sample sizes allow, reached if this is the only and a complete change
+    min_adjusted_p_value: Optional[float] = None
+    # 'regression', 'improvement', 'unchanged' or 'insufficient data'
+    verdict: str = "insufficient data"
+    over_budget: bool = False
+
+
+def compare_samples(
+    baseline: Dict[SampleKey, List[float]],
+    candidate: Dict[SampleKey, List[float]],
+    alpha: float = 0.05,
+    min_change: float = 0.02,
+    max_regression: float = 0.05,
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    correction: str = "holm",
+    seed: int = 1,
+) -> List[Comparison]:
+    """
+    Compare the latencies of every (kind, vendor, query) present in both result sets.
+
+    A change is significant if the (adjusted) p-value of the Mann-Whitney U test is below `alpha`,
+    the bootstrap confidence interval of the median ratio excludes 1 and the median changes by
+    more than `min_change`. A significant regression whose median ratio exceeds
+    1 + `max_regression` is over budget. A comparison that is not significant is 'unchanged' only
+    if its sample sizes could have reached an adjusted p-value below `alpha`, and otherwise has
+    'insufficient data', see `required_samples`.
+
+    Returns:
+        List[Comparison]: Regressions from the largest ratio down, then improvements from the
+        smallest ratio up, then the remaining comparisons
+    """
+    if not 0 < alpha < 1:
+        raise ValueError(f"alpha must be between 0 and 1, got: {alpha}")
+    comparisons = []
+    for key in sorted(set(baseline) & set(candidate)):
+        kind, vendor, query_name = key
+        comparison = Comparison(kind, vendor, query_name, len(baseline[key]), len(candidate[key]))
+        comparisons.append(comparison)
+        if comparison.baseline_count < MIN_SAMPLES or comparison.candidate_count < MIN_SAMPLES:
+            continue
+        comparison.baseline_median = statistics.median(baseline[key])
+        comparison.candidate_median = statistics.median(candidate[key])
+        if comparison.baseline_median > 0:
+            comparison.ratio = comparison.candidate_median / comparison.baseline_median
+        comparison.ratio_ci_low, comparison.ratio_ci_high = bootstrap_median_ratio_ci(
+            baseline[key], candidate[key], confidence, resamples, seed
+        )
+        _, comparison.p_value = mann_whitney_u(baseline[key], candidate[key])
+
+    tested = [comparison for comparison in comparisons if comparison.p_value is not None]
+    p_values = [comparison.p_value for comparison in tested]
+    adjusted = holm_adjust(p_values) if correction == "holm" else p_values
+    # Holm multiplies the smallest p-value by the number of tests
+    factor = len(tested) if correction == "holm" else 1
+    for comparison, adjusted_p_value in zip(tested, adjusted):
+        comparison.adjusted_p_value = adjusted_p_value
+        comparison.min_adjusted_p_value = min(
+            1.0, factor * mann_whitney_min_p_value(comparison.baseline_count, comparison.candidate_count)
+        )
+        significant = (
+            adjusted_p_value < alpha
+            and comparison.ratio is not None
+            and abs(comparison.ratio - 1) > min_change
+            and not comparison.ratio_ci_low <= 1 <= comparison.ratio_ci_high
+        )
+        if not significant:
+            comparison.verdict = "unchanged" if comparison.min_adjusted_p_value < alpha else "insufficient data"
+        elif comparison.ratio > 1:
+            comparison.verdict = "regression"
+            comparison.over_budget = comparison.ratio > 1 + max_regression
+        else:
+            comparison.verdict = "improvement"
+
+    def rank(comparison: Comparison):
+        if comparison.verdict == "regression":
+            return 0, -comparison.ratio
+        if comparison.verdict == "improvement":
+            return 1, comparison.ratio
+        return 2, 0
+    return sorted(comparisons, key=rank)
+
+
+def required_samples(alpha: float, tests: int, correction: str = "holm") -> int:
+    """Fewest samples per side with which one of `tests` comparisons can be significant at `alpha`."""
+    factor = tests if correction == "holm" else 1
+    samples = MIN_SAMPLES
+    while factor * mann_whitney_min_p_value(samples, samples) >= alpha:
+        samples += 1
+    return samples
+
+
+def _table(comparisons: List[Comparison]) -> str:
+    return tabulate(
+        [
+            {
+                "kind": c.kind,
+                "vendor": c.vendor,
+                "query": c.query_name,
+                "n": f"{c.baseline_count}/{c.candidate_count}",
+                "baseline median": round(c.baseline_median, 4),
+                "candidate median": round(c.candidate_median, 4),
+                "ratio": f"{c.ratio:.3f}",
+                "ratio CI": f"[{c.ratio_ci_low:.3f}, {c.ratio_ci_high:.3f}]",
+                "p": f"{c.adjusted_p_value:.2g}",
+                "over budget": "yes" if c.over_budget else "",
+            }
+            for c in comparisons
+        ],
+        headers="keys",
+        tablefmt="grid",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detect significant regressions between two benchmark result sets')
+    parser.add_argument('baseline', help='Output directory, results.csv or <vendor>_concurrency.csv of the baseline')
+    parser.add_argument('candidate', help='Output directory, results.csv or <vendor>_concurrency.csv of the candidate')
+    parser.add_argument('--alpha', type=float, default=0.05,
+                        help='Significance level of the Mann-Whitney U test (default: 0.05)')
+    parser.add_argument('--min-change', type=float, default=0.02,
+                        help='Smallest relative change of the median that counts as a change (default: 0.02)')
+    parser.add_argument('--max-regression', type=float, default=0.05,
+                        help='Regression budget: a significant median slowdown above this fails the '
+                             'comparison (default: 0.05)')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='Confidence of the bootstrap interval of the median ratio (default: 0.95)')
+    parser.add_argument('--resamples', type=int, default=2000, help='Bootstrap resamples (default: 2000)')
+    parser.add_argument('--correction', choices=('holm', 'none'), default='holm',
+                        help='Multiple comparison correction of the p-values (default: holm)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the bootstrap (default: 1)')
+    parser.add_argument('--output', default=None, help='CSV file to write every comparison to')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    try:
+        baseline = load_samples(args.baseline)
+        candidate = load_samples(args.candidate)
+        comparisons = compare_samples(
+            baseline,
+            candidate,
+            alpha=args.alpha,
+            min_change=args.min_change,
+            max_regression=args.max_regression,
+            confidence=args.confidence,
+            resamples=args.resamples,
+            correction=args.correction,
+            seed=args.seed,
+        )
+    except (ValueError, KeyError) as e:
+        logger.error(f"Cannot compare the result sets: {str(e)}")
+        sys.exit(2)
+    if not comparisons:
+        logger.error("The result sets have no (vendor, query) in common")
+        sys.exit(2)
+    for key in sorted(set(baseline) ^ set(candidate)):
+        logger.warning(f"Only in {'baseline' if key in baseline else 'candidate'}: {key}")
+
+    regressions = [c for c in comparisons if c.verdict == "regression"]
+    improvements = [c for c in comparisons if c.verdict == "improvement"]
+    print(f"Significant Regressions ({len(regressions)})")
+    print("=============================")
+    print(_table(regressions) if regressions else "None")
+    print(f"\nSignificant Improvements ({len(improvements)})")
+    print("==============================")
+    print(_table(improvements) if improvements else "None")
+    unchanged = sum(1 for c in comparisons if c.verdict == "unchanged")
+    insufficient = sum(1 for c in comparisons if c.verdict == "insufficient data")
+    print(f"\nUnchanged: {unchanged}, insufficient data: {insufficient}")
+    if insufficient:
+        tests = sum(1 for c in comparisons if c.p_value is not None)
+        logger.warning(
+            f"{insufficient} comparisons have too few samples to detect a change at alpha {args.alpha}; "
+            f"{required_samples(args.alpha, max(tests, 1), args.correction)} samples per side are needed, "
+            f"e.g. more --iterations or --adaptive-iterations"
+        )
+
+    if args.output:
+        with open(args.output, mode="w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(Comparison.__dataclass_fields__))
+            writer.writeheader()
+            writer.writerows(asdict(c) for c in comparisons)
+        logger.info(f"Comparison exported to {args.output}")
+
+    over_budget = [c for c in regressions if c.over_budget]
+    if over_budget:
+        logger.error(
+            f"{len(over_budget)} regressions exceed the budget of {args.max_regression:.0%}: "
+            + ", ".join(f"{c.vendor} {c.kind} query {c.query_name} ({c.ratio - 1:+.1%})" for c in over_budget)
+        )
+        sys.exit(1)
+    if insufficient == len(comparisons):
+        logger.error("No comparison has enough samples to detect a change")
+        sys.exit(3)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,37 @@
-from .bigquery import BigQueryConnector
-from .firebolt import FireboltConnector
-from .redshift import RedshiftConnector
-from .snowflake import SnowflakeConnector
-from .trino import TrinoConnector
+"""
+Connector registry.
+
+Connector modules are imported on first use, so a run only imports the SDKs of the vendors it
+benchmarks and does not need the others installed. Third-party packages can add vendors through
+entry points in the `trinovsfirebolt.connectors` (and `trinovsfirebolt.async_connectors`) group,
+named after the vendor, e.g. in `pyproject.toml`:
+
+    [project.entry-points."trinovsfirebolt.connectors"]
+    duckdb = "duckdb_benchmark.connector:DuckDBConnector"
+"""
+import importlib
+from importlib import metadata
+from typing import Dict, List, Tuple
+
+ENTRY_POINT_GROUP = "trinovsfirebolt.connectors"
+ASYNC_ENTRY_POINT_GROUP = "trinovsfirebolt.async_connectors"
+
+# Built-in connectors by vendor: module (relative to this package) and class name
+CONNECTORS: Dict[str, Tuple[str, str]] = {
+    "snowflake": (".snowflake", "SnowflakeConnector"),
+    "firebolt": (".firebolt", "FireboltConnector"),
+    "bigquery": (".bigquery", "BigQueryConnector"),
+    "redshift": (".redshift", "RedshiftConnector"),
+    "trino": (".trino", "TrinoConnector"),
+}
+
+ASYNC_CONNECTORS: Dict[str, Tuple[str, str]] = {
+    "snowflake": (".async_snowflake", "AsyncSnowflakeConnector"),
+    "firebolt": (".async_firebolt", "AsyncFireboltConnector"),
+    "bigquery": (".async_bigquery", "AsyncBigQueryConnector"),
+    "redshift": (".async_redshift", "AsyncRedshiftConnector"),
+    "trino": (".async_trino", "AsyncTrinoConnector"),
+}
 
 __all__ = [
     "FireboltConnector",
@@ -10,18 +39,63 @@ __all__ = [
     "BigQueryConnector",
     "RedshiftConnector",
     "TrinoConnector",
+    "AsyncFireboltConnector",
+    "AsyncSnowflakeConnector",
+    "AsyncBigQueryConnector",
+    "AsyncRedshiftConnector",
+    "AsyncTrinoConnector",
+    "available_vendors",
+    "get_connector_class",
+    "get_async_connector_class",
 ]
 
+# Connector classes loaded so far, by entry point group and vendor
+_loaded: Dict[Tuple[str, str], type] = {}
+
+
+def _entry_points(group: str) -> Dict[str, metadata.EntryPoint]:
+    return {entry_point.name: entry_point for entry_point in metadata.entry_points(group=group)}
+
+
+def _load_connector_class(vendor: str, builtin: Dict[str, Tuple[str, str]], group: str) -> type:
+    key = (group, vendor)
+    if key in _loaded:
+        return _loaded[key]
+    if vendor in builtin:
+        module_name, class_name = builtin[vendor]
+        try:
+            module = importlib.import_module(module_name, __name__)
+        except ImportError as e:
+            raise ImportError(f"The {vendor} connector requires its SDK, which could not be imported: {str(e)}") from e
+        connector_class = getattr(module, class_name)
+    else:
+        entry_point = _entry_points(group).get(vendor)
+        if entry_point is None:
+            raise ValueError(f"Unsupported vendor: {vendor}")
+        connector_class = entry_point.load()
+    _loaded[key] = connector_class
+    return connector_class
+
+
+def available_vendors() -> List[str]:
+    """Built-in vendors and the vendors of installed connector plugins, without importing any of them."""
+    return list(dict.fromkeys([*CONNECTORS, *_entry_points(ENTRY_POINT_GROUP)]))
+
 
 def get_connector_class(vendor: str):
-    """Get the appropriate connector class for a vendor."""
-    connector_map = {
-        "snowflake": SnowflakeConnector,
-        "firebolt": FireboltConnector,
-        "bigquery": BigQueryConnector,
-        "redshift": RedshiftConnector,
-        "trino": TrinoConnector,
-    }
-    if vendor not in connector_map:
-        raise ValueError(f"Unsupported vendor: {vendor}")
-    return connector_map[vendor]
+    """Get the appropriate connector class for a vendor, importing its module on first use."""
+    return _load_connector_class(vendor, CONNECTORS, ENTRY_POINT_GROUP)
+
+
+def get_async_connector_class(vendor: str):
+    """Get the asyncio connector class for a vendor, importing its module on first use."""
+    return _load_connector_class(vendor, ASYNC_CONNECTORS, ASYNC_ENTRY_POINT_GROUP)
+
+
+def __getattr__(name: str):
+    # Keep `from connectors import TrinoConnector` working without importing every SDK up front
+    for builtin in (CONNECTORS, ASYNC_CONNECTORS):
+        for module_name, class_name in builtin.values():
+            if class_name == name:
+                return getattr(importlib.import_module(module_name, __name__), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,40 @@
+import asyncio
+import functools
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+async def run_blocking(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call on the event loop's default executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+class ThreadedAsyncConnector:
+    """
+    Async adapter for a blocking connector without a native async API.
+
+    Every call is offloaded to the event loop's default executor, so a query still occupies a
+    thread while it runs. Vendor-specific async connectors should be preferred where the SDK
+    allows submitting a query and polling for its completion.
+    """
+
+    sync_connector_class = None
+
+    def __init__(self, config: Dict[str, str]):
+        self.config = config
+        self._connector = self.sync_connector_class(config=config)
+
+    async def connect(self) -> None:
+        await run_blocking(self._connector.connect)
+
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        return await run_blocking(self._connector.execute_query, query, params)
+
+    async def drain_query(self, query: str) -> Tuple[int, int]:
+        return await run_blocking(self._connector.drain_query, query)
+
+    async def get_last_query_stats(self) -> Dict[str, Any]:
+        return await run_blocking(self._connector.get_last_query_stats)
+
+    async def close(self) -> None:
+        await run_blocking(self._connector.close)
@@ -0,0 +1,77 @@
+import asyncio
+from google.cloud import bigquery
+from typing import Optional, Dict, List, Any, Tuple
+from .async_base import run_blocking
+from .base import DEFAULT_FETCH_BATCH_SIZE, engine_stats
+from .bigquery import BigQueryConnector
+
+class AsyncBigQueryConnector:
+    def __init__(self, config: Dict[str, str]):
+        """
+        Initialize async BigQuery connector with configuration parameters.
+
+        Queries are submitted as jobs whose completion is polled, so a thread is only occupied for
+        the duration of each short REST call rather than the whole query.
+
+        Args:
+            config (Dict[str, str]): Same configuration as `BigQueryConnector`, plus:
+                - poll_interval_secs: (Optional) Delay between job status polls (default: 0.05)
+        """
+        self.config = config
+        self._connector = BigQueryConnector(config)
+        self.poll_interval_secs = float(config.get('poll_interval_secs', 0.05))
+        self._last_query_stats = engine_stats(None)
+
+    async def connect(self) -> None:
+        """Establish a connection to BigQuery."""
+        await run_blocking(self._connector.connect)
+
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Submit a query job, poll until it is done and return its results as a list of dictionaries.
+
+        Args:
+            query (str): SQL query to execute
+            params (Optional[Dict[str, Any]]): Query parameters
+
+        Returns:
+            List[Dict]: Query results as a list of dictionaries
+        """
+        job_config = self._connector._job_config()
+        if params:
+            job_config.query_parameters = [
+                bigquery.ScalarQueryParameter(k, self._connector._get_param_type(v), v)
+                for k, v in params.items()
+            ]
+
+        query_job = await self._submit(query, job_config)
+        results = await run_blocking(lambda: [dict(row.items()) for row in query_job.result()])
+        self._last_query_stats = BigQueryConnector._job_stats(query_job)
+        return results
+
+    async def drain_query(self, query: str) -> Tuple[int, int]:
+        """
+        Submit a query job, poll until it is done and stream its result pages without keeping them.
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        query_job = await self._submit(query, self._connector._job_config())
+        result = await run_blocking(BigQueryConnector._drain_job, query_job, DEFAULT_FETCH_BATCH_SIZE)
+        self._last_query_stats = BigQueryConnector._job_stats(query_job)
+        return result
+
+    async def _submit(self, query: str, job_config: bigquery.QueryJobConfig):
+        """Submit the query job and poll until it is done."""
+        query_job = await run_blocking(self._connector._client.query, query, job_config=job_config)
+        while not await run_blocking(query_job.done):
+            await asyncio.sleep(self.poll_interval_secs)
+        return query_job
+
+    async def get_last_query_stats(self) -> Dict[str, Any]:
+        """Return the job statistics of the last query."""
+        return self._last_query_stats
+
+    async def close(self) -> None:
+        """Close the BigQuery connection if it exists."""
+        await run_blocking(self._connector.close)
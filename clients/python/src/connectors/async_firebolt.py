@@ -0,0 +1,98 @@
+from typing import Dict, Any, Optional, List, Tuple
+from firebolt.async_db import connect
+from .base import DEFAULT_FETCH_BATCH_SIZE, engine_stats, estimate_row_bytes, sql_literal
+from .firebolt import shared_client_credentials
+
+class AsyncFireboltConnector:
+    def __init__(self, config: Dict[str, str]):
+        """
+        Initialize async Firebolt connector with configuration parameters.
+
+        Args:
+            config (Dict[str, str]): Same configuration as `FireboltConnector`.
+        """
+        self.config = config
+        self._validate_config()
+        self._conn = None
+        self.cursor = None
+
+    def _validate_config(self) -> None:
+        """Validate that required configuration parameters are present."""
+        required_params = ['engine_name', 'database', 'account_name', 'auth']
+        missing_params = [param for param in required_params if param not in self.config]
+        if missing_params:
+            raise ValueError(f"Missing required configuration parameters: {missing_params}")
+
+    async def connect(self) -> None:
+        """Connect to Firebolt using `firebolt.async_db`."""
+        if not self._conn:
+            self._conn = await connect(
+                engine_name=self.config['engine_name'],
+                database=self.config['database'],
+                account_name=self.config['account_name'],
+                auth=shared_client_credentials(self.config)
+            )
+            self.cursor = self._conn.cursor()
+            await self.cursor.execute("SET enable_result_cache=false")
+            if self.config.get('query_tag'):
+                await self.cursor.execute(f"SET query_label={sql_literal(self.config['query_tag'])}")
+
+    async def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a query on Firebolt without blocking the event loop.
+
+        Args:
+            query (str): SQL query to execute
+            parameters (Optional[Dict[str, Any]]): Query parameters
+
+        Returns:
+            List[Dict[str, Any]]: Query results
+        """
+        if not self._conn or not self.cursor:
+            await self.connect()
+
+        try:
+            if parameters:
+                await self.cursor.execute(query, parameters)
+            else:
+                await self.cursor.execute(query)
+
+            if self.cursor.description:  # If the query returns results
+                return await self.cursor.fetchall()
+            return []
+
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    async def drain_query(self, query: str, batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Execute a query on Firebolt and stream its result with `fetchmany` without keeping it.
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        if not self._conn or not self.cursor:
+            await self.connect()
+
+        try:
+            await self.cursor.execute(query)
+            num_rows = 0
+            num_bytes = 0
+            if self.cursor.description:
+                while rows := await self.cursor.fetchmany(batch_size):
+                    num_rows += len(rows)
+                    num_bytes += sum(map(estimate_row_bytes, rows))
+            return num_rows, num_bytes
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    async def get_last_query_stats(self) -> Dict[str, Any]:
+        """Return the engine stats known right after the last query: only its query ID for Firebolt."""
+        return engine_stats(self.cursor.query_id if self.cursor else None)
+
+    async def close(self) -> None:
+        """Close the Firebolt connection if it exists."""
+        if self._conn:
+            await self._conn.aclose()
+            self._conn = None
+            self.cursor = None
@@ -0,0 +1,8 @@
+from .async_base import ThreadedAsyncConnector
+from .redshift import RedshiftConnector
+
+
+class AsyncRedshiftConnector(ThreadedAsyncConnector):
+    """Async Redshift connector. psycopg2 has no awaitable API, so queries run on the executor."""
+
+    sync_connector_class = RedshiftConnector
@@ -0,0 +1,81 @@
+import asyncio
+import snowflake.connector
+from typing import Optional, Dict, List, Any, Tuple
+from .async_base import run_blocking
+from .base import drain_cursor, engine_stats
+from .snowflake import SnowflakeConnector
+
+class AsyncSnowflakeConnector:
+    def __init__(self, config: Dict[str, str]):
+        """
+        Initialize async Snowflake connector with configuration parameters.
+
+        Queries are submitted with `execute_async` and their status is polled, so a thread is only
+        occupied for the duration of each short REST call rather than the whole query.
+
+        Args:
+            config (Dict[str, str]): Same configuration as `SnowflakeConnector`, plus:
+                - poll_interval_secs: (Optional) Delay between status polls (default: 0.05)
+        """
+        self.config = config
+        self._connector = SnowflakeConnector(config)
+        self.poll_interval_secs = float(config.get('poll_interval_secs', 0.05))
+
+    async def connect(self) -> None:
+        """Establish a connection to Snowflake."""
+        await run_blocking(self._connector.connect)
+
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Submit a query, poll until it finishes and return its results as a list of dictionaries.
+
+        Args:
+            query (str): SQL query to execute
+            params (Optional[Dict[str, Any]]): Query parameters for parameterized queries
+
+        Returns:
+            List[Dict]: Query results as a list of dictionaries
+        """
+        if not self._connector._conn:
+            await self.connect()
+
+        try:
+            cursor = await self._submit(self._connector._conn.cursor(snowflake.connector.DictCursor), query, params)
+            return await run_blocking(cursor.fetchall)
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    async def drain_query(self, query: str) -> Tuple[int, int]:
+        """
+        Submit a query, poll until it finishes and stream its result with `fetchmany` without keeping it.
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        if not self._connector._conn:
+            await self.connect()
+
+        try:
+            cursor = await self._submit(self._connector._conn.cursor(), query)
+            return await run_blocking(drain_cursor, cursor)
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    async def _submit(self, cursor, query: str, params: Optional[Dict[str, Any]] = None):
+        """Run the query asynchronously on Snowflake and attach its result to the cursor once done."""
+        conn = self._connector._conn
+        await run_blocking(cursor.execute_async, query, params or {})
+        query_id = cursor.sfqid
+        self._connector.last_query_id = query_id
+        while conn.is_still_running(await run_blocking(conn.get_query_status_throw_if_error, query_id)):
+            await asyncio.sleep(self.poll_interval_secs)
+        await run_blocking(cursor.get_results_from_sfqid, query_id)
+        return cursor
+
+    async def get_last_query_stats(self) -> Dict[str, Any]:
+        """Return the engine stats known right after the last query: only its query ID for Snowflake."""
+        return engine_stats(self._connector.last_query_id)
+
+    async def close(self) -> None:
+        """Close the Snowflake connection if it exists."""
+        await run_blocking(self._connector.close)
@@ -0,0 +1,132 @@
+import httpx
+from typing import Optional, Dict, List, Any, Tuple
+from .base import engine_stats, estimate_row_bytes
+from .trino import trino_engine_stats
+
+class AsyncTrinoConnector:
+    def __init__(self, config: Dict[str, str]):
+        """
+        Initialize async Trino connector with configuration parameters.
+
+        Talks to the Trino client REST protocol (`/v1/statement`) over `httpx.AsyncClient`, so many
+        queries can be in flight on a single thread.
+
+        Args:
+            config (Dict[str, str]): Same configuration as `TrinoConnector`. Of the authentication
+                methods only basic ('password') and 'jwt' are supported.
+        """
+        self.config = config
+        self._validate_config()
+        self._client = None
+        self._last_query_stats = engine_stats(None)
+
+    def _validate_config(self) -> None:
+        """Validate that required configuration parameters are present."""
+        required_params = ['host', 'catalog', 'schema', 'user']
+        missing_params = [param for param in required_params if param not in self.config]
+        if missing_params:
+            raise ValueError(f"Missing required configuration parameters: {missing_params}")
+        if self.config.get('auth') == 'oauth2':
+            raise ValueError("OAuth2 authentication is not supported by the async Trino connector")
+
+    async def connect(self) -> None:
+        """Create the HTTP client used for all statements of this connection."""
+        if not self._client:
+            use_https = self.config.get('use_https', True)
+            port = int(self.config.get('port', 443 if use_https else 8080))
+            scheme = 'https' if use_https else 'http'
+            headers = {
+                'X-Trino-User': self.config['user'],
+                'X-Trino-Catalog': self.config['catalog'],
+                'X-Trino-Schema': self.config['schema'],
+            }
+            if self.config.get('query_tag'):
+                headers['X-Trino-Client-Tags'] = self.config['query_tag']
+            auth = None
+            if use_https or self.config.get('force_auth', False):
+                if self.config.get('password'):
+                    auth = httpx.BasicAuth(self.config['user'], self.config['password'])
+                elif self.config.get('auth') == 'jwt' and 'jwt_token' in self.config:
+                    headers['Authorization'] = f"Bearer {self.config['jwt_token']}"
+            self._client = httpx.AsyncClient(
+                base_url=f"{scheme}://{self.config['host']}:{port}",
+                headers=headers,
+                auth=auth,
+                verify=self.config.get('verify_ssl', True),
+                timeout=None,
+            )
+
+    async def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Execute a SQL query and return results as a list of dictionaries.
+
+        Args:
+            query (str): SQL query to execute
+            params (Optional[Dict[str, Any]]): Not supported by the REST protocol, must be empty
+
+        Returns:
+            List[Dict]: Query results as a list of dictionaries
+        """
+        if params:
+            raise ValueError("Query parameters are not supported by the async Trino connector")
+        if not self._client:
+            await self.connect()
+
+        try:
+            columns = []
+            results = []
+            async for payload in self._statement_pages(query):
+                if not columns and 'columns' in payload:
+                    columns = [column['name'] for column in payload['columns']]
+                results.extend(dict(zip(columns, row)) for row in payload.get('data', []))
+            return results
+
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    async def drain_query(self, query: str) -> Tuple[int, int]:
+        """
+        Execute a SQL query and count the rows of each result page without keeping them.
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        if not self._client:
+            await self.connect()
+
+        try:
+            num_rows = 0
+            num_bytes = 0
+            async for payload in self._statement_pages(query):
+                rows = payload.get('data', [])
+                num_rows += len(rows)
+                num_bytes += sum(map(estimate_row_bytes, rows))
+            return num_rows, num_bytes
+
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    async def _statement_pages(self, query: str):
+        """Submit a statement and yield every response payload until there is no `nextUri`."""
+        response = await self._client.post('/v1/statement', content=query.encode('utf-8'))
+        while True:
+            response.raise_for_status()
+            payload = response.json()
+            if 'error' in payload:
+                raise Exception(payload['error'].get('message', payload['error']))
+            yield payload
+            next_uri = payload.get('nextUri')
+            if not next_uri:
+                self._last_query_stats = trino_engine_stats(payload.get('id'), payload.get('stats'))
+                return
+            response = await self._client.get(next_uri)
+
+    async def get_last_query_stats(self) -> Dict[str, Any]:
+        """Return the statement stats the coordinator reported for the last query."""
+        return self._last_query_stats
+
+    async def close(self) -> None:
+        """Close the HTTP client if it exists."""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 class WarehouseConnector(ABC):
     @abstractmethod
@@ -16,3 +16,59 @@ class WarehouseConnector(ABC):
     def close(self) -> None:
         """Close the connection"""
         pass
+
+
+# Rows fetched per round trip when results are drained instead of materialized
+DEFAULT_FETCH_BATCH_SIZE = 10_000
+
+
+def estimate_row_bytes(row) -> int:
+    """Approximate payload size of a result row: length of text and binary values, 8 per other non-null value."""
+    size = 0
+    for value in (row.values() if isinstance(row, dict) else row):
+        if isinstance(value, (str, bytes)):
+            size += len(value)
+        elif value is not None:
+            size += 8
+    return size
+
+
+def drain_cursor(cursor, batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Tuple[int, int]:
+    """Consume the pending result of a DB-API cursor with `fetchmany` and return (rows, bytes)."""
+    num_rows = 0
+    num_bytes = 0
+    if not cursor.description:
+        return num_rows, num_bytes
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return num_rows, num_bytes
+        num_rows += len(rows)
+        num_bytes += sum(map(estimate_row_bytes, rows))
+
+
+# Engine-reported timing record of a single query. Durations are in milliseconds; a field is None
+# where the engine does not expose it.
+ENGINE_STATS_FIELDS = [
+    'engine_query_id',
+    'engine_queued_ms',
+    'engine_compile_ms',
+    'engine_execution_ms',
+    'engine_elapsed_ms',
+    'engine_cpu_ms',
+    'engine_bytes_scanned',
+]
+
+
+def engine_stats(query_id, **timings) -> Dict[str, Any]:
+    """Build an engine stats record with every field of `ENGINE_STATS_FIELDS`."""
+    stats = dict.fromkeys(ENGINE_STATS_FIELDS)
+    stats['engine_query_id'] = query_id
+    for name, value in timings.items():
+        stats[f'engine_{name}'] = value
+    return stats
+
+
+def sql_literal(value: str) -> str:
+    """Quote a string as a SQL literal."""
+    return "'" + str(value).replace("'", "''") + "'"
@@ -1,7 +1,47 @@
+from datetime import datetime, timezone
+from google.auth.transport.requests import Request
 from google.cloud import bigquery
 from google.oauth2 import service_account
-from typing import Optional, Dict, List, Any, Union
+from typing import Optional, Dict, List, Any, Tuple, Union
 from contextlib import contextmanager
+from .base import DEFAULT_FETCH_BATCH_SIZE, engine_stats, estimate_row_bytes
+from .token_cache import credential_key, file_token_cache, token_cache
+
+
+def shared_service_account_credentials(key: Dict[str, Any]) -> service_account.Credentials:
+    """Service account credentials shared by all clients of the same key in this process."""
+    # Scope the credentials up front, otherwise every client would make its own scoped copy
+    return token_cache.get(
+        credential_key('bigquery', key),
+        lambda: (service_account.Credentials.from_service_account_info(key, scopes=bigquery.Client.SCOPE), None),
+    )
+
+
+def authorize(credentials: service_account.Credentials, key: Dict[str, Any]) -> None:
+    """
+    Make sure the shared `credentials` hold a valid access token.
+
+    The token is taken from the local file cache if another process already fetched it and is
+    otherwise fetched once (single-flight across threads and processes) and stored there.
+    google-auth renews it on the shared object when it expires during a run.
+    """
+    if credentials.valid:
+        return
+    cache_key = credential_key('bigquery', key)
+    with file_token_cache.lock(cache_key):
+        if credentials.valid:
+            return
+        cached = file_token_cache.load(cache_key)
+        if cached is not None:
+            credentials.token, expires_at = cached
+            # google-auth compares expiry against naive UTC datetimes
+            credentials.expiry = datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None)
+        if not credentials.valid:
+            credentials.refresh(Request())
+            file_token_cache.store(
+                cache_key, credentials.token, credentials.expiry.replace(tzinfo=timezone.utc).timestamp()
+            )
+
 
 class BigQueryConnector:
     def __init__(self, config: Dict[str, str]):
@@ -14,10 +54,13 @@ class BigQueryConnector:
                 - credentials_path: Path to service account JSON file
                 - dataset: (Optional) Default dataset to use
                 - location: (Optional) Default location for jobs
+                - query_tag: (Optional) Value of the `benchmark_run` label attached to every job
         """
         self.config = config
         self._validate_config()
         self._client = None
+        self._credentials = None
+        self._last_query_stats = engine_stats(None)
         self._init_client()
 
     def _validate_config(self) -> None:
@@ -32,17 +75,20 @@ class BigQueryConnector:
         project_id = self.config['project_id']
         dataset_id = self.config.get('dataset')
         default_config = bigquery.QueryJobConfig(default_dataset=f"{project_id}.{dataset_id}")
-        credentials = service_account.Credentials.from_service_account_info(self.config['key'])
+        self._credentials = shared_service_account_credentials(self.config['key'])
         self._client = bigquery.Client(
             project=project_id,
-            credentials=credentials,
+            credentials=self._credentials,
             default_query_job_config=default_config,
             location=self.config.get('location')
         )
 
     def connect(self) -> None:
         """Establish a connection to BigQuery."""
-        self._init_client()  # Initialize the BigQuery client
+        # The client is already initialized by the constructor, only the token may be missing
+        if self._client is None:
+            self._init_client()
+        authorize(self._credentials, self.config['key'])
 
     def execute_query(
         self, 
@@ -61,10 +107,7 @@ class BigQueryConnector:
         Returns:
             List[Dict]: Query results as a list of dictionaries
         """
-        job_config = bigquery.QueryJobConfig(
-            use_query_cache=False,  # Disable query cache
-            dry_run=dry_run
-        )
+        job_config = self._job_config(dry_run=dry_run)
 
         if params:
             job_config.query_parameters = [
@@ -77,7 +120,65 @@ class BigQueryConnector:
         if dry_run:
             return [{'bytes_processed': query_job.total_bytes_processed}]
 
-        return [dict(row.items()) for row in query_job]
+        results = [dict(row.items()) for row in query_job]
+        self._last_query_stats = self._job_stats(query_job)
+        return results
+
+    def drain_query(self, query: str, batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Execute a SQL query and stream its result pages without building dictionaries.
+
+        Args:
+            query (str): SQL query to execute
+            batch_size (int): Rows fetched per result page
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        query_job = self._client.query(query, job_config=self._job_config())
+        result = self._drain_job(query_job, batch_size)
+        self._last_query_stats = self._job_stats(query_job)
+        return result
+
+    def _job_config(self, **kwargs) -> bigquery.QueryJobConfig:
+        """Query job configuration with the query cache disabled and the run label attached."""
+        job_config = bigquery.QueryJobConfig(use_query_cache=False, **kwargs)
+        if self.config.get('query_tag'):
+            job_config.labels = {'benchmark_run': self.config['query_tag']}
+        return job_config
+
+    @staticmethod
+    def _job_stats(query_job) -> Dict[str, Any]:
+        """Map the statistics of a finished query job to an engine stats record."""
+        def millis_between(start, end):
+            return (end - start).total_seconds() * 1000 if start and end else None
+
+        return engine_stats(
+            query_job.job_id,
+            queued_ms=millis_between(query_job.created, query_job.started),
+            execution_ms=millis_between(query_job.started, query_job.ended),
+            elapsed_ms=millis_between(query_job.created, query_job.ended),
+            # Slot time is the closest BigQuery equivalent of CPU time
+            cpu_ms=query_job.slot_millis,
+            bytes_scanned=query_job.total_bytes_processed,
+        )
+
+    def get_last_query_stats(self) -> Dict[str, Any]:
+        """Return the job statistics of the last query."""
+        return self._last_query_stats
+
+    def fetch_query_stats(self, query_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Job statistics are complete when a query finishes, so there is nothing to look up later."""
+        return {}
+
+    @staticmethod
+    def _drain_job(query_job, batch_size: int) -> Tuple[int, int]:
+        num_rows = 0
+        num_bytes = 0
+        for row in query_job.result(page_size=batch_size):
+            num_rows += 1
+            num_bytes += estimate_row_bytes(row.values())
+        return num_rows, num_bytes
 
     def _get_param_type(self, value: Any) -> str:
         """Determine BigQuery parameter type from Python value."""
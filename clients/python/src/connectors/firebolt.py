@@ -1,6 +1,23 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from firebolt.db import connect
 from firebolt.client.auth import ClientCredentials
+from .base import DEFAULT_FETCH_BATCH_SIZE, drain_cursor, engine_stats, sql_literal
+from .token_cache import credential_key, token_cache
+
+
+def shared_client_credentials(config: Dict[str, Any]) -> ClientCredentials:
+    """
+    OAuth client credentials shared by all connections of the same client in this process.
+
+    The shared object fetches an access token once and renews it when it expires, instead of every
+    connection authenticating on its own. The SDK's token cache on disk shares the token with other
+    processes.
+    """
+    client_id, client_secret = config['auth']['id'], config['auth']['secret']
+    return token_cache.get(
+        credential_key('firebolt', client_id, client_secret),
+        lambda: (ClientCredentials(client_id, client_secret, use_token_cache=True), None),
+    )
 
 class FireboltConnector:
     def __init__(self, config: Dict[str, str]):
@@ -14,6 +31,7 @@ class FireboltConnector:
                 - account_name: Account name
                 - client_id: OAuth client ID
                 - client_secret: OAuth client secret
+                - query_tag: (Optional) Query label attached to every query of the session
         """
         self.config = config
         self._validate_config()
@@ -34,13 +52,12 @@ class FireboltConnector:
                 engine_name=self.config['engine_name'],
                 database=self.config['database'],
                 account_name=self.config['account_name'],
-                auth=ClientCredentials(
-                    self.config['auth']['id'],
-                    self.config['auth']['secret']
-                )
+                auth=shared_client_credentials(self.config)
             )
             self.cursor = self._conn.cursor()
             self.cursor.execute("SET enable_result_cache=false")
+            if self.config.get('query_tag'):
+                self.cursor.execute(f"SET query_label={sql_literal(self.config['query_tag'])}")
 
     def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
@@ -69,6 +86,64 @@ class FireboltConnector:
         except Exception as e:
             raise Exception(f"Error executing query: {str(e)}")
 
+    def drain_query(self, query: str, batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Execute a query on Firebolt and stream its result with `fetchmany` without keeping it.
+
+        Args:
+            query (str): SQL query to execute
+            batch_size (int): Rows fetched per batch
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        if not self._conn or not self.cursor:
+            self.connect()
+
+        try:
+            self.cursor.execute(query)
+            return drain_cursor(self.cursor, batch_size)
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    def get_last_query_stats(self) -> Dict[str, Any]:
+        """Return the engine stats known right after the last query: only its query ID for Firebolt."""
+        return engine_stats(self.cursor.query_id if self.cursor else None)
+
+    def fetch_query_stats(self, query_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up the engine timings of queries in the engine query history.
+
+        The history is filtered by the session's `query_tag` label, so all queries of a run are
+        fetched with a single statement.
+
+        Args:
+            query_ids (List[str]): Query IDs returned by `get_last_query_stats`
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Engine stats by query ID
+        """
+        if not self.config.get('query_tag'):
+            return {}
+        rows = self.execute_query(
+            "SELECT query_id, time_in_queue_us, duration_us, e2e_duration_us, cpu_usage_us, scanned_bytes "
+            "FROM information_schema.engine_query_history "
+            f"WHERE query_label = {sql_literal(self.config['query_tag'])}"
+        )
+        wanted = set(query_ids)
+        return {
+            query_id: engine_stats(
+                query_id,
+                queued_ms=queued_us / 1000,
+                execution_ms=duration_us / 1000,
+                elapsed_ms=e2e_duration_us / 1000,
+                cpu_ms=cpu_us / 1000,
+                bytes_scanned=scanned_bytes,
+            )
+            for query_id, queued_us, duration_us, e2e_duration_us, cpu_us, scanned_bytes in rows
+            if query_id in wanted
+        }
+
     def close(self) -> None:
         """Close the Firebolt connection if it exists."""
         if self._conn:
@@ -1,7 +1,13 @@
+import re
+import uuid
 import psycopg2
 import psycopg2.extras
-from typing import Optional, Dict, List, Any
-from contextlib import contextmanager
+from typing import Optional, Dict, List, Any, Tuple
+from .base import DEFAULT_FETCH_BATCH_SIZE, drain_cursor, engine_stats
+
+# Comment that marks every tagged query with a key unique within the run, see `_mark`
+QUERY_MARKER = "/* bench_query={key} */ "
+QUERY_MARKER_PATTERN = re.compile(r"/\* bench_query=([0-9a-f]+-\d+) \*/")
 
 class RedshiftConnector:
     def __init__(self, config: Dict[str, str]):
@@ -15,11 +21,27 @@ class RedshiftConnector:
                 - database: Database name
                 - user: Username
                 - password: Password
+                - query_tag: (Optional) query_group label attached to every query of the session
         """
         self.config = config
         self._validate_config()
         self._conn = None
         self._cursor = None
+        # Key of the last marked query: this connector's ID and the number of the query
+        self._connector_id = uuid.uuid4().hex[:12]
+        self._num_queries = 0
+        self.last_query_key = None
+
+    def _mark(self, query: str) -> str:
+        """
+        Prefix a query of a tagged session with a comment that identifies it in `STL_QUERY`, so that
+        its engine stats can be looked up after the run without a `pg_last_query_id()` round trip.
+        """
+        if not self.config.get('query_tag'):
+            return query
+        self._num_queries += 1
+        self.last_query_key = f"{self._connector_id}-{self._num_queries}"
+        return QUERY_MARKER.format(key=self.last_query_key) + query
 
     def _validate_config(self) -> None:
         """Validate that required configuration parameters are present."""
@@ -28,9 +50,8 @@ class RedshiftConnector:
         if missing_params:
             raise ValueError(f"Missing required configuration parameters: {missing_params}")
 
-    @contextmanager
     def connect(self):
-        """Context manager for database connections."""
+        """Establish a connection to Redshift."""
         self._conn = psycopg2.connect(
             host=self.config['host'],
             port=self.config['port'],
@@ -40,6 +61,8 @@ class RedshiftConnector:
         )
         self._cursor = self._conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         self._cursor.execute("SET enable_result_cache_for_session TO off;")
+        if self.config.get('query_tag'):
+            self._cursor.execute("SET query_group TO %s;", (self.config['query_tag'],))
 
     def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """
@@ -55,15 +78,101 @@ class RedshiftConnector:
         if not self._conn or not self._cursor:
             self.connect() 
         try:
-            self._cursor.execute(query)
+            self._cursor.execute(self._mark(query), params)
             if self._cursor.description:
                 return self._cursor.fetchall()
             return []
         except Exception as e:
             raise Exception(f"Error executing redshift query: {str(e)}")
-            
+
+    def get_last_query_stats(self) -> Dict[str, Any]:
+        """
+        Return the engine stats known right after the last query: only the key of its query marker
+        for Redshift, which `fetch_query_stats` resolves to the query ID. Costs no round trip.
+        """
+        return engine_stats(self.last_query_key)
+
+    def fetch_query_stats(self, query_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Look up the engine timings of queries in `STL_QUERY` and `STL_WLM_QUERY`.
+
+        All queries labeled with the session's `query_tag` query group are fetched with a single
+        statement and matched by the marker comment at the start of their text. Compile time
+        comes from `SVL_COMPILE`, CPU time from `SVL_QUERY_METRICS_SUMMARY` and scanned bytes from
+        `STL_SCAN`.
+
+        Args:
+            query_ids (List[str]): Query marker keys returned by `get_last_query_stats`
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Engine stats, with the Redshift query ID, by marker key
+        """
+        if not self.config.get('query_tag'):
+            return {}
+        rows = self.execute_query(
+            """
+            SELECT q.query AS query_id,
+                   LEFT(q.querytxt, 64) AS query_start,
+                   w.total_queue_time / 1000.0 AS queued_ms,
+                   c.compile_ms,
+                   w.total_exec_time / 1000.0 AS execution_ms,
+                   DATEDIFF(ms, q.starttime, q.endtime) AS elapsed_ms,
+                   m.query_cpu_time * 1000.0 AS cpu_ms,
+                   s.bytes_scanned
+            FROM stl_query q
+            LEFT JOIN stl_wlm_query w ON w.query = q.query
+            LEFT JOIN (
+                SELECT query, SUM(DATEDIFF(ms, starttime, endtime)) AS compile_ms
+                FROM svl_compile WHERE compile = 1 GROUP BY query
+            ) c ON c.query = q.query
+            LEFT JOIN svl_query_metrics_summary m ON m.query = q.query
+            LEFT JOIN (SELECT query, SUM(bytes) AS bytes_scanned FROM stl_scan GROUP BY query) s ON s.query = q.query
+            WHERE TRIM(q.label) = %(query_tag)s
+            """,
+            {'query_tag': self.config['query_tag']}
+        )
+        wanted = set(query_ids)
+        stats = {}
+        for row in rows:
+            marker = QUERY_MARKER_PATTERN.search(row['query_start'] or '')
+            if marker is None or marker.group(1) not in wanted:
+                continue
+            stats[marker.group(1)] = engine_stats(
+                row['query_id'],
+                queued_ms=row['queued_ms'],
+                compile_ms=row['compile_ms'],
+                execution_ms=row['execution_ms'],
+                elapsed_ms=row['elapsed_ms'],
+                cpu_ms=row['cpu_ms'],
+                bytes_scanned=row['bytes_scanned'],
+            )
+        return stats
+
+    def drain_query(self, query: str, batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Execute a SQL query and consume its result with `fetchmany` without building dictionaries.
+
+        libpq still receives the complete result before the first row is returned, but no Python
+        objects are kept for rows that have already been counted.
+
+        Args:
+            query (str): SQL query to execute
+            batch_size (int): Rows fetched per batch
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        if not self._conn or not self._cursor:
+            self.connect()
+        try:
+            with self._conn.cursor() as cursor:
+                cursor.execute(self._mark(query))
+                return drain_cursor(cursor, batch_size)
+        except Exception as e:
+            raise Exception(f"Error executing redshift query: {str(e)}")
+
     def close(self) -> None:
-        """Close the Snowflake connection if it exists."""
+        """Close the Redshift connection if it exists."""
         if self._conn:
             self._conn.close()
             self._conn = None
@@ -1,6 +1,9 @@
 import snowflake.connector
-from typing import Optional, Dict, List, Any
-from contextlib import contextmanager
+from typing import Optional, Dict, List, Any, Tuple
+from .base import DEFAULT_FETCH_BATCH_SIZE, drain_cursor, engine_stats, sql_literal
+
+# Maximum number of rows the INFORMATION_SCHEMA query history table functions return
+QUERY_HISTORY_RESULT_LIMIT = 10000
 
 class SnowflakeConnector:
     def __init__(self, config: Dict[str, str]):
@@ -15,11 +18,13 @@ class SnowflakeConnector:
                 - warehouse: (Optional) Default warehouse
                 - database: (Optional) Default database
                 - schema: (Optional) Default schema
+                - query_tag: (Optional) QUERY_TAG attached to every query of the session
         """
         self.config = config
         self._validate_config()
         self._conn = None
         self._cursor = None
+        self.last_query_id = None
 
     def _validate_config(self) -> None:
         """Validate that required configuration parameters are present."""
@@ -28,10 +33,12 @@ class SnowflakeConnector:
         if missing_params:
             raise ValueError(f"Missing required configuration parameters: {missing_params}")
 
-    @contextmanager
     def connect(self):
-        """Context manager for database connections."""
+        """Establish a connection to Snowflake."""
         if not self._conn:
+            session_parameters = {}
+            if self.config.get('query_tag'):
+                session_parameters['QUERY_TAG'] = self.config['query_tag']
             self._conn = snowflake.connector.connect(
                 account=self.config['account'],
                 user=self.config['user'],
@@ -39,6 +46,7 @@ class SnowflakeConnector:
                 warehouse=self.config.get('warehouse'),
                 database=self.config.get('database'),
                 schema=self.config.get('schema'),
+                session_parameters=session_parameters,
                 telemetry=False
             )
             self._cursor = self._conn.cursor(snowflake.connector.DictCursor)
@@ -60,10 +68,86 @@ class SnowflakeConnector:
 
         try:
             self._cursor.execute(query, params or {})
+            self.last_query_id = self._cursor.sfqid
             return self._cursor.fetchall()
         except Exception as e:
             raise Exception(f"Error executing query: {str(e)}")
 
+    def drain_query(self, query: str, batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Execute a SQL query and stream its result with `fetchmany` without building dictionaries.
+
+        Args:
+            query (str): SQL query to execute
+            batch_size (int): Rows fetched per batch
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        if not self._conn or not self._cursor:
+            self.connect()
+
+        try:
+            # A plain cursor returns tuples, which avoids the per-row dictionaries of DictCursor
+            with self._conn.cursor() as cursor:
+                cursor.execute(query)
+                self.last_query_id = cursor.sfqid
+                return drain_cursor(cursor, batch_size)
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    def get_last_query_stats(self) -> Dict[str, Any]:
+        """Return the engine stats known right after the last query: only its query ID for Snowflake."""
+        return engine_stats(self.last_query_id)
+
+    def fetch_query_stats(self, query_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up the engine timings of queries with bulk `QUERY_HISTORY` lookups.
+
+        The history of the current user is read in pages of the table function's maximum of
+        10,000 queries, from the latest back in time, until every query of `query_ids` is found or
+        the history is exhausted. Only queries with the session's `query_tag` are returned.
+
+        Args:
+            query_ids (List[str]): Query IDs returned by `get_last_query_stats`
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Engine stats by query ID
+        """
+        if not self.config.get('query_tag'):
+            return {}
+        wanted = set(query_ids)
+        stats = {}
+        page_end = None
+        while wanted - stats.keys():
+            end_range = f", END_TIME_RANGE_END => {sql_literal(page_end.isoformat())}::TIMESTAMP_LTZ" if page_end else ""
+            # Every page reports its size and earliest end time, also without any tagged query
+            rows = self.execute_query(
+                "WITH page AS (SELECT * FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_USER("
+                f"RESULT_LIMIT => {QUERY_HISTORY_RESULT_LIMIT}{end_range}))), "
+                "bounds AS (SELECT COUNT(*) AS page_rows, MIN(end_time) AS page_end FROM page) "
+                "SELECT b.page_rows AS page_rows, b.page_end AS page_end, p.query_id AS query_id, "
+                "p.queued_provisioning_time + p.queued_repair_time + p.queued_overload_time AS queued_ms, "
+                "p.compilation_time AS compile_ms, p.execution_time AS execution_ms, "
+                "p.total_elapsed_time AS elapsed_ms, p.bytes_scanned AS bytes_scanned "
+                f"FROM bounds b LEFT JOIN page p ON p.query_tag = {sql_literal(self.config['query_tag'])}"
+            )
+            for row in rows:
+                if row['QUERY_ID'] in wanted:
+                    stats[row['QUERY_ID']] = engine_stats(
+                        row['QUERY_ID'],
+                        queued_ms=row['QUEUED_MS'],
+                        compile_ms=row['COMPILE_MS'],
+                        execution_ms=row['EXECUTION_MS'],
+                        elapsed_ms=row['ELAPSED_MS'],
+                        bytes_scanned=row['BYTES_SCANNED'],
+                    )
+            # A partial page is the oldest one; a page that ends where the previous one did cannot
+            # be paged past
+            if rows[0]['PAGE_ROWS'] < QUERY_HISTORY_RESULT_LIMIT or rows[0]['PAGE_END'] == page_end:
+                break
+            page_end = rows[0]['PAGE_END']
+        return stats
 
     def close(self) -> None:
         """Close the Snowflake connection if it exists."""
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where the file cache is used without a lock
+    fcntl = None
+
+# Directory of the token cache shared by all benchmark processes of the local user
+DEFAULT_TOKEN_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "benchmark-client", "tokens")
+
+# Cached tokens expiring within this many seconds are treated as already expired
+EXPIRY_MARGIN_SECS = 60
+
+
+def credential_key(*parts: Any) -> str:
+    """Stable key of a credential set that does not reveal the secrets it is derived from."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _is_expired(expires_at: Optional[float]) -> bool:
+    return expires_at is not None and expires_at - EXPIRY_MARGIN_SECS <= time.time()
+
+
+class TokenCache:
+    """
+    Thread-safe in-process cache of authentication objects and tokens keyed by credential set.
+
+    Creation is single-flight: when many connections of the same credential set connect at once,
+    only the first one calls the factory and the others wait for and share its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key: str, factory: Callable[[], Tuple[Any, Optional[float]]]) -> Any:
+        """
+        Return the cached value of `key`, creating it with `factory` if it is missing or expired.
+
+        Args:
+            key: Credential key, see `credential_key`.
+            factory: Returns the value and its expiry as a Unix timestamp, or None if the value
+                never expires (e.g. an auth object that refreshes its own token).
+
+        Returns:
+            The cached value.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and not _is_expired(entry[1]):
+            return entry[0]
+        with self.key_lock(key):
+            entry = self._entries.get(key)
+            if entry is None or _is_expired(entry[1]):
+                entry = self._entries[key] = factory()
+            return entry[0]
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class FileTokenCache:
+    """
+    Token cache in a local directory shared across processes, e.g. the shards of a sharded run.
+
+    Every entry is a small JSON file readable only by the current user. `lock` serializes token
+    refreshes of one credential set across threads and processes.
+    """
+
+    def __init__(self, directory: str = DEFAULT_TOKEN_CACHE_DIR):
+        self.directory = directory
+        self._thread_locks = TokenCache()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    @contextmanager
+    def lock(self, key: str):
+        """Hold the refresh lock of `key` in this process and, where supported, across processes."""
+        with self._thread_locks.key_lock(key):
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            with open(self._path(key, "lock"), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return the cached (token, expiry Unix timestamp) of `key` unless it is missing or expired."""
+        try:
+            with open(self._path(key, "json"), "r") as f:
+                entry = json.load(f)
+            token, expires_at = entry["token"], float(entry["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return None if _is_expired(expires_at) else (token, expires_at)
+
+    def store(self, key: str, token: str, expires_at: float) -> None:
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = self._path(key, "json")
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # Write to a private temporary file first so that readers never see a partial entry
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"token": token, "expires_at": expires_at}, f)
+        os.replace(temp_path, path)
+
+
+# Shared by all connectors of a process
+token_cache = TokenCache()
+file_token_cache = FileTokenCache()
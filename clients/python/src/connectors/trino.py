@@ -1,5 +1,24 @@
 import trino
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
+from .base import DEFAULT_FETCH_BATCH_SIZE, drain_cursor, engine_stats, sql_literal
+
+# Query IDs per statement when looking up planning times in `system.runtime.queries`
+QUERY_STATS_BATCH_SIZE = 1000
+
+
+def trino_engine_stats(query_id: Optional[str], stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Map Trino statement stats (as returned by the client protocol) to an engine stats record."""
+    stats = stats or {}
+    queued_ms = stats.get('queuedTimeMillis')
+    elapsed_ms = stats.get('elapsedTimeMillis')
+    return engine_stats(
+        query_id,
+        queued_ms=queued_ms,
+        execution_ms=elapsed_ms - queued_ms if elapsed_ms is not None and queued_ms is not None else None,
+        elapsed_ms=elapsed_ms,
+        cpu_ms=stats.get('cpuTimeMillis'),
+        bytes_scanned=stats.get('processedBytes'),
+    )
 
 class TrinoConnector:
     def __init__(self, config: Dict[str, str]):
@@ -17,10 +36,12 @@ class TrinoConnector:
                 - auth: (Optional) Authentication method ('basic', 'oauth2', 'jwt', 'kerberos')
                 - use_https: (Optional) Whether to use HTTPS (default: True)
                 - verify_ssl: (Optional) Whether to verify SSL certificates (default: True)
+                - query_tag: (Optional) Client tag attached to every query of the session
         """
         self.config = config
         self._validate_config()
         self._conn = None
+        self._last_query_stats = engine_stats(None)
 
     def _validate_config(self) -> None:
         """Validate that required configuration parameters are present."""
@@ -75,6 +96,8 @@ class TrinoConnector:
             
             if auth:
                 connection_params['auth'] = auth
+            if self.config.get('query_tag'):
+                connection_params['client_tags'] = [self.config['query_tag']]
                 
             # Use getattr to avoid linter issues with dynamic imports
             dbapi = getattr(trino, 'dbapi', None)
@@ -105,18 +128,67 @@ class TrinoConnector:
             columns = [desc[0] for desc in cursor.description] if cursor.description else []
             
             # Fetch all results and convert to list of dictionaries
-            rows = cursor.fetchall()
-            results = []
-            for row in rows:
-                result_dict = dict(zip(columns, row))
-                results.append(result_dict)
-                
+            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+            self._last_query_stats = trino_engine_stats(cursor.query_id, cursor.stats)
             cursor.close()
             return results
             
         except Exception as e:
             raise Exception(f"Error executing query: {str(e)}")
 
+    def drain_query(self, query: str, batch_size: int = DEFAULT_FETCH_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Execute a SQL query and stream its result pages with `fetchmany` without keeping them.
+
+        Args:
+            query (str): SQL query to execute
+            batch_size (int): Rows fetched per batch
+
+        Returns:
+            Tuple[int, int]: Number of rows and approximate number of bytes in the result
+        """
+        if not self._conn:
+            self.connect()
+
+        try:
+            cursor = self._conn.cursor()
+            cursor.execute(query)
+            num_rows, num_bytes = drain_cursor(cursor, batch_size)
+            self._last_query_stats = trino_engine_stats(cursor.query_id, cursor.stats)
+            cursor.close()
+            return num_rows, num_bytes
+
+        except Exception as e:
+            raise Exception(f"Error executing query: {str(e)}")
+
+    def get_last_query_stats(self) -> Dict[str, Any]:
+        """Return the statement stats the coordinator reported for the last query."""
+        return self._last_query_stats
+
+    def fetch_query_stats(self, query_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up the planning time of queries, which is not part of the statement stats.
+
+        Only queries still retained in the coordinator's `system.runtime.queries` are found.
+
+        Args:
+            query_ids (List[str]): Query IDs returned by `get_last_query_stats`
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Engine stats by query ID with only the compile time set
+        """
+        stats = {}
+        for i in range(0, len(query_ids), QUERY_STATS_BATCH_SIZE):
+            batch = ', '.join(map(sql_literal, query_ids[i:i + QUERY_STATS_BATCH_SIZE]))
+            rows = self.execute_query(
+                "SELECT query_id, analysis_time_ms + planning_time_ms AS compile_ms "
+                f"FROM system.runtime.queries WHERE query_id IN ({batch})"
+            )
+            for row in rows:
+                stats[row['query_id']] = {'engine_compile_ms': row['compile_ms']}
+        return stats
+
     def close(self) -> None:
         """Close the Trino connection if it exists."""
         if self._conn:
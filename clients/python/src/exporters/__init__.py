@@ -1,7 +1,31 @@
-from .csv_exporter import CSVExporter
-from .visual_exporter import VisualExporter
+import importlib
+
+from .base import OUTPUT_FORMATS, BenchmarkExporter
+
+# Module of every exporter, imported when the exporter is first used, so that pandas, matplotlib
+# and pyarrow are only loaded once results are exported
+_EXPORTER_MODULES = {
+    'CostExporter': '.cost_exporter',
+    'EngineConfig': '.cost_exporter',
+    'load_engine_configs': '.cost_exporter',
+    'CSVExporter': '.csv_exporter',
+    'ParquetExporter': '.parquet_exporter',
+    'VisualExporter': '.visual_exporter',
+}
 
 __all__ = [
+    'BenchmarkExporter',
+    'CostExporter',
+    'EngineConfig',
+    'load_engine_configs',
     'CSVExporter',
+    'OUTPUT_FORMATS',
+    'ParquetExporter',
     'VisualExporter'
 ]
+
+
+def __getattr__(name: str):
+    if name in _EXPORTER_MODULES:
+        return getattr(importlib.import_module(_EXPORTER_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
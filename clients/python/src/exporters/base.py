@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 
+# Formats of the result files: CSV, Parquet or both
+OUTPUT_FORMATS = ('csv', 'parquet', 'both')
+
 class BenchmarkExporter(ABC):
     @abstractmethod
     def export(self, results: Dict[str, Any], output_dir: str) -> None:
@@ -0,0 +1,249 @@
+import csv
+import json
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .base import BenchmarkExporter
+
+# Vendor names as published in the results
+VENDOR_DISPLAY_NAMES = {
+    'firebolt': 'Firebolt',
+    'snowflake': 'Snowflake',
+    'redshift': 'Redshift',
+    'bigquery': 'BigQuery',
+    'trino': 'Trino',
+}
+
+MEDALS = ['🥇', '🥈', '🥉']
+
+PRICE_PERFORMANCE_HEADERS = [
+    'Engine', '$/Hour', 'VUs', 'QPS', '$/Perf x 1M', 'Med Latency', 'Avg Latency', 'P95 Latency'
+]
+COST_PER_PASS_HEADERS = ['Engine', '$/Hour', 'Queries', 'Pass Time (s)', '$/Pass', '$/1M Queries']
+
+
+@dataclass
+class EngineConfig:
+    """Engine configuration of a vendor in a run, with the price its cost figures are derived from."""
+    vendor: str
+    # Hourly price of the engine as configured, all nodes and clusters included
+    dollars_per_hour: float
+    nodes: Optional[int] = None
+    size: Optional[str] = None
+    clusters: int = 1
+    # (Optional) Published name, e.g. 'Firebolt (1 x M) 2C'; derived from the other fields if not set
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        if self.name:
+            return self.name
+        label = VENDOR_DISPLAY_NAMES.get(self.vendor, self.vendor.capitalize())
+        if self.size:
+            label += f" ({self.nodes} x {self.size})" if self.nodes else f" ({self.size})"
+        if self.clusters > 1:
+            label += f" {self.clusters}C"
+        return label
+
+    def dollars_per_million_queries(self, qps: float) -> Optional[float]:
+        """Cost of one million queries at a sustained throughput of `qps`."""
+        if not qps:
+            return None
+        return self.dollars_per_hour / (qps * 3600) * 1_000_000
+
+    def dollars_for(self, seconds: float) -> float:
+        return self.dollars_per_hour * seconds / 3600
+
+
+def load_engine_configs(config_path: str) -> Dict[str, EngineConfig]:
+    """
+    Load the engine configurations of a run.
+
+    Args:
+        config_path: JSON file with an object per vendor, e.g.
+            `{"firebolt": {"nodes": 1, "size": "M", "dollars_per_hour": 2.8}}`.
+
+    Returns:
+        Dict[str, EngineConfig]: Engine configuration by vendor
+    """
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"Engine configuration {config_path} must map vendors to engines")
+
+    engines = {}
+    for vendor, spec in config.items():
+        try:
+            engines[vendor] = EngineConfig(vendor=vendor, **spec)
+        except TypeError as e:
+            raise ValueError(f"Invalid engine configuration of {vendor}: {str(e)}")
+        if engines[vendor].dollars_per_hour <= 0:
+            raise ValueError(f"Price of the {vendor} engine must be positive, got: {engines[vendor].dollars_per_hour}")
+    return engines
+
+
+def _significant(value: Optional[float], digits: int = 3) -> str:
+    """Round to `digits` significant digits the way the published tables do, e.g. 3.18, 13.5, 156."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    if value == 0:
+        return '0'
+    rounded = round(value, digits - 1 - math.floor(math.log10(abs(value))))
+    return f"{rounded:f}".rstrip('0').rstrip('.')
+
+
+def _dollars(value: Optional[float]) -> str:
+    formatted = _significant(value)
+    return f"${formatted}" if formatted else ''
+
+
+def _markdown_table(headers: List[str], rows: List[List[Any]]) -> str:
+    lines = [
+        '| ' + ' | '.join(headers) + ' |',
+        '| ' + ' | '.join('---' for _ in headers) + ' |',
+    ]
+    lines.extend('| ' + ' | '.join(str(cell) for cell in row) + ' |' for row in rows)
+    return '\n'.join(lines)
+
+
+def _ranked(rows: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+    """Rows with a value for `key`, cheapest first, with their 1-based rank."""
+    ranked = sorted((row for row in rows if row[key] is not None), key=lambda row: row[key])
+    return [{**row, 'rank': rank} for rank, row in enumerate(ranked, 1)]
+
+
+def _with_medal(value: str, rank: int) -> str:
+    return f"{value} {MEDALS[rank - 1]}" if rank <= len(MEDALS) else value
+
+
+class CostExporter(BenchmarkExporter):
+    """
+    Cost-normalized results from the engine prices of a run.
+
+    The sequential results give the cost of one benchmark pass, the sum of the warm median
+    execution times of every query. The overall throughput of every recorded concurrency run gives
+    the cost per million queries ('$/Perf x 1M'), i.e. $/hour / (QPS * 3600) * 1M. Both are
+    ranked cheapest first and written to `cost_per_pass.csv`, `price_performance.csv` and
+    `cost_report.md`, in the layout of `results/concurrency.md`.
+    """
+
+    def __init__(self, engines: Dict[str, EngineConfig]):
+        self.engines = engines
+        self.concurrency_runs: List[Dict[str, Any]] = []
+
+    def add_concurrency_run(self, vendor: str, concurrency: int, overall: Dict[str, Any]) -> None:
+        """Record the overall ('ALL') summary row of a concurrency run of `vendor`."""
+        engine = self.engines.get(vendor)
+        if engine is None:
+            return
+        dollars_per_million_queries = engine.dollars_per_million_queries(overall['qps'])
+        self.concurrency_runs.append({
+            'vendor': vendor,
+            'engine': engine.label,
+            'dollars_per_hour': engine.dollars_per_hour,
+            'concurrency': concurrency,
+            'qps': overall['qps'],
+            'dollars_per_million_queries': (
+                None if dollars_per_million_queries is None else round(dollars_per_million_queries, 4)
+            ),
+            'p50': overall.get('p50'),
+            'mean': overall.get('mean'),
+            'p95': overall.get('p95'),
+        })
+
+    def _cost_per_pass(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        import pandas as pd
+
+        rows = []
+        for vendor, vendor_results in results.items():
+            engine = self.engines.get(vendor)
+            if engine is None or not vendor_results:
+                continue
+            df = pd.DataFrame(vendor_results)
+            warm = df[df['success'] & ~df['is_cold']]
+            medians = warm.groupby('query_name')['execution_time'].median()
+            pass_time = float(medians.sum())
+            if not len(medians):
+                continue
+            rows.append({
+                'vendor': vendor,
+                'engine': engine.label,
+                'dollars_per_hour': engine.dollars_per_hour,
+                'queries': len(medians),
+                'pass_time_secs': round(pass_time, 4),
+                'dollars_per_pass': round(engine.dollars_for(pass_time), 8),
+                'dollars_per_million_queries': round(engine.dollars_for(pass_time / len(medians)) * 1_000_000, 4),
+            })
+        return rows
+
+    def export(self, results: Dict[str, Any], output_dir: str) -> None:
+        """Export the cost of the sequential `results` and of the recorded concurrency runs."""
+        os.makedirs(output_dir, exist_ok=True)
+        cost_per_pass = _ranked(self._cost_per_pass(results), 'dollars_per_pass')
+        price_performance = _ranked(self.concurrency_runs, 'dollars_per_million_queries')
+
+        for file_name, rows in (('cost_per_pass.csv', cost_per_pass), ('price_performance.csv', price_performance)):
+            if not rows:
+                continue
+            csv_file_path = os.path.join(output_dir, file_name)
+            with open(csv_file_path, mode='w', newline='') as csv_file:
+                writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"Cost results exported to {csv_file_path}")
+
+        report_file_path = os.path.join(output_dir, 'cost_report.md')
+        with open(report_file_path, 'w') as f:
+            f.write(self._markdown(cost_per_pass, price_performance))
+        print(f"Cost report saved to {report_file_path}")
+
+    def _markdown(self, cost_per_pass: List[Dict[str, Any]], price_performance: List[Dict[str, Any]]) -> str:
+        sections = ["# 💵 Cost-Normalized Results\n",
+                    "🥇 = Cheapest configuration, 🥈 = 2nd cheapest, 🥉 = 3rd cheapest\n"]
+
+        if cost_per_pass:
+            sections.append("## 🧾 Cost per Benchmark Pass\n")
+            sections.append("Sum of the warm median execution times of all queries, priced at the engine's $/Hour.\n")
+            sections.append(_markdown_table(COST_PER_PASS_HEADERS, [
+                [
+                    row['engine'],
+                    f"${row['dollars_per_hour']:g}",
+                    row['queries'],
+                    _significant(row['pass_time_secs']),
+                    _with_medal(_dollars(row['dollars_per_pass']), row['rank']),
+                    _dollars(row['dollars_per_million_queries']),
+                ]
+                for row in cost_per_pass
+            ]) + "\n")
+
+        if price_performance:
+            sections.append("## 🏆 Price-Performance Ranking\n")
+            sections.append(_markdown_table(['Rank', 'Engine', 'VUs', 'QPS', '$/Perf x 1M'], [
+                [
+                    _with_medal(str(row['rank']), row['rank']),
+                    row['engine'],
+                    row['concurrency'],
+                    round(row['qps'], 1),
+                    _dollars(row['dollars_per_million_queries']),
+                ]
+                for row in price_performance
+            ]) + "\n")
+
+            for vendor in dict.fromkeys(run['vendor'] for run in self.concurrency_runs):
+                sections.append(f"### 📊 {VENDOR_DISPLAY_NAMES.get(vendor, vendor.capitalize())} Results\n")
+                sections.append(_markdown_table(PRICE_PERFORMANCE_HEADERS, [
+                    [
+                        run['engine'],
+                        f"${run['dollars_per_hour']:g}",
+                        run['concurrency'],
+                        round(run['qps'], 1),
+                        _dollars(run['dollars_per_million_queries']),
+                        _significant(run['p50']),
+                        _significant(run['mean']),
+                        _significant(run['p95']),
+                    ]
+                    for run in self.concurrency_runs if run['vendor'] == vendor
+                ]) + "\n")
+        return "\n".join(sections)
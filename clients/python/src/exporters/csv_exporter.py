@@ -1,6 +1,7 @@
 import csv
 import os
 from .base import BenchmarkExporter
+from connectors.base import ENGINE_STATS_FIELDS
 from typing import Dict, Any
 import pandas as pd
 from tabulate import tabulate
@@ -12,7 +13,11 @@ class CSVExporter(BenchmarkExporter):
         
         rows = []
         with open(csv_file_path, mode='w', newline='') as csv_file:
-            fieldnames = ['vendor', 'query_name', 'execution_time', 'concurrent_run', 'success', 'error']
+            fieldnames = [
+                'vendor', 'query_name', 'execution_time', 'concurrent_run', 'success', 'error',
+                'result_mode', 'num_output_rows', 'num_output_bytes', 'pool_wait_time',
+                'iteration', 'is_cold', *ENGINE_STATS_FIELDS
+            ]
             writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
 
             writer.writeheader()
@@ -24,7 +29,14 @@ class CSVExporter(BenchmarkExporter):
                         'execution_time': result['execution_time'],
                         'concurrent_run': result['concurrent_run'],
                         'success': result['success'],
-                        'error': result['error'] or ''
+                        'error': result['error'] or '',
+                        'result_mode': result.get('result_mode', 'fetch'),
+                        'num_output_rows': result.get('num_output_rows'),
+                        'num_output_bytes': result.get('num_output_bytes'),
+                        'pool_wait_time': result.get('pool_wait_time'),
+                        'iteration': result.get('iteration'),
+                        'is_cold': result.get('is_cold', False),
+                        **{field: result.get(field) for field in ENGINE_STATS_FIELDS}
                     }
                     writer.writerow(row)
                     rows.append(row)
@@ -40,16 +52,19 @@ class CSVExporter(BenchmarkExporter):
         success_rate = df.groupby(['vendor', 'query_name'])['success'].agg(['count', 'sum'])
         success_rate['Success Rate'] = (success_rate['sum'] / success_rate['count'] * 100).round(2)
         
-        # Performance statistics table
-        perf_stats = df[df['success']].groupby(['vendor', 'query_name'])['execution_time'].agg([
+        # Performance statistics table of the warm iterations, with the cold iteration next to it
+        successful = df[df['success']]
+        perf_stats = successful[~successful['is_cold']].groupby(['vendor', 'query_name'])['execution_time'].agg([
             'count', 'mean', 'median', 'std', 'min', 'max'
-        ]).round(3)
+        ])
+        perf_stats['cold'] = successful[successful['is_cold']].groupby(['vendor', 'query_name'])['execution_time'].mean()
+        perf_stats = perf_stats.round(3)
 
         # Save tables
         with open(os.path.join(output_dir, 'summary_report.txt'), 'w') as f:
             f.write("Success Rate by Vendor and Query\n")
             f.write("================================\n")
             f.write(tabulate(success_rate, headers='keys', tablefmt='grid'))
-            f.write("\n\nPerformance Statistics\n")
-            f.write("=====================\n")
+            f.write("\n\nPerformance Statistics (warm iterations, 'cold' is the first iteration)\n")
+            f.write("=====================================================================\n")
             f.write(tabulate(perf_stats, headers='keys', tablefmt='grid'))
\ No newline at end of file
@@ -0,0 +1,149 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .base import BenchmarkExporter
+
+# Schema metadata key of the run metadata, a JSON object
+RUN_METADATA_KEY = b'benchmark_run'
+
+ENGINE_STATS_SCHEMA = [
+    pa.field('engine_query_id', pa.string()),
+    pa.field('engine_queued_ms', pa.float64()),
+    pa.field('engine_compile_ms', pa.float64()),
+    pa.field('engine_execution_ms', pa.float64()),
+    pa.field('engine_elapsed_ms', pa.float64()),
+    pa.field('engine_cpu_ms', pa.float64()),
+    pa.field('engine_bytes_scanned', pa.int64()),
+]
+
+# Columns of `results.csv`; the vendor is a partition
+SEQUENTIAL_SCHEMA = pa.schema([
+    pa.field('query_name', pa.string()),
+    pa.field('execution_time', pa.float64()),
+    pa.field('concurrent_run', pa.int32()),
+    pa.field('success', pa.bool_()),
+    pa.field('error', pa.string()),
+    pa.field('result_mode', pa.string()),
+    pa.field('num_output_rows', pa.int64()),
+    pa.field('num_output_bytes', pa.int64()),
+    pa.field('pool_wait_time', pa.float64()),
+    pa.field('iteration', pa.int32()),
+    pa.field('is_cold', pa.bool_()),
+    *ENGINE_STATS_SCHEMA,
+])
+
+# Columns of `<vendor>_concurrency.csv`
+CONCURRENCY_SCHEMA = pa.schema([
+    pa.field('worker_id', pa.int32()),
+    pa.field('stream', pa.string()),
+    pa.field('stage', pa.string()),
+    pa.field('query_name', pa.string()),
+    pa.field('query_id', pa.int64()),
+    pa.field('has_error', pa.bool_()),
+    pa.field('num_output_rows', pa.int64()),
+    pa.field('num_output_bytes', pa.int64()),
+    pa.field('result_mode', pa.string()),
+    pa.field('start_unix_time', pa.float64()),
+    pa.field('stop_unix_time', pa.float64()),
+    pa.field('intended_start_unix_time', pa.float64()),
+    pa.field('latency_secs', pa.float64()),
+    pa.field('variation', pa.int32()),
+    pa.field('fingerprint', pa.string()),
+    pa.field('parameters', pa.string()),
+    *ENGINE_STATS_SCHEMA,
+])
+
+
+def partition_dir(output_dir: str, table: str, run_id: str, vendor: str) -> str:
+    """Hive-style partition of a run and vendor: `<output_dir>/parquet/<table>/run_id=<run_id>/vendor=<vendor>`."""
+    return os.path.join(output_dir, 'parquet', table, f'run_id={run_id}', f'vendor={vendor}')
+
+
+def _coerce(rows: List[Dict[str, Any]], schema: pa.Schema) -> Dict[str, List[Any]]:
+    """Columns of `rows` in the types of `schema`; e.g. engine query IDs are numbers for some vendors."""
+    columns = {}
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if pa.types.is_string(field.type):
+            values = [None if value is None else str(value) for value in values]
+        elif pa.types.is_integer(field.type):
+            values = [None if value is None else int(value) for value in values]
+        elif pa.types.is_floating(field.type):
+            values = [None if value is None else float(value) for value in values]
+        columns[field.name] = values
+    return columns
+
+
+class ParquetExporter(BenchmarkExporter):
+    """
+    Typed, zstd-compressed Parquet files partitioned by run and vendor.
+
+    Sequential results are written to `parquet/results/` and concurrency query logs to
+    `parquet/concurrency/`, both below the output directory and partitioned as
+    `run_id=<run_id>/vendor=<vendor>/`, so that pandas, pyarrow or DuckDB (with
+    `hive_partitioning`) only read the partitions and columns a query needs. The run metadata is
+    embedded as JSON in the schema metadata of every file under `benchmark_run`.
+    """
+
+    def __init__(self, run_id: str, metadata: Optional[Dict[str, Any]] = None, compression: str = 'zstd'):
+        """
+        Args:
+            run_id: Run the results belong to, e.g. the run tag of the runner.
+            metadata: (Optional) Settings of the run to embed in every file.
+            compression: Parquet compression codec.
+        """
+        self.run_id = run_id
+        self.metadata = metadata or {}
+        self.compression = compression
+
+    def _schema(self, schema: pa.Schema, vendor: str, kind: str) -> pa.Schema:
+        metadata = {
+            'run_id': self.run_id,
+            'vendor': vendor,
+            'kind': kind,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            **self.metadata,
+        }
+        return schema.with_metadata({RUN_METADATA_KEY: json.dumps(metadata, default=str)})
+
+    def write_batches(
+        self,
+        table: str,
+        vendor: str,
+        batches: Iterable[List[Dict[str, Any]]],
+        schema: pa.Schema,
+        output_dir: str,
+    ) -> str:
+        """
+        Write rows to the partition of `vendor` batch by batch, each batch as its own row group(s),
+        so that memory use is bounded by the largest batch.
+
+        Returns:
+            str: Path of the written file
+        """
+        directory = partition_dir(output_dir, table, self.run_id, vendor)
+        os.makedirs(directory, exist_ok=True)
+        file_path = os.path.join(directory, 'part-0.parquet')
+        file_schema = self._schema(schema, vendor, table)
+        with pq.ParquetWriter(file_path, file_schema, compression=self.compression) as writer:
+            for rows in batches:
+                if rows:
+                    writer.write_table(pa.Table.from_pydict(_coerce(rows, schema), schema=file_schema))
+        return file_path
+
+    def export(self, results: Dict[str, Any], output_dir: str) -> None:
+        """Export sequential benchmark results, one partition per vendor."""
+        for vendor, vendor_results in results.items():
+            file_path = self.write_batches('results', vendor, [vendor_results], SEQUENTIAL_SCHEMA, output_dir)
+            print(f"Results exported to {file_path}")
+
+
+def read_run_metadata(file_path: str) -> Dict[str, Any]:
+    """Run metadata embedded in a Parquet file written by `ParquetExporter`."""
+    metadata = pq.read_schema(file_path).metadata or {}
+    return json.loads(metadata[RUN_METADATA_KEY]) if RUN_METADATA_KEY in metadata else {}
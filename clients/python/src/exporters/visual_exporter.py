@@ -1,69 +1,211 @@
+import base64
+import html
+import io
 import os
+from typing import Any, Dict, Iterator, List, Tuple
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+
+from analysis import latency_timeline
 from .base import BenchmarkExporter
-from typing import Dict, Any
+
+# Define a color map for each vendor using RGB values
+VENDOR_COLORS = {
+    'firebolt': '#f72a30',
+    'redshift': '#E47911',
+    'snowflake': '#249edc',
+    'bigquery': '#008000'  # green cause their color it too close to SF :-)
+}
+
+DISTRIBUTION_PLOTS = ('box', 'violin')
+
+# Queries per page of the per-query charts, so that benchmarks with hundreds of queries stay legible
+QUERIES_PER_PAGE = 25
+
+# Resolution of the embedded PNGs of the HTML report
+HTML_DPI = 110
+
+
+def _color(vendor: str) -> str:
+    return VENDOR_COLORS.get(vendor, '#7f7f7f')
+
+
+def _figure(width: float, height: float, rows: int = 1, bottom: float = 0.1):
+    """Figure with fixed margins; `tight_layout` would measure every tick label of every page."""
+    figure, axes = plt.subplots(rows, 1, figsize=(width, height), sharex=rows > 1)
+    figure.subplots_adjust(left=0.08, right=0.98, bottom=bottom, top=0.9, hspace=0.1)
+    return figure, axes
+
+
+def _pages(query_names: List[str]) -> List[List[str]]:
+    return [query_names[i:i + QUERIES_PER_PAGE] for i in range(0, len(query_names), QUERIES_PER_PAGE)]
+
 
 class VisualExporter(BenchmarkExporter):
-    def __init__(self, output_dir: str):
+    """
+    Charts of the benchmark results, written to `visual_results.pdf` and to a self-contained
+    `visual_results.html` with embedded PNGs and the latency statistics.
+
+    The sequential results are turned into one DataFrame and aggregated by (query, vendor) in a
+    single pass, so the report takes time linear in the number of results. It shows the mean warm
+    execution time per query, the latency CDF of every vendor and the latency distribution of
+    every query. Concurrency runs added with `add_concurrency_run` add throughput and latency
+    timelines.
+    """
+
+    def __init__(self, output_dir: str, distribution_plot: str = 'box'):
+        if distribution_plot not in DISTRIBUTION_PLOTS:
+            raise ValueError(f"Unsupported distribution plot: {distribution_plot}")
         self.output_dir = output_dir
+        self.distribution_plot = distribution_plot
+        self.timelines: List[Tuple[str, int, pd.DataFrame]] = []
 
-    def export(self, results: Dict[str, Any], output_dir: str) -> None:
-        """Generate a visualization for benchmark results showing average execution time per vendor for each query."""
-        # Prepare execution_times dictionary
-        execution_times = {}
-        query_names = []
-
-        # Collect data for plotting
-        for vendor, vendor_results in results.items():
-            execution_times[vendor] = []
-            for result in vendor_results:
-                query_names.append(result['query_name'])
-                execution_times[vendor].append(result['execution_time'])
-
-        # Ensure unique query names
-        query_names = list(dict.fromkeys(query_names))
-
-        # Calculate average execution times
-        avg_execution_times = {vendor: [] for vendor in execution_times.keys()}
-        for query in query_names:
-            for vendor in execution_times.keys():
-                # Filter results for the current vendor and query
-                filtered_times = [result['execution_time'] for result in results[vendor] if result['query_name'] == query]
-                
-                # # Calculate average if there are execution times
-                avg_time = np.mean(filtered_times)
-                avg_execution_times[vendor].append(avg_time)
-
-        # Define a color map for each vendor using RGB values
-        vendor_colors = {
-            'firebolt': '#f72a30',
-            'redshift': '#E47911',
-            'snowflake': '#249edc', 
-            'bigquery': '#008000' # green cause their color it too close to SF :-)
-        }
-
-        # Plotting
-        plt.figure(figsize=(10, 6))
-
-        # Set the bar width
-        bar_width = 0.2
-        index = np.arange(len(query_names))
-
-        # Plot each vendor's average execution time with specified RGB colors
-        for i, vendor in enumerate(avg_execution_times.keys()):
-            plt.bar(index + i * bar_width, avg_execution_times[vendor], bar_width, label=vendor, color=vendor_colors.get(vendor, '#7f7f7f'))
-
-        # Set the x-ticks to the query names
-        plt.xlabel('Queries')
-        plt.ylabel('Average Execution Time (seconds)')
-        plt.title('Average Execution Time per Vendor for Each Query')
-        plt.xticks(index + bar_width, query_names)
-        plt.legend()  # Add a legend to identify vendors
-        plt.tight_layout()
+    def add_concurrency_run(self, vendor: str, concurrency: int, query_log: pd.DataFrame) -> None:
+        """Record the timeline of a concurrency run from its query log (see `analysis.ANALYSIS_COLUMNS`)."""
+        if query_log.empty:
+            return
+        self.timelines.append((vendor, concurrency, latency_timeline(query_log)))
+
+    @staticmethod
+    def _warm_results(results: Dict[str, Any]) -> pd.DataFrame:
+        """Warm execution times of the successful queries, in the order the queries ran."""
+        df = pd.DataFrame.from_records(
+            (
+                (vendor, str(result['query_name']), result['execution_time'], result['success'],
+                 bool(result.get('is_cold')))
+                for vendor, vendor_results in results.items()
+                for result in vendor_results
+            ),
+            columns=['vendor', 'query_name', 'execution_time', 'success', 'is_cold'],
+        )
+        return df[df['success'].astype(bool) & ~df['is_cold']]
+
+    def _mean_bars(self, warm: pd.DataFrame, query_names: List[str], vendors: List[str]) -> Iterator[Tuple[str, Any]]:
+        means = warm.groupby(['query_name', 'vendor'])['execution_time'].mean().unstack('vendor')
+        bar_width = 0.8 / len(vendors)
+        for page, page_queries in enumerate(_pages(query_names), 1):
+            figure, ax = _figure(max(10, len(page_queries) * 0.5), 6, bottom=0.2)
+            index = np.arange(len(page_queries))
+            page_means = means.reindex(index=page_queries, columns=vendors)
+            for i, vendor in enumerate(vendors):
+                ax.bar(index + i * bar_width, page_means[vendor], bar_width, label=vendor, color=_color(vendor))
+            ax.set_xlabel('Queries')
+            ax.set_ylabel('Average Execution Time (seconds)')
+            ax.set_xticks(index + bar_width * (len(vendors) - 1) / 2, page_queries, rotation=90 if len(page_queries) > 12 else 0)
+            ax.legend()
+            yield self._title('Average Execution Time per Vendor for Each Query', page, query_names), figure
+
+    def _cdf(self, warm: pd.DataFrame, vendors: List[str]) -> Iterator[Tuple[str, Any]]:
+        figure, ax = _figure(10, 6)
+        for vendor, times in warm.groupby('vendor')['execution_time']:
+            values = np.sort(times.to_numpy())
+            ax.step(values, np.arange(1, len(values) + 1) / len(values), where='post', label=vendor, color=_color(vendor))
+        ax.set_xscale('log')
+        ax.set_xlabel('Execution Time (seconds)')
+        ax.set_ylabel('Share of Queries')
+        ax.grid(True, which='both', alpha=0.3)
+        ax.legend()
+        yield 'Warm Execution Time CDF per Vendor', figure
+
+    def _distributions(self, warm: pd.DataFrame, query_names: List[str], vendors: List[str]) -> Iterator[Tuple[str, Any]]:
+        samples = {key: times.to_numpy() for key, times in warm.groupby(['query_name', 'vendor'])['execution_time']}
+        width = 0.8 / len(vendors)
+        for page, page_queries in enumerate(_pages(query_names), 1):
+            figure, ax = _figure(max(10, len(page_queries) * 0.5), 6, bottom=0.2)
+            index = np.arange(len(page_queries))
+            for i, vendor in enumerate(vendors):
+                positions = [p + i * width for p, query in zip(index, page_queries) if (query, vendor) in samples]
+                data = [samples[(query, vendor)] for query in page_queries if (query, vendor) in samples]
+                if not data:
+                    continue
+                if self.distribution_plot == 'violin':
+                    parts = ax.violinplot(data, positions=positions, widths=width * 0.9, showmedians=True)
+                    for body in parts['bodies']:
+                        body.set_facecolor(_color(vendor))
+                else:
+                    parts = ax.boxplot(data, positions=positions, widths=width * 0.9, patch_artist=True,
+                                       manage_ticks=False, showfliers=True)
+                    for box in parts['boxes']:
+                        box.set_facecolor(_color(vendor))
+                ax.plot([], [], color=_color(vendor), linewidth=8, label=vendor)
+            ax.set_yscale('log')
+            ax.set_xlabel('Queries')
+            ax.set_ylabel('Execution Time (seconds)')
+            ax.set_xticks(index + width * (len(vendors) - 1) / 2, page_queries, rotation=90 if len(page_queries) > 12 else 0)
+            ax.legend()
+            yield self._title('Warm Execution Time Distribution per Query', page, query_names), figure
 
+    def _timelines(self) -> Iterator[Tuple[str, Any]]:
+        for vendor, concurrency, timeline in self.timelines:
+            figure, (qps_ax, latency_ax) = _figure(10, 7, rows=2)
+            qps_ax.plot(timeline['elapsed_secs'], timeline['qps'], color=_color(vendor))
+            qps_ax.set_ylabel('QPS')
+            qps_ax.grid(True, alpha=0.3)
+            for percentile, style in (('p50', '-'), ('p95', '--'), ('p99', ':')):
+                latency_ax.plot(timeline['elapsed_secs'], timeline[percentile], style, color=_color(vendor), label=percentile)
+            latency_ax.set_ylabel('Latency (seconds)')
+            latency_ax.set_xlabel('Elapsed Time (seconds)')
+            latency_ax.grid(True, alpha=0.3)
+            latency_ax.legend()
+            yield f'Concurrency Timeline of {vendor} ({concurrency} workers)', figure
+
+    @staticmethod
+    def _title(title: str, page: int, query_names: List[str]) -> str:
+        num_pages = len(_pages(query_names))
+        return f'{title} ({page}/{num_pages})' if num_pages > 1 else title
+
+    def _figures(self, warm: pd.DataFrame) -> Iterator[Tuple[str, Any]]:
+        if not warm.empty:
+            query_names = list(pd.unique(warm['query_name']))
+            vendors = list(pd.unique(warm['vendor']))
+            yield from self._mean_bars(warm, query_names, vendors)
+            yield from self._cdf(warm, vendors)
+            yield from self._distributions(warm, query_names, vendors)
+        yield from self._timelines()
+
+    def export(self, results: Dict[str, Any], output_dir: str) -> None:
+        """Generate the PDF and HTML reports of the sequential `results` and the recorded concurrency runs."""
+        warm = self._warm_results(results)
+        sections = []
         visual_file_path = os.path.join(output_dir, 'visual_results.pdf')
-        plt.savefig(visual_file_path, dpi=400)
-        plt.close()
-        print(f"Visualization saved to {visual_file_path}")
\ No newline at end of file
+        # Every figure is drawn once, saved as a PDF page and a PNG, and closed before the next one
+        with PdfPages(visual_file_path) as pdf:
+            for title, figure in self._figures(warm):
+                figure.suptitle(title)
+                pdf.savefig(figure)
+                png = io.BytesIO()
+                figure.savefig(png, format='png', dpi=HTML_DPI)
+                plt.close(figure)
+                sections.append(
+                    f'<h2>{html.escape(title)}</h2>\n'
+                    f'<img alt="{html.escape(title)}" src="data:image/png;base64,{base64.b64encode(png.getvalue()).decode()}">'
+                )
+        print(f"Visualization saved to {visual_file_path}")
+
+        report_file_path = os.path.join(output_dir, 'visual_results.html')
+        with open(report_file_path, 'w') as f:
+            f.write(self._html(warm, sections))
+        print(f"Visual report saved to {report_file_path}")
+
+    @staticmethod
+    def _html(warm: pd.DataFrame, sections: List[str]) -> str:
+        stats = ''
+        if not warm.empty:
+            grouped = warm.groupby(['vendor', 'query_name'], sort=False)['execution_time']
+            table = grouped.agg(['count', 'mean', 'median', 'min', 'max'])
+            table['p95'] = grouped.quantile(0.95)
+            stats = '<h2>Warm Execution Time Statistics (seconds)</h2>\n' + table.round(4).to_html()
+        return '\n'.join([
+            '<!DOCTYPE html>',
+            '<html><head><meta charset="utf-8"><title>Benchmark Results</title>',
+            '<style>body{font-family:sans-serif;margin:2em}img{max-width:100%}'
+            'table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:2px 6px;text-align:right}</style>',
+            '</head><body>',
+            '<h1>Benchmark Results</h1>',
+            *sections,
+            stats,
+            '</body></html>',
+        ])
@@ -0,0 +1,152 @@
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+# Percentiles reported for concurrency benchmarks
+REPORTED_PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+class LatencyHistogram:
+    """
+    High-dynamic-range latency histogram in the style of HdrHistogram.
+
+    Values are counted in log-linear buckets: every power-of-two range is split into sub-buckets fine
+    enough to keep the relative error of any recorded value below `10 ** -significant_digits`. The
+    counts are stored sparsely, so memory is bounded by the number of distinct buckets (a few
+    thousand at most) and does not grow with the number of recorded values. Histograms with the same
+    configuration can be merged, e.g. across worker threads and processes.
+    """
+
+    def __init__(
+        self,
+        significant_digits: int = 3,
+        resolution_secs: float = 1e-6,
+        highest_trackable_secs: float = 3600.0,
+    ):
+        """
+        Args:
+            significant_digits: Number of significant decimal digits kept for every value (1-5).
+            resolution_secs: Smallest distinguishable latency.
+            highest_trackable_secs: Largest latency that can be recorded. Larger values are clamped.
+        """
+        if not 1 <= significant_digits <= 5:
+            raise ValueError(f"Significant digits must be between 1 and 5, got: {significant_digits}")
+        self.significant_digits = significant_digits
+        self.resolution_secs = resolution_secs
+        self.highest_trackable_secs = highest_trackable_secs
+
+        self._highest_trackable_value = int(highest_trackable_secs / resolution_secs)
+        self._sub_bucket_count_magnitude = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._sub_bucket_half_count_magnitude = self._sub_bucket_count_magnitude - 1
+        self._sub_bucket_count = 1 << self._sub_bucket_count_magnitude
+        self._sub_bucket_half_count = self._sub_bucket_count >> 1
+        self._sub_bucket_mask = self._sub_bucket_count - 1
+
+        self.counts: Dict[int, int] = {}
+        self.total_count = 0
+        self.total_secs = 0.0
+        self.min_secs = math.inf
+        self.max_secs = 0.0
+
+    @property
+    def config(self) -> Tuple[int, float, float]:
+        return self.significant_digits, self.resolution_secs, self.highest_trackable_secs
+
+    def _counts_index(self, value: int) -> int:
+        bucket_index = (value | self._sub_bucket_mask).bit_length() - self._sub_bucket_count_magnitude
+        sub_bucket_index = value >> bucket_index
+        return ((bucket_index + 1) << self._sub_bucket_half_count_magnitude) + sub_bucket_index - self._sub_bucket_half_count
+
+    def _value_range(self, index: int) -> Tuple[int, int]:
+        """Lowest and highest value counted at `index`."""
+        bucket_index = (index >> self._sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self._sub_bucket_half_count - 1)) + self._sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self._sub_bucket_half_count
+            bucket_index = 0
+        lowest = sub_bucket_index << bucket_index
+        return lowest, lowest + (1 << bucket_index) - 1
+
+    def record(self, latency_secs: float, count: int = 1) -> None:
+        value = min(max(int(latency_secs / self.resolution_secs), 0), self._highest_trackable_value)
+        index = self._counts_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += count
+        self.total_secs += latency_secs * count
+        self.min_secs = min(self.min_secs, latency_secs)
+        self.max_secs = max(self.max_secs, latency_secs)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Add the counts of `other` to this histogram and return it."""
+        if other.config != self.config:
+            raise ValueError(f"Cannot merge histograms with configurations {self.config} and {other.config}")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += other.total_count
+        self.total_secs += other.total_secs
+        self.min_secs = min(self.min_secs, other.min_secs)
+        self.max_secs = max(self.max_secs, other.max_secs)
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total_secs / self.total_count if self.total_count else None
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Latency at `percentile` (0-100), accurate to the configured significant digits."""
+        if not self.total_count:
+            return None
+        count_at_percentile = max(1, math.ceil(percentile / 100 * self.total_count))
+        running_count = 0
+        for index in sorted(self.counts):
+            running_count += self.counts[index]
+            if running_count >= count_at_percentile:
+                _, highest = self._value_range(index)
+                # Report the highest equivalent value, but never more than the largest recorded value
+                return min(highest * self.resolution_secs, self.max_secs)
+        return self.max_secs
+
+
+class QueryLatencyHistograms:
+    """Latency histograms and error counts per query name, mergeable across workers and processes."""
+
+    def __init__(self, significant_digits: int = 3):
+        self.significant_digits = significant_digits
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.errors: Dict[str, int] = {}
+
+    def histogram(self, query_name: str) -> LatencyHistogram:
+        histogram = self.histograms.get(query_name)
+        if histogram is None:
+            histogram = self.histograms[query_name] = LatencyHistogram(self.significant_digits)
+        return histogram
+
+    def record(self, query_name: str, latency_secs: float) -> None:
+        self.histogram(query_name).record(latency_secs)
+
+    def record_error(self, query_name: str) -> None:
+        self.errors[query_name] = self.errors.get(query_name, 0) + 1
+
+    def merge(self, other: "QueryLatencyHistograms") -> "QueryLatencyHistograms":
+        for query_name, histogram in other.histograms.items():
+            self.histogram(query_name).merge(histogram)
+        for query_name, count in other.errors.items():
+            self.errors[query_name] = self.errors.get(query_name, 0) + count
+        return self
+
+    @classmethod
+    def merged(cls, histograms: Iterable["QueryLatencyHistograms"], significant_digits: int = 3) -> "QueryLatencyHistograms":
+        merged = cls(significant_digits)
+        for histogram in histograms:
+            if histogram is not None:
+                merged.merge(histogram)
+        return merged
+
+    @property
+    def query_names(self):
+        return sorted(set(self.histograms) | set(self.errors))
+
+    def overall(self) -> LatencyHistogram:
+        overall = LatencyHistogram(self.significant_digits)
+        for histogram in self.histograms.values():
+            overall.merge(histogram)
+        return overall
@@ -0,0 +1,317 @@
+"""
+Local run history: an SQLite database that every benchmark run is ingested into, for cross-run comparison.
+
+Usage:
+    python src/history.py <database> runs [--benchmark NAME] [--vendor VENDOR] [--last N]
+    python src/history.py <database> query <query_name> [--vendor VENDOR] [--engine ENGINE] [--kind KIND] [--last N]
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from tabulate import tabulate
+
+from histogram import REPORTED_PERCENTILES
+
+RUN_KINDS = ("sequential", "concurrency")
+
+# Column of every reported percentile in `query_stats`, e.g. 99.9 -> p99_9
+PERCENTILE_COLUMNS = {f"p{percentile:g}": f"p{percentile:g}".replace(".", "_") for percentile in REPORTED_PERCENTILES}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    vendors TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    seed INTEGER,
+    concurrency INTEGER,
+    duration_secs REAL,
+    arrival_rate REAL,
+    result_mode TEXT,
+    git_revision TEXT,
+    output_dir TEXT,
+    settings TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_benchmark ON runs (benchmark, started_at);
+CREATE INDEX IF NOT EXISTS runs_by_start ON runs (started_at);
+
+-- Engine configuration of every vendor of a run
+CREATE TABLE IF NOT EXISTS run_engines (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    vendor TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    engine_config TEXT,
+    PRIMARY KEY (run_id, vendor)
+);
+CREATE INDEX IF NOT EXISTS run_engines_by_engine ON run_engines (engine);
+
+-- Per-query statistics of a run: the warm iterations of a sequential run (the cold one in `cold`),
+-- or the throughput and latency percentiles of a concurrency run
+CREATE TABLE IF NOT EXISTS query_stats (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    vendor TEXT NOT NULL,
+    query_name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    qps REAL,
+    mean REAL,
+    min REAL,
+    max REAL,
+    cold REAL,
+    {", ".join(f"{column} REAL" for column in PERCENTILE_COLUMNS.values())},
+    PRIMARY KEY (run_id, vendor, query_name)
+);
+CREATE INDEX IF NOT EXISTS query_stats_by_query ON query_stats (vendor, query_name, run_id);
+
+-- Every execution of a sequential run
+CREATE TABLE IF NOT EXISTS query_results (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    vendor TEXT NOT NULL,
+    query_name TEXT NOT NULL,
+    iteration INTEGER,
+    is_cold INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    execution_time REAL,
+    num_output_rows INTEGER,
+    pool_wait_time REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS query_results_by_query ON query_results (vendor, query_name, run_id);
+"""
+
+
+def git_revision(path: str = os.path.dirname(os.path.abspath(__file__))) -> Optional[str]:
+    """Commit of the benchmark client, with a `-dirty` suffix for local changes, or None outside git."""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=path, capture_output=True).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{revision}-dirty" if dirty else revision
+
+
+def _warm_stats(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Statistics of the sequential executions of one query, in the columns of `query_stats`."""
+    warm = sorted(row["execution_time"] for row in rows if row["success"] and not row.get("is_cold"))
+    cold = [row["execution_time"] for row in rows if row["success"] and row.get("is_cold")]
+    stats = {
+        "count": len(warm),
+        "errors": sum(1 for row in rows if not row["success"]),
+        "mean": statistics.fmean(warm) if warm else None,
+        "min": warm[0] if warm else None,
+        "max": warm[-1] if warm else None,
+        "cold": cold[0] if cold else None,
+    }
+    for key, column in PERCENTILE_COLUMNS.items():
+        # Nearest-rank percentile, which is exact for the few warm iterations of a sequential run
+        rank = max(1, math.ceil(float(key[1:]) * len(warm) / 100))
+        stats[column] = warm[rank - 1] if warm else None
+    return stats
+
+
+class RunHistory:
+    """
+    SQLite store of benchmark runs.
+
+    Every run is one row of `runs` with its settings and git revision, one row of `run_engines`
+    per vendor and one row of `query_stats` per vendor and query; sequential runs also keep every
+    execution in `query_results`. The statistics tables are indexed by (vendor, query_name, run_id),
+    so the history of one query on one engine is an index range scan.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _insert(self, table: str, row: Dict[str, Any]):
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        self.connection.execute(f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})", list(row.values()))
+
+    def _record_run(self, run: Dict[str, Any], engines: Dict[str, Dict[str, Any]]):
+        if run["kind"] not in RUN_KINDS:
+            raise ValueError(f"Unsupported run kind: {run['kind']}, expected one of {RUN_KINDS}")
+        settings = run.pop("settings", None)
+        self._insert("runs", {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            **run,
+            "settings": json.dumps(settings, default=str) if settings is not None else None,
+        })
+        for vendor, engine in engines.items():
+            self._insert("run_engines", {
+                "run_id": run["run_id"],
+                "vendor": vendor,
+                "engine": engine["engine"],
+                "engine_config": json.dumps(engine.get("config"), default=str) if engine.get("config") else None,
+            })
+
+    def record_sequential_run(
+        self, run: Dict[str, Any], engines: Dict[str, Dict[str, Any]], results: Dict[str, List[Dict[str, Any]]]
+    ) -> None:
+        """
+        Ingest a sequential run.
+
+        Args:
+            run: Columns of `runs`: `run_id`, `benchmark` and the optional settings; `settings` is
+                stored as JSON.
+            engines: `engine` label and optional `config` by vendor.
+            results: Rows of `results.csv` by vendor, as returned by `BenchmarkRunner.run_benchmark`.
+        """
+        with self.connection:
+            self._record_run({**run, "kind": "sequential", "vendors": ",".join(results)}, engines)
+            for vendor, rows in results.items():
+                by_query: Dict[str, List[Dict[str, Any]]] = {}
+                for row in rows:
+                    by_query.setdefault(row["query_name"], []).append(row)
+                    self._insert("query_results", {
+                        "run_id": run["run_id"],
+                        "vendor": vendor,
+                        "query_name": row["query_name"],
+                        "iteration": row.get("iteration"),
+                        "is_cold": bool(row.get("is_cold")),
+                        "success": bool(row["success"]),
+                        "execution_time": row["execution_time"],
+                        "num_output_rows": row.get("num_output_rows"),
+                        "pool_wait_time": row.get("pool_wait_time"),
+                        "error": row.get("error"),
+                    })
+                for query_name, query_rows in by_query.items():
+                    self._insert("query_stats", {
+                        "run_id": run["run_id"], "vendor": vendor, "query_name": query_name, **_warm_stats(query_rows)
+                    })
+
+    def record_concurrency_run(
+        self, run: Dict[str, Any], vendor: str, engine: Dict[str, Any], summary_rows: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Ingest a concurrency run of one vendor.
+
+        Args:
+            run: Columns of `runs`, as for `record_sequential_run`.
+            vendor: Benchmarked vendor.
+            engine: `engine` label and optional `config`.
+            summary_rows: Per-query (or per-stream) and 'ALL' rows of the concurrency summary.
+        """
+        with self.connection:
+            self._record_run({**run, "kind": "concurrency", "vendors": vendor}, {vendor: engine})
+            for row in summary_rows:
+                self._insert("query_stats", {
+                    "run_id": run["run_id"],
+                    "vendor": vendor,
+                    "query_name": row.get("query_name", row.get("stream")),
+                    "count": row["count"],
+                    "errors": row["errors"],
+                    "qps": row["qps"],
+                    "mean": row["mean"],
+                    **{column: row.get(key) for key, column in PERCENTILE_COLUMNS.items()},
+                })
+
+    def runs(self, benchmark: Optional[str] = None, vendor: Optional[str] = None, last: int = 30) -> List[Dict[str, Any]]:
+        """The most recent runs, newest first."""
+        conditions, parameters = [], []
+        if benchmark is not None:
+            conditions.append("runs.benchmark = ?")
+            parameters.append(benchmark)
+        if vendor is not None:
+            conditions.append("run_engines.vendor = ?")
+            parameters.append(vendor)
+        rows = self.connection.execute(
+            f"""
+            SELECT runs.run_id, runs.kind, runs.benchmark, runs.started_at, run_engines.vendor, run_engines.engine,
+                   runs.seed, runs.concurrency, runs.git_revision
+            FROM runs JOIN run_engines USING (run_id)
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            ORDER BY runs.started_at DESC
+            LIMIT ?
+            """,
+            [*parameters, last],
+        )
+        return [dict(row) for row in rows]
+
+    def query_history(
+        self,
+        query_name: str,
+        vendor: Optional[str] = None,
+        engine: Optional[str] = None,
+        kind: Optional[str] = None,
+        last: int = 30,
+    ) -> List[Dict[str, Any]]:
+        """Statistics of one query over the most recent runs, newest first."""
+        conditions, parameters = ["query_stats.query_name = ?"], [query_name]
+        for column, value in (("query_stats.vendor", vendor), ("run_engines.engine", engine), ("runs.kind", kind)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        rows = self.connection.execute(
+            f"""
+            SELECT runs.run_id, runs.kind, runs.started_at, query_stats.vendor, run_engines.engine,
+                   runs.concurrency, query_stats.count, query_stats.errors, query_stats.qps, query_stats.mean,
+                   {", ".join(f"query_stats.{column}" for column in PERCENTILE_COLUMNS.values())},
+                   query_stats.cold, runs.git_revision
+            FROM query_stats
+            JOIN runs USING (run_id)
+            JOIN run_engines ON run_engines.run_id = query_stats.run_id AND run_engines.vendor = query_stats.vendor
+            WHERE {" AND ".join(conditions)}
+            ORDER BY runs.started_at DESC
+            LIMIT ?
+            """,
+            [*parameters, last],
+        )
+        return [dict(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the local run history')
+    parser.add_argument('database', help='Run history database, as passed to --history-db')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    runs_parser = commands.add_parser('runs', help='List the most recent runs')
+    runs_parser.add_argument('--benchmark', default=None, help='Only runs of this benchmark')
+    runs_parser.add_argument('--vendor', default=None, help='Only runs of this vendor')
+    runs_parser.add_argument('--last', type=int, default=30, help='Number of runs')
+
+    query_parser = commands.add_parser('query', help='Statistics of one query over the most recent runs')
+    query_parser.add_argument('query_name', help='Name of the query, e.g. 3')
+    query_parser.add_argument('--vendor', default=None, help='Only runs of this vendor')
+    query_parser.add_argument('--engine', default=None, help="Only runs on this engine, e.g. 'Firebolt (1 x M)'")
+    query_parser.add_argument('--kind', choices=RUN_KINDS, default=None, help='Only sequential or concurrency runs')
+    query_parser.add_argument('--last', type=int, default=30, help='Number of runs')
+
+    args = parser.parse_args()
+    if not os.path.exists(args.database):
+        print(f"Run history {args.database} not found")
+        sys.exit(1)
+    with RunHistory(args.database) as history:
+        if args.command == 'runs':
+            rows = history.runs(args.benchmark, args.vendor, args.last)
+        else:
+            rows = history.query_history(args.query_name, args.vendor, args.engine, args.kind, args.last)
+    print(tabulate(rows, headers="keys", tablefmt="grid") if rows else "No matching runs")
+
+
+if __name__ == "__main__":
+    main()
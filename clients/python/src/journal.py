@@ -0,0 +1,139 @@
+"""
+Append-only JSON lines journal of benchmark results, written while the benchmark runs.
+
+A crash or Ctrl-C hours into a run then loses at most the results of the last few seconds, and an
+interrupted sequential run can be resumed from the journal.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List
+
+# Pending records that trigger a write; bounds the memory held by the journal
+DEFAULT_BUFFER_SIZE = 256
+
+# Seconds after which pending records are written and fsynced at the latest
+DEFAULT_FSYNC_INTERVAL_SECS = 5.0
+
+
+class ResultJournal:
+    """
+    Thread-safe JSON lines journal with bounded buffering and periodic fsync.
+
+    Records are serialized right away and kept in a buffer. Once `buffer_size` records are pending,
+    or every `fsync_interval_secs` in a background thread, the buffer is written, flushed and
+    fsynced in one batch, so that the journal costs one fsync per batch rather than per result.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        append: bool = False,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        fsync_interval_secs: float = DEFAULT_FSYNC_INTERVAL_SECS,
+    ):
+        """
+        Args:
+            path: Journal file.
+            append: Whether to continue an existing journal instead of starting a new one.
+            buffer_size: Upper bound on the pending records before they are written.
+            fsync_interval_secs: Upper bound on the time a record stays pending.
+        """
+        if buffer_size < 1 or fsync_interval_secs <= 0:
+            raise ValueError(
+                f"Invalid journal buffering: {buffer_size} records, {fsync_interval_secs} seconds"
+            )
+        self.path = path
+        self.buffer_size = buffer_size
+        self.fsync_interval_secs = fsync_interval_secs
+        self.logger = logging.getLogger(__name__)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if append:
+            _truncate_incomplete_record(path)
+        self._file = open(path, "a" if append else "w")
+        self._buffer: List[str] = []
+        # `_buffer_lock` guards the buffer only, so that appending never waits for a write;
+        # `_write_lock` keeps the batches in order
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="journal-flusher", daemon=True)
+        self._flusher.start()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str)
+        with self._buffer_lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.buffer_size
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write, flush and fsync the pending records."""
+        with self._write_lock:
+            with self._buffer_lock:
+                lines, self._buffer = self._buffer, []
+            if not lines or self._file.closed:
+                return
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.fsync_interval_secs):
+            try:
+                self.flush()
+            except OSError as e:
+                self.logger.error(f"Could not write the result journal {self.path}: {str(e)}")
+
+    def close(self) -> None:
+        """Write the pending records and close the journal."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _truncate_incomplete_record(path: str) -> None:
+    """Cut off a last record that a crash left without its line end, so that appending continues cleanly."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            f.truncate(content.rfind(b"\n") + 1)
+
+
+def read_journal(path: str) -> List[Dict[str, Any]]:
+    """
+    Read the records of a journal.
+
+    A last line that was cut short by a crash is skipped; a missing journal has no records.
+    """
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r") as f:
+        lines = f.read().split("\n")
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            if line_number < len(lines):
+                raise ValueError(f"Corrupt record on line {line_number} of the result journal {path}")
+            logging.getLogger(__name__).warning(
+                f"Skipping the incomplete last record of the result journal {path}"
+            )
+    return records
@@ -0,0 +1,247 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from histogram import REPORTED_PERCENTILES, LatencyHistogram
+
+# Seconds between two published metric windows
+DEFAULT_INTERVAL_SECS = 1.0
+
+# Significant digits of the per-window latency histograms; coarser than the run summary since
+# a window only holds a second worth of queries
+WINDOW_HISTOGRAM_DIGITS = 2
+
+
+@dataclass
+class _SeriesState:
+    """Counters of one (vendor, query) series."""
+    window: LatencyHistogram = field(default_factory=lambda: LatencyHistogram(WINDOW_HISTOGRAM_DIGITS))
+    window_errors: int = 0
+    in_flight: int = 0
+    total_queries: int = 0
+    total_errors: int = 0
+
+
+def _label_str(labels: Dict[str, str]) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class LiveMetrics:
+    """
+    Rolling metrics published while a benchmark runs.
+
+    Runners report every query start and finish. Once per interval the current window is closed and
+    per (vendor, query) QPS, in-flight count, error rate and latency percentiles are appended to a
+    JSONL file and exposed in Prometheus text format on `http://<host>:<port>/metrics`, so a run
+    that has gone wrong can be spotted and aborted early. Each vendor also gets an 'ALL' series.
+    """
+
+    def __init__(
+        self,
+        port: Optional[int] = None,
+        jsonl_path: Optional[str] = None,
+        interval_secs: float = DEFAULT_INTERVAL_SECS,
+        labels: Optional[Dict[str, str]] = None,
+        host: str = "127.0.0.1",
+    ):
+        """
+        Args:
+            port: (Optional) Port of the Prometheus endpoint. No endpoint is served if not given.
+            jsonl_path: (Optional) File to append one JSON line per series and window to.
+            interval_secs: Length of a metrics window.
+            labels: (Optional) Extra labels added to every series, e.g. the shard of a process.
+            host: Interface the Prometheus endpoint listens on.
+        """
+        self.port = port
+        self.jsonl_path = jsonl_path
+        self.interval_secs = interval_secs
+        self.labels = dict(labels or {})
+        self.host = host
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _SeriesState] = {}
+        self._window_start_time = time.time()
+        self._exposition = ""
+        self._stop_event = threading.Event()
+        self._reporter_thread = None
+        self._server = None
+        self._jsonl_fd = None
+
+    def _state(self, vendor: str, query_name: str) -> _SeriesState:
+        state = self._series.get((vendor, query_name))
+        if state is None:
+            state = self._series[(vendor, query_name)] = _SeriesState()
+        return state
+
+    def query_started(self, vendor: str, query_name: str) -> None:
+        with self._lock:
+            self._state(vendor, str(query_name)).in_flight += 1
+
+    def query_finished(self, vendor: str, query_name: str, latency_secs: float, has_error: bool) -> None:
+        with self._lock:
+            state = self._state(vendor, str(query_name))
+            state.in_flight -= 1
+            state.total_queries += 1
+            if has_error:
+                state.window_errors += 1
+                state.total_errors += 1
+            else:
+                state.window.record(latency_secs)
+
+    def _close_window(self) -> List[Dict[str, Any]]:
+        """Reset the window counters and return one record per series, plus an 'ALL' series per vendor."""
+        now = time.time()
+        with self._lock:
+            window_secs = max(now - self._window_start_time, 1e-9)
+            self._window_start_time = now
+            snapshot = []
+            for (vendor, query_name), state in sorted(self._series.items()):
+                snapshot.append((vendor, query_name, state.window, state.window_errors, state.in_flight,
+                                 state.total_queries, state.total_errors))
+                state.window = LatencyHistogram(WINDOW_HISTOGRAM_DIGITS)
+                state.window_errors = 0
+
+        overall = {}
+        for vendor, _, window, window_errors, in_flight, total_queries, total_errors in snapshot:
+            if vendor not in overall:
+                overall[vendor] = (LatencyHistogram(WINDOW_HISTOGRAM_DIGITS), 0, 0, 0, 0)
+            histogram, errors, flying, queries, query_errors = overall[vendor]
+            overall[vendor] = (
+                histogram.merge(window), errors + window_errors, flying + in_flight,
+                queries + total_queries, query_errors + total_errors,
+            )
+        snapshot.extend((vendor, "ALL", *values) for vendor, values in sorted(overall.items()))
+
+        records = []
+        for vendor, query_name, window, window_errors, in_flight, total_queries, total_errors in snapshot:
+            completed = window.total_count + window_errors
+            record = {
+                "timestamp": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+                "unix_time": now,
+                **self.labels,
+                "vendor": vendor,
+                "query_name": query_name,
+                "window_secs": round(window_secs, 3),
+                "qps": round(completed / window_secs, 2),
+                "in_flight": in_flight,
+                "errors": window_errors,
+                "error_rate": round(window_errors / completed, 4) if completed else 0.0,
+                "total_queries": total_queries,
+                "total_errors": total_errors,
+            }
+            for percentile in REPORTED_PERCENTILES:
+                value = window.percentile(percentile)
+                record[f"p{percentile:g}"] = round(value, 4) if value is not None else None
+            records.append(record)
+        return records
+
+    def _render_exposition(self, records: List[Dict[str, Any]]) -> str:
+        """Prometheus text exposition format of the last window."""
+        metrics = [
+            ("benchmark_queries_total", "counter", "Completed queries.", "total_queries"),
+            ("benchmark_query_errors_total", "counter", "Failed queries.", "total_errors"),
+            ("benchmark_queries_in_flight", "gauge", "Queries currently executing.", "in_flight"),
+            ("benchmark_qps", "gauge", "Completed queries per second in the last window.", "qps"),
+            ("benchmark_error_rate", "gauge", "Share of failed queries in the last window.", "error_rate"),
+        ]
+        lines = []
+        for name, metric_type, description, key in metrics:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for record in records:
+                labels = dict(self.labels, vendor=record["vendor"], query=record["query_name"])
+                lines.append(f"{name}{_label_str(labels)} {record[key]}")
+
+        name = "benchmark_query_latency_seconds"
+        lines.append(f"# HELP {name} Latency percentiles of the successful queries in the last window.")
+        lines.append(f"# TYPE {name} gauge")
+        for record in records:
+            for percentile in REPORTED_PERCENTILES:
+                value = record[f"p{percentile:g}"]
+                if value is None:
+                    continue
+                labels = dict(self.labels, vendor=record["vendor"], query=record["query_name"],
+                              quantile=f"{percentile / 100:g}")
+                lines.append(f"{name}{_label_str(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def publish(self) -> None:
+        """Close the current window and publish it to the JSONL file and the Prometheus endpoint."""
+        records = self._close_window()
+        exposition = self._render_exposition(records)
+        with self._lock:
+            self._exposition = exposition
+        if self._jsonl_fd is not None:
+            for record in records:
+                # One unbuffered write per line, so that lines appended by several processes stay intact
+                os.write(self._jsonl_fd, (json.dumps(record) + "\n").encode())
+
+    def _run_reporter(self):
+        while not self._stop_event.wait(self.interval_secs):
+            try:
+                self.publish()
+            except Exception as e:
+                self.logger.warning(f"Could not publish live metrics: {str(e)}")
+
+    def _make_handler(self):
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                with metrics._lock:
+                    body = metrics._exposition.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes are not worth a log line each
+                pass
+
+        return MetricsHandler
+
+    def start(self) -> None:
+        if self.jsonl_path:
+            directory = os.path.dirname(self.jsonl_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._jsonl_fd = os.open(self.jsonl_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            self.logger.info(f"Serving live metrics on http://{self.host}:{self.port}/metrics")
+        self._window_start_time = time.time()
+        self._stop_event.clear()
+        self._reporter_thread = threading.Thread(target=self._run_reporter, daemon=True)
+        self._reporter_thread.start()
+
+    def stop(self) -> None:
+        """Publish the last (partial) window and shut down the endpoint."""
+        self._stop_event.set()
+        if self._reporter_thread is not None:
+            self._reporter_thread.join()
+            self._reporter_thread = None
+        self.publish()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._jsonl_fd is not None:
+            os.close(self._jsonl_fd)
+            self._jsonl_fd = None
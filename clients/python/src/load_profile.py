@@ -0,0 +1,222 @@
+import json
+import math
+import re
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# k6 executors a load profile can follow: virtual users (closed loop) or arrival rates (open loop)
+VU_EXECUTORS = ("constant-vus", "ramping-vus")
+RATE_EXECUTORS = ("constant-arrival-rate", "ramping-arrival-rate")
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+
+
+def parse_duration(value: Any) -> float:
+    """Seconds of a k6 duration such as '30s', '5m', '1h30m' or '500ms'; plain numbers are seconds."""
+    if isinstance(value, (int, float)):
+        secs = float(value)
+    else:
+        text = str(value).strip()
+        parts = _DURATION_PART.findall(text)
+        if parts and "".join(number + unit for number, unit in parts) == text:
+            secs = sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+        else:
+            try:
+                secs = float(text)
+            except ValueError:
+                raise ValueError(f"Invalid duration: {value!r}") from None
+    if secs < 0:
+        raise ValueError(f"Duration must not be negative, got: {value!r}")
+    return secs
+
+
+@dataclass
+class LoadStage:
+    duration_secs: float
+    # Virtual users (or queries per second) reached at the end of the stage
+    target: float
+    # Defaults to the stage number and whether it ramps up, holds or ramps down, e.g. '1-ramp-up'
+    name: Optional[str] = None
+
+
+@dataclass
+class LoadProfile:
+    """
+    Staged load of a concurrency run, like the k6 `ramping-vus` and `ramping-arrival-rate` executors.
+
+    Every stage moves the target linearly from the previous stage's target (`start_target` for the
+    first one) to its own over its duration. A 'vus' profile targets a number of closed-loop
+    virtual users, a 'rate' profile an open-loop arrival rate in queries per second.
+    """
+    stages: List[LoadStage]
+    # 'vus' or 'rate'
+    kind: str = "vus"
+    start_target: float = 0.0
+    # Workers of a 'rate' profile, i.e. the maximum number of queries in flight
+    max_vus: Optional[int] = None
+    # Virtual user `i` is active while the target exceeds `i + vu_offset`, see `share`
+    vu_offset: float = 0.0
+
+    @property
+    def open_loop(self) -> bool:
+        return self.kind == "rate"
+
+    @property
+    def duration_secs(self) -> float:
+        return sum(stage.duration_secs for stage in self.stages)
+
+    @property
+    def peak_target(self) -> float:
+        return max(self.start_target, *(stage.target for stage in self.stages))
+
+    @property
+    def concurrency(self) -> Optional[int]:
+        """Workers needed to follow the profile; None if a 'rate' profile leaves it to the caller."""
+        return self.max_vus if self.open_loop else max(math.ceil(self.peak_target - self.vu_offset), 1)
+
+    def _segments(self) -> Iterator[Tuple[float, float, float, float]]:
+        """(start secs, stop secs, start target, stop target) of every stage with a duration."""
+        start_secs, start_target = 0.0, self.start_target
+        for stage in self.stages:
+            stop_secs = start_secs + stage.duration_secs
+            # A stage without duration jumps to its target, which the next stage starts from
+            if stop_secs > start_secs:
+                yield start_secs, stop_secs, start_target, stage.target
+            start_secs, start_target = stop_secs, stage.target
+
+    def stage_label(self, index: int) -> str:
+        stage = self.stages[index]
+        if stage.name:
+            return stage.name
+        previous = self.stages[index - 1].target if index else self.start_target
+        direction = "ramp-up" if stage.target > previous else "ramp-down" if stage.target < previous else "plateau"
+        return f"{index + 1}-{direction}"
+
+    def stage_at(self, elapsed_secs: float) -> str:
+        """Label of the stage active `elapsed_secs` after the start; the last stage once the profile is over."""
+        stop_secs = 0.0
+        for index, stage in enumerate(self.stages):
+            stop_secs += stage.duration_secs
+            if elapsed_secs < stop_secs:
+                return self.stage_label(index)
+        return self.stage_label(len(self.stages) - 1)
+
+    def target_at(self, elapsed_secs: float) -> float:
+        """Target `elapsed_secs` after the start."""
+        target = self.start_target
+        for start_secs, stop_secs, start_target, stop_target in self._segments():
+            if elapsed_secs < start_secs:
+                return start_target
+            if elapsed_secs < stop_secs:
+                return start_target + (stop_target - start_target) * (elapsed_secs - start_secs) / (stop_secs - start_secs)
+            target = stop_target
+        return target
+
+    def next_active_secs(self, vu: int, elapsed_secs: float) -> Optional[float]:
+        """
+        Earliest time from `elapsed_secs` on at which the 0-based virtual user `vu` is active, i.e.
+        the target exceeds `vu`, or None if it stays inactive until the end of the profile.
+        """
+        vu = vu + self.vu_offset
+        for start_secs, stop_secs, start_target, stop_target in self._segments():
+            if stop_secs <= elapsed_secs:
+                continue
+            secs = max(start_secs, elapsed_secs)
+            target = start_target + (stop_target - start_target) * (secs - start_secs) / (stop_secs - start_secs)
+            if target > vu:
+                return secs
+            if stop_target > vu:
+                # The target ramps up past `vu` within this stage
+                return start_secs + (vu - start_target) / (stop_target - start_target) * (stop_secs - start_secs)
+        return None
+
+    def advance(self, elapsed_secs: float, arrivals: float) -> Optional[float]:
+        """
+        Time from `elapsed_secs` on by which a 'rate' profile offered another `arrivals` queries
+        (the integral of its rate), or None if the profile ends before.
+        """
+        remaining = arrivals
+        for start_secs, stop_secs, start_target, stop_target in self._segments():
+            if stop_secs <= elapsed_secs:
+                continue
+            secs = max(start_secs, elapsed_secs)
+            slope = (stop_target - start_target) / (stop_secs - start_secs)
+            rate = start_target + slope * (secs - start_secs)
+            area = (rate + stop_target) / 2 * (stop_secs - secs)
+            if area < remaining:
+                remaining -= area
+                continue
+            # Solve rate * x + slope / 2 * x^2 = remaining, in a form that is stable for any slope
+            return secs + 2 * remaining / (rate + math.sqrt(max(rate * rate + 2 * slope * remaining, 0.0)))
+        return None
+
+    def share(self, index: int, count: int) -> "LoadProfile":
+        """
+        Profile of the `index`-th of `count` processes that follow this profile together. Every
+        process gets an equal share of the arrival rate and queries in flight. The virtual users are
+        dealt out in turn, so that process `index` runs the virtual users `index`, `index + count`
+        and so on, and all processes together run as many as this profile.
+        """
+        return replace(
+            self,
+            stages=[replace(stage, target=stage.target / count) for stage in self.stages],
+            start_target=self.start_target / count,
+            max_vus=None if self.max_vus is None else math.ceil(self.max_vus / count),
+            vu_offset=(self.vu_offset + index) / count,
+        )
+
+
+def parse_load_profile(config: Dict[str, Any]) -> LoadProfile:
+    """
+    Load profile from a k6 configuration in the format of `config/k6config.json`.
+
+    Without an `executor`, a configuration with `stages` ramps virtual users (`ramping-vus`) and
+    one without holds `VUs` virtual users for `duration` (`constant-vus`). The options of the
+    executors are those of k6:
+
+    - `ramping-vus`: `startVUs` (default 1) and `stages`, a list of `{"duration": "1m", "target": 20}`
+    - `constant-arrival-rate`: `rate`, `timeUnit` (default '1s'), `duration` and `preAllocatedVUs`/`maxVUs`
+    - `ramping-arrival-rate`: `startRate` (default 0), `timeUnit`, `stages` and `preAllocatedVUs`/`maxVUs`
+
+    Rates are queries per `timeUnit`. Stages may also have a `name`. Options of the k6 client only
+    (`vendor`, `number_of_threads`, `connections_per_thread`) are ignored.
+    """
+    executor = config.get("executor") or ("ramping-vus" if "stages" in config else "constant-vus")
+    if executor not in VU_EXECUTORS + RATE_EXECUTORS:
+        raise ValueError(f"Unsupported load profile executor: {executor}. Supported: {VU_EXECUTORS + RATE_EXECUTORS}")
+    open_loop = executor in RATE_EXECUTORS
+    # Targets of 'rate' profiles are converted to queries per second
+    scale = 1.0 / parse_duration(config.get("timeUnit", "1s")) if open_loop else 1.0
+
+    if executor.startswith("ramping"):
+        if not config.get("stages"):
+            raise ValueError(f"The {executor} load profile needs at least one stage")
+        stages = [
+            LoadStage(parse_duration(stage["duration"]), float(stage["target"]) * scale, stage.get("name"))
+            for stage in config["stages"]
+        ]
+        start_target = float(config.get("startRate", 0) if open_loop else config.get("startVUs", 1)) * scale
+    else:
+        target = float(config["rate"] if open_loop else config.get("VUs", config.get("vus", 10))) * scale
+        stages = [LoadStage(parse_duration(config["duration"]), target)]
+        start_target = target
+
+    max_vus = (config.get("maxVUs") or config.get("preAllocatedVUs")) if open_loop else None
+    profile = LoadProfile(
+        stages=stages,
+        kind="rate" if open_loop else "vus",
+        start_target=start_target,
+        max_vus=None if max_vus is None else int(max_vus),
+    )
+    if profile.duration_secs <= 0:
+        raise ValueError("The load profile must last longer than 0 seconds")
+    if min(profile.start_target, *(stage.target for stage in stages)) < 0 or profile.peak_target <= 0:
+        raise ValueError("Load profile targets must not be negative and at least one must be positive")
+    return profile
+
+
+def load_load_profile(path: str) -> LoadProfile:
+    """Read a load profile from a JSON file in the format of `config/k6config.json`, see `parse_load_profile`."""
+    with open(path, "r") as f:
+        return parse_load_profile(json.load(f))
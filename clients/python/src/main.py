@@ -1,13 +1,26 @@
 import argparse
+import dataclasses
 import logging
 import os
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Add the src directory to Python path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from runner import BenchmarkRunner, ConcurrentBenchmarkRunner
+from async_runner import AsyncConcurrentBenchmarkRunner
+from capacity import CapacitySearch, CapacitySLO, engine_label, write_capacity_report
+import exporters
+from exporters import OUTPUT_FORMATS, CostExporter, load_engine_configs
+from history import RunHistory
+from histogram import REPORTED_PERCENTILES
+from load_profile import load_load_profile
+from runner import ITERATIONS_PER_QUERY, BenchmarkRunner, ConcurrentBenchmarkRunner, parse_stream_specs
+from sharded_runner import ShardedConcurrentBenchmarkRunner
+from stats import IterationPolicy
+from sweep import ConcurrencySweep, parse_concurrency_levels
+from workload import load_workload
 
 
 def setup_logging():
@@ -61,14 +74,107 @@ def main():
                        help='Comma-separated list of vendors to benchmark (e.g., snowflake,firebolt)')
     parser.add_argument('--pool-size', type=int, default=5, 
                        help='Connection pool size')
+    parser.add_argument('--iterations', type=int, default=ITERATIONS_PER_QUERY,
+                       help='Number of times each query is run in the sequential benchmark; the first run is reported as cold')
+    parser.add_argument('--adaptive-iterations', action='store_true',
+                       help='Repeat each query after its cold run until the confidence interval of its '
+                            'warm latency is narrower than --target-ci-width, within the limits below')
+    parser.add_argument('--min-iterations', type=int, default=5,
+                       help='Minimum number of warm iterations per query with --adaptive-iterations')
+    parser.add_argument('--max-iterations', type=int, default=50,
+                       help='Maximum number of warm iterations per query with --adaptive-iterations')
+    parser.add_argument('--target-ci-width', type=float, default=0.1,
+                       help='Stop once the confidence interval is narrower than this share of the statistic')
+    parser.add_argument('--ci-statistic', choices=['median', 'mean'], default='median',
+                       help='Statistic whose confidence interval decides when to stop')
+    parser.add_argument('--ci-confidence', type=float, default=0.95,
+                       help='Confidence level of the interval')
+    parser.add_argument('--query-time-budget-s', type=float, default=None,
+                       help='Wall-clock budget of the warm iterations of each query with --adaptive-iterations')
     parser.add_argument('--concurrency', type=int, default=1, 
                        help='Concurrent queries')
     parser.add_argument('--concurrency-duration-s', type=int, default=60,
                        help='The duration in seconds to use for each concurrency benchmark')
+    parser.add_argument('--sweep-concurrency', default=None,
+                       help='Run the concurrency benchmark at each of these levels and combine the results: a '
+                            'comma-separated list (e.g., 60,120,240,480) or a geometric series start:stop:factor (e.g., 8:512:2)')
+    parser.add_argument('--settle-s', type=float, default=0.0,
+                       help='Seconds each concurrency benchmark (or sweep step) runs before it starts measuring')
+    parser.add_argument('--capacity-search', action='store_true',
+                       help='Binary-search the highest arrival rate each vendor sustains within --latency-slo-ms '
+                            'and --max-error-rate, with --concurrency as the limit of queries in flight')
+    parser.add_argument('--latency-slo-ms', type=float, default=None,
+                       help='Latency SLO of the capacity search in milliseconds')
+    parser.add_argument('--slo-percentile', type=float, choices=REPORTED_PERCENTILES, default=95,
+                       help='Latency percentile the SLO applies to')
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                       help='Highest share of failed queries a sustained arrival rate may have')
+    parser.add_argument('--capacity-start-qps', type=float, default=10,
+                       help='Arrival rate of the first capacity search trial')
+    parser.add_argument('--capacity-max-qps', type=float, default=None,
+                       help='Highest arrival rate the capacity search tries')
+    parser.add_argument('--capacity-precision', type=float, default=0.05,
+                       help='Relative width of the search interval at which the capacity search stops')
+    parser.add_argument('--capacity-trial-s', type=float, default=30,
+                       help='Duration of each capacity search trial; the confirmation run uses --concurrency-duration-s')
+    parser.add_argument('--capacity-max-trials', type=int, default=20,
+                       help='Maximum number of capacity search trials per vendor')
+    parser.add_argument('--engine-label', default=None,
+                       help='Engine configuration the capacity search and the run history report (default: from the credentials)')
+    parser.add_argument('--arrival-rate', type=float, default=None,
+                       help='Target queries per second for an open-loop concurrency benchmark. '
+                            'If omitted, each worker issues its next query when the previous one returns')
+    parser.add_argument('--arrival-distribution', choices=['constant', 'poisson'], default='constant',
+                       help='Inter-arrival time distribution for open-loop concurrency benchmarks')
+    parser.add_argument('--driver', choices=['threads', 'asyncio'], default='threads',
+                       help='Run concurrency benchmark virtual users as OS threads or as asyncio tasks')
+    parser.add_argument('--driver-threads', type=int, default=32,
+                       help='Executor threads for blocking SDK calls when using the asyncio driver')
+    parser.add_argument('--processes', type=int, default=1,
+                       help='Number of processes to shard the concurrency benchmark virtual users over')
+    parser.add_argument('--vus-per-process', type=int, default=None,
+                       help='Virtual users per process (default: --concurrency divided by --processes)')
+    parser.add_argument('--result-mode', choices=['fetch', 'drain'], default='fetch',
+                       help="How query results are consumed: 'fetch' materializes all rows, "
+                            "'drain' streams them in batches and only counts rows and bytes")
+    parser.add_argument('--histogram-digits', type=int, default=3,
+                       help='Significant digits of the latency histograms used for concurrency summaries (1-5)')
+    parser.add_argument('--no-query-log', action='store_true',
+                       help='Do not keep or write the per-query concurrency log, only the histogram summary')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                       help='Serve live Prometheus metrics on this local port while benchmarks run')
+    parser.add_argument('--metrics-jsonl', default=None,
+                       help='Append live per-second metrics to this JSONL file while benchmarks run')
+    parser.add_argument('--queries', default=None,
+                       help='Comma-separated names of the benchmark queries to run (e.g., 1,5,12). Default: all')
+    parser.add_argument('--streams', default=None,
+                       help='Mixed workload for the concurrency benchmark: a JSON file with a list of '
+                            '{"query_name", "workers", "duration_secs", "name"} objects, or an inline '
+                            'list such as "q1:4,q2:1:30" (query_name:workers[:duration_secs])')
+    parser.add_argument('--workload', default=None,
+                       help='Workload specification (queries.json shape, optionally with per-query weight, '
+                            'rate and think_time_secs) for the concurrency benchmark instead of the '
+                            "benchmark's queries.json")
+    parser.add_argument('--load-profile', default=None,
+                       help='k6 configuration (config/k6config.json format: VUs and duration, or stages) to ramp '
+                            'the concurrency benchmark through instead of starting all virtual users at once; '
+                            'sets the concurrency and duration')
     parser.add_argument('--seed', type=int, default=1,
                        help='The seed of the random number generator for reproducibility')
     parser.add_argument('--output-dir', default='benchmark_results', 
                        help='Output directory')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='csv',
+                       help="Format of the result files: 'csv', 'parquet' (typed Parquet files partitioned by run "
+                            "and vendor instead of <vendor>_concurrency.csv) or 'both'")
+    parser.add_argument('--engine-config', default=None,
+                       help='JSON file with the engine configuration (name, nodes, size, clusters, dollars_per_hour) '
+                            'of every vendor, to report the cost per benchmark pass and per million queries')
+    parser.add_argument('--history-db', default=None,
+                       help='SQLite run history to ingest every run into, with its settings, engines and '
+                            'git revision; query it with src/history.py')
+    parser.add_argument('--resume', action='store_true',
+                       help='Resume an interrupted run in the same --output-dir: sequential (vendor, query, '
+                            'iteration) cells already recorded in its results.jsonl journal are not run again')
     parser.add_argument('--execute-setup', action='store_true', 
                        help='Flag to execute setup before running the benchmark')
 
@@ -82,6 +188,41 @@ def main():
 
         # Parse vendors
         vendors = parse_vendors(args.vendors)
+        selected_queries = args.queries.split(',') if args.queries else None
+        streams = parse_stream_specs(args.streams) if args.streams else None
+        workload = load_workload(args.workload) if args.workload else None
+        load_profile = load_load_profile(args.load_profile) if args.load_profile else None
+        engine_configs = load_engine_configs(args.engine_config) if args.engine_config else {}
+        cost_exporter = CostExporter(engine_configs) if args.engine_config else None
+        history = RunHistory(args.history_db) if args.history_db else None
+        iteration_policy = None
+        if args.adaptive_iterations:
+            iteration_policy = IterationPolicy(
+                min_iterations=args.min_iterations,
+                max_iterations=args.max_iterations,
+                target_relative_width=args.target_ci_width,
+                statistic=args.ci_statistic,
+                confidence=args.ci_confidence,
+                time_budget_secs=args.query_time_budget_s,
+            )
+        if streams and args.processes > 1:
+            raise ValueError("Mixed workload streams run in a single process, --processes must be 1")
+        sweep_levels = parse_concurrency_levels(args.sweep_concurrency) if args.sweep_concurrency else None
+        if sweep_levels and streams:
+            raise ValueError("Mixed workload streams set their own concurrency and cannot be swept")
+        if load_profile and (streams or sweep_levels or args.capacity_search):
+            raise ValueError("A load profile cannot be combined with --streams, --sweep-concurrency or --capacity-search")
+        capacity_slo = None
+        if args.capacity_search:
+            if streams or sweep_levels:
+                raise ValueError("The capacity search cannot be combined with --streams or --sweep-concurrency")
+            if args.latency_slo_ms is None:
+                raise ValueError("The capacity search needs a --latency-slo-ms")
+            capacity_slo = CapacitySLO(
+                latency_secs=args.latency_slo_ms / 1000,
+                percentile=args.slo_percentile,
+                max_error_rate=args.max_error_rate,
+            )
         logger.info(
             f"Running sequential benchmark '{args.benchmark_name}' for vendors: {vendors}"
         )
@@ -95,6 +236,14 @@ def main():
             output_dir=args.output_dir,
             benchmark_path=benchmark_path,
             execute_setup=args.execute_setup,
+            result_mode=args.result_mode,
+            metrics_port=args.metrics_port,
+            metrics_jsonl=args.metrics_jsonl,
+            selected_queries=selected_queries,
+            iterations=args.iterations,
+            iteration_policy=iteration_policy,
+            resume=args.resume,
+            output_format=args.output_format,
         )
 
         results = sequential_runner.run_benchmark()
@@ -104,28 +253,198 @@ def main():
 
         logger.info(f"Sequential benchmark results saved to: {args.output_dir}")
 
-        if args.concurrency == 1:   # if concurrency is 1, sequential run was enough, we can exit
-            return
+        def engine_info(vendor: str) -> dict:
+            """Engine label and configuration of a vendor for the run history."""
+            if vendor in engine_configs:
+                return {"engine": engine_configs[vendor].label, "config": dataclasses.asdict(engine_configs[vendor])}
+            return {"engine": args.engine_label or engine_label(vendor, sequential_runner.credentials[vendor])}
 
-        # Run the concurrency benchmarks for one vendor at a time, one after another
-        for vendor in vendors:
-            logger.info(
-                f"Running concurrency benchmark '{args.benchmark_name}' for {args.concurrency_duration_s} seconds for vendor: {vendor}"
+        if history:
+            history.record_sequential_run(
+                run={
+                    "run_id": sequential_runner.run_tag,
+                    "benchmark": args.benchmark_name,
+                    "seed": args.seed,
+                    "concurrency": 1,
+                    "result_mode": args.result_mode,
+                    "output_dir": args.output_dir,
+                    "settings": {
+                        "iterations": args.iterations,
+                        "iteration_policy": dataclasses.asdict(iteration_policy) if iteration_policy else None,
+                        "queries": selected_queries,
+                        "resumed": args.resume,
+                    },
+                },
+                engines={vendor: engine_info(vendor) for vendor in results},
+                results=results,
             )
-            runner = ConcurrentBenchmarkRunner(
+
+        if args.concurrency == 1 and not streams and not sweep_levels and not args.capacity_search and not load_profile:   # if concurrency is 1, sequential run was enough, we can exit
+            if cost_exporter:
+                cost_exporter.export(results, args.output_dir)
+            return
+
+        # Concurrency runners of the current vendor, for the run history
+        vendor_runners = []
+
+        def track(runner: ConcurrentBenchmarkRunner) -> ConcurrentBenchmarkRunner:
+            if history:
+                vendor_runners.append(runner)
+            return runner
+
+        def make_concurrency_runner(
+            vendor: str,
+            concurrency: int,
+            output_dir: str,
+            arrival_rate: Optional[float] = args.arrival_rate,
+            benchmark_duration_secs: float = args.concurrency_duration_s,
+        ) -> ConcurrentBenchmarkRunner:
+            driver_kwargs = {}
+            runner_class = ConcurrentBenchmarkRunner
+            if args.driver == 'asyncio':
+                runner_class = AsyncConcurrentBenchmarkRunner
+                driver_kwargs['executor_threads'] = args.driver_threads
+            if args.processes > 1:
+                return track(ShardedConcurrentBenchmarkRunner(
+                    benchmark_name=args.benchmark_name,
+                    creds_file=args.creds_file,
+                    vendor=vendor,
+                    processes=args.processes,
+                    vus_per_process=args.vus_per_process or ShardedConcurrentBenchmarkRunner.split_concurrency(
+                        (load_profile and load_profile.concurrency) or concurrency, args.processes
+                    ),
+                    benchmark_duration_secs=benchmark_duration_secs,
+                    output_dir=output_dir,
+                    benchmark_path=benchmark_path,
+                    seed=args.seed,
+                    arrival_rate=arrival_rate,
+                    arrival_distribution=args.arrival_distribution,
+                    result_mode=args.result_mode,
+                    histogram_digits=args.histogram_digits,
+                    keep_query_log=not args.no_query_log,
+                    metrics_port=args.metrics_port,
+                    metrics_jsonl=args.metrics_jsonl,
+                    selected_queries=selected_queries,
+                    workload=workload,
+                    settle_secs=args.settle_s,
+                    output_format=args.output_format,
+                    driver=args.driver,
+                    driver_kwargs=driver_kwargs,
+                    load_profile=load_profile,
+                ))
+            return track(runner_class(
                 benchmark_name=args.benchmark_name,
                 creds_file=args.creds_file,
                 vendor=vendor,
-                concurrency=args.concurrency,
-                benchmark_duration_secs=args.concurrency_duration_s,
-                output_dir=args.output_dir,
+                concurrency=concurrency,
+                benchmark_duration_secs=benchmark_duration_secs,
+                output_dir=output_dir,
                 benchmark_path=benchmark_path,
                 seed=args.seed,
-            )
-            runner.run_benchmark()
-            logger.info(
-                f"Concurrency benchmark results of {vendor} saved to: {args.output_dir}"
-            )
+                arrival_rate=arrival_rate,
+                arrival_distribution=args.arrival_distribution,
+                result_mode=args.result_mode,
+                histogram_digits=args.histogram_digits,
+                keep_query_log=not args.no_query_log,
+                metrics_port=args.metrics_port,
+                metrics_jsonl=args.metrics_jsonl,
+                selected_queries=selected_queries,
+                streams=streams,
+                workload=workload,
+                settle_secs=args.settle_s,
+                output_format=args.output_format,
+                load_profile=load_profile,
+                **driver_kwargs,
+            ))
+
+        # Run the concurrency benchmarks for one vendor at a time, one after another
+        capacity_results = []
+        # Adds the timelines of the concurrency runs to the sequential charts
+        visual_exporter = exporters.VisualExporter(args.output_dir)
+        for vendor in vendors:
+            if args.capacity_search:
+                capacity_results.append(CapacitySearch(
+                    vendor=vendor,
+                    engine=engine_info(vendor)["engine"],
+                    make_runner=lambda rate, duration, output_dir: make_concurrency_runner(
+                        vendor, args.concurrency, output_dir, arrival_rate=rate, benchmark_duration_secs=duration
+                    ),
+                    slo=capacity_slo,
+                    output_dir=args.output_dir,
+                    trial_secs=args.capacity_trial_s,
+                    confirm_secs=args.concurrency_duration_s,
+                    start_qps=args.capacity_start_qps,
+                    max_qps=args.capacity_max_qps,
+                    precision=args.capacity_precision,
+                    max_trials=args.capacity_max_trials,
+                ).run())
+            elif sweep_levels:
+                logger.info(
+                    f"Running concurrency sweep '{args.benchmark_name}' over {sweep_levels} for vendor: {vendor}"
+                )
+                sweep_rows = ConcurrencySweep(
+                    vendor=vendor,
+                    levels=sweep_levels,
+                    make_runner=lambda concurrency, output_dir: make_concurrency_runner(vendor, concurrency, output_dir),
+                    output_dir=args.output_dir,
+                ).run()
+                if cost_exporter:
+                    for row in sweep_rows:
+                        if row.get("query_name", row.get("stream")) == "ALL":
+                            cost_exporter.add_concurrency_run(vendor, row["concurrency"], row)
+                logger.info(f"Concurrency sweep results of {vendor} saved to: {args.output_dir}")
+            else:
+                runner = make_concurrency_runner(vendor, args.concurrency, args.output_dir)
+                logger.info(
+                    f"Running concurrency benchmark '{args.benchmark_name}' for {runner.benchmark_duration_secs:g} seconds for vendor: {vendor}"
+                )
+                runner.run_benchmark()
+                if cost_exporter:
+                    cost_exporter.add_concurrency_run(vendor, runner.concurrency, runner.summary_rows()[-1])
+                if runner.keep_query_log:
+                    visual_exporter.add_concurrency_run(vendor, runner.concurrency, runner.query_log_frame())
+                logger.info(
+                    f"Concurrency benchmark results of {vendor} saved to: {args.output_dir}"
+                )
+
+            # Every sweep level and capacity trial is a run of its own
+            for runner in vendor_runners:
+                history.record_concurrency_run(
+                    run={
+                        "run_id": runner.run_tag,
+                        "benchmark": args.benchmark_name,
+                        "seed": runner.seed,
+                        "concurrency": runner.concurrency,
+                        "duration_secs": runner.benchmark_duration_secs,
+                        "arrival_rate": runner.total_arrival_rate if runner.open_loop else None,
+                        "result_mode": runner.result_mode,
+                        "output_dir": runner.output_dir,
+                        "settings": {
+                            "driver": args.driver,
+                            "processes": args.processes,
+                            "arrival_distribution": runner.arrival_distribution,
+                            "settle_secs": runner.settle_secs,
+                            "workload": args.workload,
+                            "streams": args.streams,
+                            "load_profile": args.load_profile,
+                            "queries": selected_queries,
+                        },
+                    },
+                    vendor=vendor,
+                    engine=engine_info(vendor),
+                    summary_rows=runner.summary_rows(),
+                )
+            vendor_runners.clear()
+
+        if visual_exporter.timelines:
+            visual_exporter.export(results, args.output_dir)
+        if capacity_results:
+            report_path = write_capacity_report(capacity_results, args.output_dir)
+            logger.info(f"Capacity report saved to: {report_path}")
+        if cost_exporter:
+            cost_exporter.export(results, args.output_dir)
+        if history:
+            logger.info(f"Runs ingested into the run history: {args.history_db}")
 
     except ValueError as e:
         logger.error(f"Configuration error: {str(e)}")
@@ -0,0 +1,236 @@
+"""
+Benchmark compiler: splits benchmark SQL files into named statements and caches the result.
+
+Run `python manifest.py <benchmark_path>` to precompile the manifests of every SQL file of a
+benchmark, e.g. before a run.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+# Directory inside a benchmark folder where the compiled manifests are cached
+MANIFEST_DIR = ".manifest"
+
+# Version of the manifest format; cached manifests of another version are recompiled
+MANIFEST_VERSION = 2
+
+# Comments naming the statement that follows them, e.g. `-- query 12` or `-- Query 3: Revenue`
+QUERY_NAME_PATTERN = re.compile(r"^\s*query\s+([\w.-]+)", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ManifestEntry:
+    name: str
+    text: str
+    hash: str
+    # 1-based line of the source file the statement starts on
+    line: int
+
+
+def _statement_name(comments: List[str]) -> Optional[str]:
+    """Name from the last `-- query <name>` comment of the block directly preceding a statement, if any."""
+    for comment in reversed(comments):
+        match = QUERY_NAME_PATTERN.match(comment)
+        if match:
+            return match.group(1)
+    return None
+
+
+def split_sql(sql: str) -> List[ManifestEntry]:
+    """
+    Split a SQL script into statements.
+
+    Statements end at top-level semicolons. String literals, quoted identifiers, dollar-quoted
+    bodies and comments are skipped as a whole, so that semicolons and `--` inside them do not
+    split or truncate a statement. The name of a statement comes from the last `-- query <name>`
+    line comment directly before it, i.e. with no blank line in between, and defaults to its
+    1-based position in the script. Explicit names take precedence: a position that another
+    statement is named after gets a suffix, e.g. '2_2'.
+
+    Args:
+        sql: SQL script
+
+    Returns:
+        List[ManifestEntry]: Statements in script order, without the terminating semicolon
+    """
+    # (explicit name or None, text, line) of every statement
+    statements = []
+    length = len(sql)
+    line = 1
+    position = 0
+    # Start of the current statement's first token and its line, or None before the first token
+    start = None
+    start_line = None
+    # End of the current statement's last token, so that trailing comments are not included
+    token_end = None
+    # Line comments since the end of the previous statement or the last blank line
+    comments = []
+
+    def close_statement():
+        nonlocal start, comments
+        if start is not None:
+            statements.append((_statement_name(comments), sql[start:token_end], start_line))
+        start = None
+        comments = []
+
+    while position < length:
+        char = sql[position]
+        if char == "-" and sql.startswith("--", position):
+            end = sql.find("\n", position)
+            end = length if end == -1 else end
+            if start is None:
+                comments.append(sql[position + 2:end])
+            position = end
+            continue
+        if char == "/" and sql.startswith("/*", position):
+            end = sql.find("*/", position + 2)
+            end = length if end == -1 else end + 2
+            line += sql.count("\n", position, end)
+            position = end
+            continue
+        if char == "\n":
+            if start is None and not sql[sql.rfind("\n", 0, position) + 1:position].strip():
+                # A blank line detaches the comments above it from the next statement
+                comments = []
+            line += 1
+            position += 1
+            continue
+        if char.isspace():
+            position += 1
+            continue
+        if char == ";":
+            close_statement()
+            position += 1
+            continue
+
+        if start is None:
+            start = position
+            start_line = line
+        if char in ("'", '"', "`"):
+            # Quoted literal or identifier; a doubled quote is an escaped quote
+            end = position + 1
+            while end < length:
+                if sql[end] == char:
+                    if end + 1 < length and sql[end + 1] == char:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            end = min(end + 1, length)
+        elif char == "$":
+            # Dollar-quoted body such as $$ ... $$ or $tag$ ... $tag$
+            tag = re.match(r"\$\w*\$", sql[position:])
+            if tag:
+                end = sql.find(tag.group(0), position + len(tag.group(0)))
+                end = length if end == -1 else end + len(tag.group(0))
+            else:
+                end = position + 1
+        else:
+            end = position + 1
+        line += sql.count("\n", position, end)
+        position = token_end = end
+
+    close_statement()
+
+    # Name the statements once all explicit names are known, so that a default name never takes one
+    explicit_names = {name for name, _, _ in statements if name}
+    entries = []
+    names = set()
+    for number, (explicit_name, text, start_line) in enumerate(statements, 1):
+        name = explicit_name or str(number)
+        if name in names or (not explicit_name and name in explicit_names):
+            # Keep names unique so that the results of different statements are never merged
+            if explicit_name:
+                logger.warning(f"Duplicate query name '{name}' on line {start_line}")
+            suffix = 2
+            while f"{name}_{suffix}" in names or f"{name}_{suffix}" in explicit_names:
+                suffix += 1
+            name = f"{name}_{suffix}"
+        names.add(name)
+        entries.append(ManifestEntry(
+            name=name,
+            text=text,
+            hash=hashlib.sha256(text.encode()).hexdigest(),
+            line=start_line,
+        ))
+    return entries
+
+
+def _manifest_path(sql_file: Path) -> Path:
+    """Cache file of the manifest of `sql_file`, in a manifest directory next to the file."""
+    return sql_file.parent / MANIFEST_DIR / f"{sql_file.name}.json"
+
+
+def compile_sql_file(sql_file: Union[str, os.PathLike]) -> List[ManifestEntry]:
+    """
+    Return the manifest of a SQL file, from the cache if the file has not changed since.
+
+    Cached manifests are keyed by the modification time and size of the SQL file. They are stored
+    in a `.manifest` directory next to the file; if it cannot be written, the file is compiled
+    on every call.
+    """
+    sql_file = Path(sql_file)
+    stat = sql_file.stat()
+    source_key = {"version": MANIFEST_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    manifest_path = _manifest_path(sql_file)
+    try:
+        with open(manifest_path, "r") as f:
+            cached = json.load(f)
+        if cached.get("source") == source_key:
+            return [ManifestEntry(**entry) for entry in cached["queries"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    with open(sql_file, "r") as f:
+        entries = split_sql(f.read())
+    try:
+        manifest_path.parent.mkdir(exist_ok=True)
+        temp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "w") as f:
+            json.dump({"source": source_key, "queries": [asdict(entry) for entry in entries]}, f, indent=1)
+        os.replace(temp_path, manifest_path)
+    except OSError as e:
+        logger.debug(f"Could not cache the manifest of {sql_file}: {str(e)}")
+    return entries
+
+
+def select_queries(entries: List[ManifestEntry], query_names: Optional[Iterable[str]]) -> List[ManifestEntry]:
+    """
+    Return the entries named in `query_names` in that order, or all entries if it is None.
+
+    Raises:
+        ValueError: If a name is not in the manifest
+    """
+    if query_names is None:
+        return entries
+    by_name = {entry.name: entry for entry in entries}
+    unknown = [name for name in query_names if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown query names: {unknown}. Available: {list(by_name)}")
+    return [by_name[name] for name in query_names]
+
+
+def compile_benchmark(benchmark_path: Union[str, os.PathLike]) -> Dict[str, List[ManifestEntry]]:
+    """Compile and cache the manifests of the general and vendor-specific SQL files of a benchmark."""
+    benchmark_path = Path(benchmark_path)
+    return {
+        str(sql_file.relative_to(benchmark_path)): compile_sql_file(sql_file)
+        for sql_file in sorted(benchmark_path.glob("**/*.sql"))
+        if MANIFEST_DIR not in sql_file.parts
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(f"Usage: {sys.argv[0]} <benchmark_path>")
+        sys.exit(1)
+    for sql_file, entries in compile_benchmark(sys.argv[1]).items():
+        print(f"{sql_file}: {len(entries)} queries ({', '.join(entry.name for entry in entries)})")
@@ -0,0 +1,265 @@
+"""
+Typed parameter generators for query templates.
+
+A query template refers to its parameters with `{{name}}` placeholders, or `{{name.start}}` and
+`{{name.end}}` for date ranges. Each execution samples a fresh value for every parameter from the
+worker's seeded random number generator. A run with the same seed therefore expands to the same
+sequence of query instances, and a large value domain gives millions of distinct ones.
+"""
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# `{{name}}` or `{{name.field}}`
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)(?:\.(\w+))?\s*\}\}")
+
+# Hex digits of the fingerprint recorded for every query instance
+FINGERPRINT_LENGTH = 16
+
+
+def _sql_string(value: Any) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+@dataclass
+class ParameterGenerator(ABC):
+    """
+    Base of the parameter generators.
+
+    Generators with `count` > 1 draw that many distinct values per instance, e.g. for `IN` lists.
+    With `quote`, every value is rendered as a SQL string literal.
+    """
+    name: str
+    count: int = 1
+    quote: bool = False
+    separator: str = ", "
+
+    @abstractmethod
+    def sample(self, rng: random.Random) -> Any:
+        """Draw one value."""
+
+    def generate(self, rng: random.Random) -> Any:
+        """Draw the value of one query instance: a single value, or a list of `count` values."""
+        if self.count == 1:
+            return self.sample(rng)
+        values = []
+        # Retry duplicates a bounded number of times so that small domains cannot loop forever
+        for _ in range(self.count * 10):
+            value = self.sample(rng)
+            if value not in values:
+                values.append(value)
+                if len(values) == self.count:
+                    break
+        return values
+
+    def render(self, value: Any, field_name: Optional[str] = None) -> str:
+        if field_name is not None:
+            raise ValueError(f"Parameter '{self.name}' has no field '{field_name}'")
+        values = value if isinstance(value, list) else [value]
+        return self.separator.join(_sql_string(v) if self.quote else str(v) for v in values)
+
+    @property
+    def needs_sample(self) -> bool:
+        """Whether the values still have to be sampled from the database."""
+        return False
+
+
+@dataclass
+class ValuesParameter(ParameterGenerator):
+    """Parameter drawn from a list of values, given inline, read from a file or sampled from a table."""
+    values: List[Any] = field(default_factory=list)
+    # Query whose first column provides the values; run once against the benchmarked engine
+    sample_query: Optional[str] = None
+
+    @property
+    def needs_sample(self) -> bool:
+        return not self.values and self.sample_query is not None
+
+
+@dataclass
+class UniformParameter(ValuesParameter):
+    """Every value is equally likely; with `min`/`max` instead of values, a uniform integer in that range."""
+    min: Optional[int] = None
+    max: Optional[int] = None
+
+    def sample(self, rng: random.Random) -> Any:
+        if not self.values:
+            return rng.randint(self.min, self.max)
+        return self.values[rng.randrange(len(self.values))]
+
+
+@dataclass
+class ZipfParameter(ValuesParameter):
+    """
+    Skewed key picker: the value at rank k (1-based, in the given order) has weight 1 / k^s.
+
+    Order the values by their real-world frequency so that the hottest keys come first.
+    """
+    s: float = 1.1
+    _cumulative_weights: List[float] = field(default_factory=list, init=False, repr=False)
+
+    def sample(self, rng: random.Random) -> Any:
+        if len(self._cumulative_weights) != len(self.values):
+            self._cumulative_weights = list(itertools.accumulate(
+                1.0 / (rank ** self.s) for rank in range(1, len(self.values) + 1)
+            ))
+        index = bisect.bisect_right(self._cumulative_weights, rng.random() * self._cumulative_weights[-1])
+        return self.values[min(index, len(self.values) - 1)]
+
+
+@dataclass
+class EnumParameter(ValuesParameter):
+    """One of a small set of values, optionally weighted."""
+    weights: Optional[List[float]] = None
+
+    def sample(self, rng: random.Random) -> Any:
+        return rng.choices(self.values, weights=self.weights)[0]
+
+
+@dataclass
+class DateRangeParameter(ParameterGenerator):
+    """
+    Window of `days` days starting on a uniformly drawn day in [`start`, `end` - `days`].
+
+    `{{name}}` and `{{name.start}}` render the first day of the window, `{{name.end}}` the day
+    after the last one, so that templates can use `d >= {{name.start}} AND d < {{name.end}}`.
+    """
+    start: str = ""
+    end: str = ""
+    days: int = 1
+    format: str = "%Y-%m-%d"
+
+    def sample(self, rng: random.Random) -> Tuple[str, str]:
+        first_day = date.fromisoformat(self.start)
+        num_start_days = (date.fromisoformat(self.end) - first_day).days - self.days + 1
+        if num_start_days < 1:
+            raise ValueError(f"Date range parameter '{self.name}' is shorter than {self.days} days")
+        window_start = first_day + timedelta(days=rng.randrange(num_start_days))
+        window_end = window_start + timedelta(days=self.days)
+        return window_start.strftime(self.format), window_end.strftime(self.format)
+
+    def render(self, value: Any, field_name: Optional[str] = None) -> str:
+        if field_name not in (None, "start", "end"):
+            raise ValueError(f"Date range parameter '{self.name}' has no field '{field_name}'")
+        window_start, window_end = value
+        rendered = window_end if field_name == "end" else window_start
+        return _sql_string(rendered) if self.quote else rendered
+
+
+PARAMETER_TYPES = {
+    "uniform": UniformParameter,
+    "zipf": ZipfParameter,
+    "enum": EnumParameter,
+    "date_range": DateRangeParameter,
+}
+
+
+def _read_values_file(path: str) -> List[str]:
+    """Values from a file with one value per line; blank lines are skipped."""
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def parse_parameter(name: str, spec: Dict[str, Any], base_dir: str = ".") -> ParameterGenerator:
+    """
+    Build a parameter generator from its JSON specification.
+
+    Args:
+        name: Name of the parameter in the templates.
+        spec: Object with a `type` (one of `PARAMETER_TYPES`) and the fields of that generator.
+            Values can be given inline as `values`, in a `values_file` with one value per line, or
+            by a `sample_query` whose first column is read from the engine before the run.
+        base_dir: Directory relative `values_file` paths are resolved against.
+
+    Returns:
+        ParameterGenerator: The generator
+    """
+    spec = dict(spec)
+    parameter_type = spec.pop("type", None)
+    if parameter_type not in PARAMETER_TYPES:
+        raise ValueError(
+            f"Parameter '{name}' has unsupported type {parameter_type!r}, expected one of {list(PARAMETER_TYPES)}"
+        )
+    values_file = spec.pop("values_file", None)
+    if values_file is not None:
+        spec["values"] = _read_values_file(os.path.join(base_dir, values_file))
+    try:
+        parameter = PARAMETER_TYPES[parameter_type](name=name, **spec)
+    except TypeError as e:
+        raise ValueError(f"Invalid specification of parameter '{name}': {str(e)}")
+
+    if parameter.count < 1:
+        raise ValueError(f"Count of parameter '{name}' must be at least 1, got: {parameter.count}")
+    if isinstance(parameter, UniformParameter) and not parameter.values and parameter.sample_query is None:
+        if parameter.min is None or parameter.max is None or parameter.min > parameter.max:
+            raise ValueError(f"Uniform parameter '{name}' needs values or a valid min/max range")
+    elif isinstance(parameter, ValuesParameter) and not parameter.values and parameter.sample_query is None:
+        raise ValueError(f"Parameter '{name}' needs values, a values_file or a sample_query")
+    if isinstance(parameter, EnumParameter) and parameter.weights is not None \
+            and len(parameter.weights) != len(parameter.values):
+        raise ValueError(f"Parameter '{name}' needs one weight per value")
+    if isinstance(parameter, DateRangeParameter):
+        if parameter.count != 1:
+            raise ValueError(f"Date range parameter '{name}' draws one window per instance, count must be 1")
+        try:
+            date.fromisoformat(parameter.start)
+            date.fromisoformat(parameter.end)
+        except ValueError:
+            raise ValueError(f"Date range parameter '{name}' needs ISO 'start' and 'end' dates")
+    return parameter
+
+
+def template_parameters(template: str) -> List[str]:
+    """Names of the parameters a template refers to, in order of first use."""
+    return list(dict.fromkeys(match.group(1) for match in PLACEHOLDER_PATTERN.finditer(template)))
+
+
+def fingerprint(query_name: str, variation: int, values: Dict[str, Any]) -> str:
+    """Stable short hash of a query instance, equal for equal query, variation and parameter values."""
+    key = json.dumps([query_name, variation, values], sort_keys=True, default=str)
+    return hashlib.sha256(key.encode()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def render_template(
+    template: str, parameters: Dict[str, ParameterGenerator], rng: random.Random
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Expand the placeholders of a template with freshly drawn parameter values.
+
+    A parameter used several times in a template gets the same value everywhere.
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The query text and the drawn value of every parameter
+    """
+    values = {}
+    for name in template_parameters(template):
+        if name not in parameters:
+            raise ValueError(f"Template refers to unknown parameter '{name}'")
+        values[name] = parameters[name].generate(rng)
+
+    def substitute(match: re.Match) -> str:
+        name, field_name = match.groups()
+        return parameters[name].render(values[name], field_name)
+
+    return PLACEHOLDER_PATTERN.sub(substitute, template), values
+
+
+def sample_parameter_values(
+    parameters: Dict[str, ParameterGenerator], execute_query: Callable[[str], List[Any]]
+) -> None:
+    """Fill in the values of the parameters that are sampled from the engine, in place."""
+    for parameter in parameters.values():
+        if not parameter.needs_sample:
+            continue
+        rows = execute_query(parameter.sample_query)
+        parameter.values = [next(iter(row.values())) if isinstance(row, dict) else row[0] for row in rows]
+        if not parameter.values:
+            raise ValueError(f"Sample query of parameter '{parameter.name}' returned no rows")
@@ -1,24 +1,86 @@
+import copy
 import csv
-import itertools
+import heapq
 import json
 import logging
 import os
 import pathlib
 import random
+import re
 import threading
 import time
+import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
 from queue import Queue
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tabulate import tabulate
 
 import connectors
-from exporters import CSVExporter, VisualExporter
+import exporters
+from connectors.base import ENGINE_STATS_FIELDS
+from exporters import OUTPUT_FORMATS
+from histogram import REPORTED_PERCENTILES, QueryLatencyHistograms
+from journal import ResultJournal, read_journal
+from live_metrics import LiveMetrics
+from load_profile import LoadProfile
+from manifest import ManifestEntry, compile_sql_file, select_queries
+from stats import IterationPolicy, relative_ci_width
+from workload import QueryInstance, Workload, load_workload
 
 ITERATIONS_PER_QUERY = 5
 
+# How query results are consumed: 'fetch' materializes every row like a client application would,
+# 'drain' streams the rows in batches and only counts rows and bytes
+RESULT_MODES = ("fetch", "drain")
+
+
+def consume_query(connector, query: str, result_mode: str) -> Tuple[int, Optional[int]]:
+    """Execute a query and consume its result according to `result_mode`, returning (rows, bytes)."""
+    if result_mode == "drain":
+        return connector.drain_query(query)
+    results = connector.execute_query(query)
+    return (len(results) if results else 0), None
+
+
+def make_run_tag(benchmark_name: str) -> str:
+    """
+    Unique tag attached to every query of a run (query tag, label or client tag, depending on the
+    vendor) so that engine-side statistics can be looked up in bulk afterwards. Restricted to the
+    characters and length allowed in BigQuery label values.
+    """
+    prefix = re.sub(r'[^a-z0-9_-]', '_', benchmark_name.lower())
+    return f"{prefix[:32]}-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def get_engine_stats(connector) -> Optional[Dict[str, Any]]:
+    """Engine stats of the last query of `connector`, or None if the connector cannot provide them."""
+    try:
+        return connector.get_last_query_stats()
+    except Exception:
+        return None
+
+
+def fetch_engine_stats(connector_class, credentials: Dict, records: List[Optional[Dict[str, Any]]]) -> None:
+    """Complete engine stats records in place with the vendor's bulk lookup after a run."""
+    query_ids = [record['engine_query_id'] for record in records if record and record['engine_query_id'] is not None]
+    if not query_ids:
+        return
+    connector = connector_class(config=credentials)
+    connector.connect()
+    try:
+        fetched = connector.fetch_query_stats(query_ids)
+    finally:
+        connector.close()
+    for record in records:
+        update = fetched.get(record['engine_query_id']) if record else None
+        if update:
+            record.update({field: value for field, value in update.items() if value is not None})
+
+
 @dataclass
 class QueryResult:
     query_number: int
@@ -28,32 +90,132 @@ class QueryResult:
     error: Optional[str] = None
     vendor: Optional[str] = None
     query_name: Optional[str] = None
+    num_output_rows: int = 0
+    num_output_bytes: Optional[int] = None
+    # Seconds spent waiting for a pool connection before the query could start
+    pool_wait_time: Optional[float] = None
+    engine_stats: Optional[Dict[str, Any]] = None
+    # 1-based iteration of the query; the first one is cold if the query was repeated
+    iteration: Optional[int] = None
+    is_cold: bool = False
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any], query_number: int) -> "QueryResult":
+        """Restore a result from its `results.csv` row, e.g. from the result journal."""
+        engine_stats = {field: row.get(field) for field in ENGINE_STATS_FIELDS}
+        return cls(
+            query_number=query_number,
+            execution_time=row['execution_time'],
+            concurrent_run=row['concurrent_run'],
+            success=row['success'],
+            error=row.get('error'),
+            vendor=row['vendor'],
+            query_name=row['query_name'],
+            num_output_rows=row.get('num_output_rows') or 0,
+            num_output_bytes=row.get('num_output_bytes'),
+            pool_wait_time=row.get('pool_wait_time'),
+            engine_stats=engine_stats if any(value is not None for value in engine_stats.values()) else None,
+            iteration=row.get('iteration'),
+            is_cold=row.get('is_cold', False),
+        )
+
+
+# Upper bound on the number of pool connections that are opened at the same time
+MAX_PARALLEL_CONNECTS = 16
+
+# Pool connections idle for longer than this are validated before they are handed out
+VALIDATE_AFTER_IDLE_SECS = 30.0
+
 
 class ConnectionPool:
-    def __init__(self, connector, credentials: Dict, pool_size: int = 5):
+    """
+    Fixed-size pool of connectors.
+
+    Connections are opened in parallel with a bounded fan-out. A connection is validated on
+    checkout with `validation_query` if it has been idle for longer than `validate_after_idle_secs`
+    or its last query failed, and is transparently replaced if the validation fails.
+    """
+
+    def __init__(
+        self,
+        connector,
+        credentials: Dict,
+        pool_size: int = 5,
+        max_parallel_connects: int = MAX_PARALLEL_CONNECTS,
+        validation_query: str = "SELECT 1",
+        validate_after_idle_secs: float = VALIDATE_AFTER_IDLE_SECS,
+    ):
         self.connector = connector
         self.credentials = credentials
         self.pool_size = pool_size
+        self.max_parallel_connects = max_parallel_connects
+        self.validation_query = validation_query
+        self.validate_after_idle_secs = validate_after_idle_secs
+        self.logger = logging.getLogger(__name__)
+        # Idle connections as (connector, time it was returned, whether it needs to be validated)
         self.connections = Queue(maxsize=pool_size)
         self._lock = threading.Lock()
         self._fill_pool()
 
+    def _new_connection(self):
+        # Create a new connector instance for each connection
+        connector = self.connector.__class__(config=self.credentials)
+        connector.connect()
+        return connector
+
     def _fill_pool(self):
-        for _ in range(self.pool_size):
-            # Create a new connector instance for each connection
-            connector = self.connector.__class__(config=self.credentials)
-            connector.connect()
-            self.connections.put(connector)
+        new_connections = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.pool_size, self.max_parallel_connects))) as executor:
+            futures = [executor.submit(self._new_connection) for _ in range(self.pool_size)]
+            for future in as_completed(futures):
+                try:
+                    new_connections.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+        if errors:
+            for connector in new_connections:
+                connector.close()
+            raise Exception(f"Could not open {len(errors)} of {self.pool_size} pool connections: {str(errors[0])}")
+        for connector in new_connections:
+            self.connections.put((connector, time.time(), False))
+
+    def _is_healthy(self, connector) -> bool:
+        try:
+            connector.execute_query(self.validation_query)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self) -> Tuple[Any, float]:
+        """Check out a healthy connection and return it with the seconds spent waiting for it."""
+        start_time = time.time()
+        connector, returned_time, needs_validation = self.connections.get()
+        try:
+            if needs_validation or time.time() - returned_time > self.validate_after_idle_secs:
+                if not self._is_healthy(connector):
+                    self.logger.warning("Replacing broken pool connection")
+                    try:
+                        connector.close()
+                    except Exception:
+                        pass
+                    connector = self._new_connection()
+        except Exception:
+            # Give the slot back so the pool does not shrink when a replacement cannot connect
+            self.connections.put((connector, returned_time, True))
+            raise
+        return connector, time.time() - start_time
 
     def get_connection(self):
-        return self.connections.get()
+        return self.acquire()[0]
 
-    def return_connection(self, connector):
-        self.connections.put(connector)
+    def return_connection(self, connector, has_error: bool = False):
+        # A failed query may have left the connection broken, so validate it on its next checkout
+        self.connections.put((connector, time.time(), has_error))
 
     def close_all(self):
         while not self.connections.empty():
-            connector = self.connections.get()
+            connector, _, _ = self.connections.get()
             connector.close()
 
 class BenchmarkRunner:
@@ -66,8 +228,31 @@ class BenchmarkRunner:
         concurrency: int = 1,
         output_dir: str = 'benchmark_results',
         execute_setup: bool = False,
-        benchmark_path: str = ""
+        benchmark_path: str = "",
+        result_mode: str = "fetch",
+        metrics_port: Optional[int] = None,
+        metrics_jsonl: Optional[str] = None,
+        selected_queries: Optional[List[str]] = None,
+        iterations: int = ITERATIONS_PER_QUERY,
+        iteration_policy: Optional[IterationPolicy] = None,
+        resume: bool = False,
+        output_format: str = "csv",
     ):
+        """
+        Args:
+            iterations: Number of times each query is run without concurrency. The first
+                iteration is reported as cold.
+            iteration_policy: (Optional) Repeat each query adaptively instead, until the confidence
+                interval of its warm latency is narrow enough. Replaces `iterations`.
+            resume: Continue the result journal `results.jsonl` of an interrupted run in
+                `output_dir`: the (vendor, query, iteration) cells recorded in it are not run again.
+            output_format: 'csv', 'parquet' or 'both'. `results.csv` and the summary report are
+                always written; 'parquet' and 'both' add the results as Parquet partitions.
+        """
+        if result_mode not in RESULT_MODES:
+            raise ValueError(f"Unsupported result mode: {result_mode}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
         self.benchmark_name = benchmark_name
         self.vendors = vendors
         self.concurrency = concurrency
@@ -77,6 +262,21 @@ class BenchmarkRunner:
         self.execute_setup = execute_setup
         self.logger = logging.getLogger(__name__)
         self.benchmark_path = benchmark_path
+        self.result_mode = result_mode
+        self.run_tag = make_run_tag(benchmark_name)
+        self.metrics_port = metrics_port
+        self.metrics_jsonl = metrics_jsonl
+        self.live_metrics = None
+        # Names of the benchmark queries to run, or None for all of them
+        self.selected_queries = selected_queries
+        self.iterations = iterations
+        self.iteration_policy = iteration_policy
+        self.resume = resume
+        self.output_format = output_format
+        self.journal_path = os.path.join(output_dir, 'results.jsonl')
+        self.journal = None
+        # Journaled results of the resumed run, by (vendor, query name) and iteration
+        self.journaled_rows: Dict[Tuple[str, str], Dict[int, List[Dict[str, Any]]]] = {}
         self.connection_pools = {}
         
         # Load credentials
@@ -89,40 +289,14 @@ class BenchmarkRunner:
             if vendor not in self.credentials:
                 raise ValueError(f"No credentials found for vendor: {vendor}")
 
+            # Tag every query of this run so engine-side statistics can be looked up afterwards
+            self.credentials[vendor] = dict(self.credentials[vendor], query_tag=self.run_tag)
             connector_class = connectors.get_connector_class(vendor)
             self.connectors[vendor] = connector_class(config=self.credentials[vendor])
 
     def _load_queries(self, query_file):
         if isinstance(query_file, (str, bytes, os.PathLike)):
-            with open(query_file, 'r') as f:
-                # Read the entire file and split by newlines first
-                lines = f.readlines()
-                queries = []
-                current_query = []
-
-                for line in lines:
-                    line = line.strip()
-                    # Skip empty lines
-                    if not line:
-                        continue
-                    # Remove inline comments
-                    line = line.split('--')[0].strip()  # Remove everything after '--'
-                    # Skip lines that are now empty after removing comments
-                    if not line:
-                        continue
-                    # If the line ends with a semicolon, it's a complete query
-                    if line.endswith(';'):
-                        current_query.append(line[:-1])  # Remove the semicolon
-                        queries.append(' '.join(current_query).strip())
-                        current_query = []  # Reset for the next query
-                    else:
-                        current_query.append(line)
-
-                # Handle any remaining query that doesn't end with a semicolon
-                if current_query:
-                    queries.append(' '.join(current_query).strip())
-
-                return queries
+            return [entry.text for entry in compile_sql_file(query_file)]
         elif isinstance(query_file, list):
             return query_file
         else:
@@ -130,24 +304,39 @@ class BenchmarkRunner:
 
     def _run_query(self, vendor: str, query_name: str, query: str, concurrent_run: int) -> Dict[str, Any]:
         """Execute a single query and return its results."""
+        connection = None
+        pool_wait_time = None
+        has_error = False
         start_time = time.time()
+        if self.live_metrics is not None:
+            self.live_metrics.query_started(vendor, query_name)
         try:
-            # Acquire a connection from the pool
-            connection = self.connection_pools[vendor].get_connection()
-            results = connection.execute_query(query)
+            # Acquire a connection from the pool. The time spent waiting for it is reported
+            # separately and not included in the query's execution time.
+            connection, pool_wait_time = self.connection_pools[vendor].acquire()
+            start_time = time.time()
+            num_rows, num_bytes = consume_query(connection, query, self.result_mode)
             duration = time.time() - start_time
-            
+            if self.live_metrics is not None:
+                self.live_metrics.query_finished(vendor, query_name, duration, has_error=False)
+
             return {
                 'vendor': vendor,
                 'query_name': query_name,
                 'duration': duration,
-                'rows': len(results) if results else 0,
+                'rows': num_rows,
+                'bytes': num_bytes,
                 'status': 'success',
                 'timestamp': datetime.now().isoformat(),
-                'concurrent_run': concurrent_run
+                'concurrent_run': concurrent_run,
+                'pool_wait_time': pool_wait_time,
+                'engine_stats': get_engine_stats(connection),
             }
         except Exception as e:
+            has_error = True
             self.logger.error(f"Error running query {query_name} for {vendor}: {str(e)}")
+            if self.live_metrics is not None:
+                self.live_metrics.query_finished(vendor, query_name, time.time() - start_time, has_error=True)
             return {
                 'vendor': vendor,
                 'query_name': query_name,
@@ -156,17 +345,19 @@ class BenchmarkRunner:
                 'status': 'error',
                 'error': str(e),
                 'timestamp': datetime.now().isoformat(),
-                'concurrent_run': concurrent_run
+                'concurrent_run': concurrent_run,
+                'pool_wait_time': pool_wait_time,
             }
         finally:
-            # Return the connection to the pool
-            self.connection_pools[vendor].return_connection(connection)
+            # Return the connection to the pool, unless acquiring it failed
+            if connection is not None:
+                self.connection_pools[vendor].return_connection(connection, has_error=has_error)
 
-    def _run_concurrent_query(self, vendor: str, query: str, query_number: int) -> List[QueryResult]:
+    def _run_concurrent_query(self, vendor: str, query: str, query_number: int, query_name: str) -> List[QueryResult]:
         """Run a query concurrently and return the results."""
         results = []
         with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
-            future_to_query = {executor.submit(self._run_query, vendor, query_number, query, i+1): query for i in range(self.concurrency)}
+            future_to_query = {executor.submit(self._run_query, vendor, query_name, query, i+1): query for i in range(self.concurrency)}
             
             for future in as_completed(future_to_query):
                 try:
@@ -178,13 +369,97 @@ class BenchmarkRunner:
                         error=result.get('error'),
                         vendor=result['vendor'],
                         query_name=result['query_name'],
-                        concurrent_run=result['concurrent_run']
+                        concurrent_run=result['concurrent_run'],
+                        num_output_rows=result['rows'],
+                        num_output_bytes=result.get('bytes'),
+                        pool_wait_time=result.get('pool_wait_time'),
+                        engine_stats=result.get('engine_stats'),
                     ))
                 except Exception as e:
                     self.logger.error(f"Error in concurrent execution: {str(e)}")
         
         return results
     
+    def _run_iteration(
+        self, vendor: str, query: ManifestEntry, query_number: int, iteration: int, is_cold: bool
+    ) -> List[QueryResult]:
+        """Run one iteration of a query and journal its results, or restore them from the journal of a resumed run."""
+        journaled = self.journaled_rows.get((vendor, query.name), {}).get(iteration)
+        if journaled:
+            self.logger.info(f"  Iteration {iteration} restored from the result journal")
+            return [QueryResult.from_row(row, query_number) for row in journaled]
+
+        results = self._run_concurrent_query(vendor, query.text, query_number, query.name)
+        for result in results:
+            result.iteration = iteration
+            result.is_cold = is_cold
+            if self.journal is not None:
+                self.journal.append(self._result_row(result))
+        return results
+
+    def _run_query_iterations(self, vendor: str, query: ManifestEntry, query_number: int, num_iterations: int) -> List[QueryResult]:
+        """Run all iterations of a query, a fixed number of times or as long as `self.iteration_policy` requires."""
+        results = []
+        if self.iteration_policy is None:
+            for iteration in range(1, num_iterations + 1):
+                self.logger.info(f"  Iteration {iteration}/{num_iterations}")
+                is_cold = iteration == 1 and num_iterations > 1
+                results.extend(self._run_iteration(vendor, query, query_number, iteration, is_cold))
+            return results
+
+        policy = self.iteration_policy
+        self.logger.info("  Cold iteration")
+        results.extend(self._run_iteration(vendor, query, query_number, 1, True))
+
+        warm_samples = []
+        warm_iterations = 0
+        warm_start_time = time.time()
+        while True:
+            stop_reason = policy.stop_reason(warm_iterations, warm_samples, time.time() - warm_start_time)
+            if stop_reason is not None:
+                break
+            warm_iterations += 1
+            query_results = self._run_iteration(vendor, query, query_number, warm_iterations + 1, False)
+            warm_samples.extend(result.execution_time for result in query_results if result.success)
+            results.extend(query_results)
+
+        width = relative_ci_width(warm_samples, policy.statistic, policy.confidence)
+        self.logger.info(
+            f"  Stopped after {warm_iterations} warm iterations ({stop_reason}); relative width of the "
+            f"{policy.confidence:.0%} confidence interval of the {policy.statistic}: "
+            f"{'n/a' if width is None else f'{width:.1%}'}"
+        )
+        return results
+
+    def _result_row(self, result: QueryResult) -> Dict[str, Any]:
+        """Row of a result in `results.csv` and the result journal."""
+        return {
+            'vendor': result.vendor,
+            'query_name': result.query_name,
+            'execution_time': result.execution_time,
+            'concurrent_run': result.concurrent_run,
+            'success': result.success,
+            'error': result.error,
+            'result_mode': self.result_mode,
+            'num_output_rows': result.num_output_rows,
+            'num_output_bytes': result.num_output_bytes,
+            'pool_wait_time': result.pool_wait_time,
+            'iteration': result.iteration,
+            'is_cold': result.is_cold,
+            **(result.engine_stats or dict.fromkeys(ENGINE_STATS_FIELDS)),
+        }
+
+    def _load_journal(self):
+        """Index the results of the interrupted run by cell and continue its journal."""
+        rows = read_journal(self.journal_path)
+        for row in rows:
+            cell = self.journaled_rows.setdefault((row['vendor'], row['query_name']), {})
+            cell.setdefault(row['iteration'], []).append(row)
+        self.logger.info(
+            f"Resuming from {self.journal_path}: {len(rows)} results in "
+            f"{sum(len(cell) for cell in self.journaled_rows.values())} (vendor, query, iteration) cells"
+        )
+
     def _get_sql_file(self, vendor, file_type):
         # Construct the general and vendor-specific file paths
         general_file= Path(self.benchmark_path) / f"{file_type}.sql"
@@ -199,7 +474,7 @@ class BenchmarkRunner:
 
     def run_benchmark(self) -> Dict:
         results = {}
-        num_iterations = ITERATIONS_PER_QUERY if self.concurrency == 1 else 1 # Run each query multiple times to get a distribution
+        num_iterations = self.iterations if self.concurrency == 1 else 1 # Run each query multiple times to get a distribution
 
         def run_vendor_benchmark(vendor):
             if vendor not in self.connectors:
@@ -208,8 +483,11 @@ class BenchmarkRunner:
 
             self.logger.info(f"Running benchmark for {vendor.upper()}...")
 
-            # Execute setup script if execute_setup is True
-            if self.execute_setup:
+            # Execute setup script if execute_setup is True, unless it already ran before the run was interrupted
+            resumed = any(journaled_vendor == vendor for journaled_vendor, _ in self.journaled_rows)
+            if self.execute_setup and resumed:
+                self.logger.info(f"Skipping setup for {vendor}, it already ran before the resumed run")
+            elif self.execute_setup:
                 if not self._execute_setup_script(vendor):  # Only run benchmark if setup succeeded
                     self.logger.warning("Skipping benchmark due to setup failure.")
                     return vendor, []
@@ -230,48 +508,62 @@ class BenchmarkRunner:
 
                 # Load the appropriate benchmark SQL file for the vendor
                 benchmark_file = self._get_sql_file(vendor, 'benchmark')
-                benchmark_queries = self._load_queries(benchmark_file)
+                benchmark_queries = select_queries(compile_sql_file(benchmark_file), self.selected_queries)
                 if not benchmark_queries:
                     raise ValueError(f"No benchmark queries found for vendor: {vendor}")
                 self.logger.info(f"Loaded {len(benchmark_queries)} benchmark queries for: {vendor}")
 
                 for query_number, query in enumerate(benchmark_queries, 1):
-                    self.logger.info(f"Running query {query_number} with {self.concurrency} concurrent executions...")
+                    self.logger.info(
+                        f"Running query {query.name} ({benchmark_file}:{query.line}) with "
+                        f"{self.concurrency} concurrent executions..."
+                    )
                     # Run each query multiple times
-                    for iteration in range(num_iterations):
-                        self.logger.info(f"  Iteration {iteration + 1}/{num_iterations}")
-                        query_results = self._run_concurrent_query(vendor, query, query_number)
-                        vendor_results.extend(query_results)
+                    vendor_results.extend(self._run_query_iterations(vendor, query, query_number, num_iterations))
+
+                try:
+                    fetch_engine_stats(
+                        self.connectors[vendor].__class__,
+                        self.credentials[vendor],
+                        [result.engine_stats for result in vendor_results],
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Could not fetch engine query statistics for {vendor}: {str(e)}")
 
                 # Prepare data for CSV export
-                csv_data = [
-                    {
-                        'vendor': result.vendor,
-                        'query_name': result.query_name,
-                        'execution_time': result.execution_time,
-                        'concurrent_run': result.concurrent_run,
-                        'success': result.success,
-                        'error': result.error
-                    }
-                    for result in vendor_results
-                ]
+                csv_data = [self._result_row(result) for result in vendor_results]
 
             except Exception as e:
                 self.logger.error(f"Error running benchmark for {vendor}: {str(e)}")
                 csv_data = []
             finally:
                  # Ensure proper cleanup
-                self.connection_pools[vendor].close_all()
+                if vendor in self.connection_pools:
+                    self.connection_pools.pop(vendor).close_all()
                 self.connectors[vendor].close() 
 
             return vendor, csv_data
 
-        with ThreadPoolExecutor(max_workers=len(self.vendors)) as executor:
-            future_to_vendor = {executor.submit(run_vendor_benchmark, vendor): vendor for vendor in self.vendors}
-            for future in as_completed(future_to_vendor):
-                vendor, csv_data = future.result()
-                if csv_data:
-                    results[vendor] = csv_data
+        if self.resume:
+            self._load_journal()
+        # Journal every result as it completes, so that an interrupted run can be resumed
+        self.journal = ResultJournal(self.journal_path, append=self.resume)
+        if self.metrics_port is not None or self.metrics_jsonl is not None:
+            self.live_metrics = LiveMetrics(port=self.metrics_port, jsonl_path=self.metrics_jsonl)
+            self.live_metrics.start()
+        try:
+            with ThreadPoolExecutor(max_workers=len(self.vendors)) as executor:
+                future_to_vendor = {executor.submit(run_vendor_benchmark, vendor): vendor for vendor in self.vendors}
+                for future in as_completed(future_to_vendor):
+                    vendor, csv_data = future.result()
+                    if csv_data:
+                        results[vendor] = csv_data
+        finally:
+            self.journal.close()
+            self.journal = None
+            if self.live_metrics is not None:
+                self.live_metrics.stop()
+                self.live_metrics = None
 
         if not results:
             self.logger.warning("No results were generated from the benchmark.")
@@ -279,13 +571,24 @@ class BenchmarkRunner:
             # Ensure the directory exists
             os.makedirs(self.output_dir, exist_ok=True)
             # Use the CSV Exporter to export results
-            csv_exporter = CSVExporter()
+            csv_exporter = exporters.CSVExporter()
             csv_exporter.export(results, self.output_dir)
 
             # Visual export
-            visual_exporter = VisualExporter(self.output_dir)
+            visual_exporter = exporters.VisualExporter(self.output_dir)
             visual_exporter.export(results, self.output_dir)
 
+            if self.output_format != "csv":
+                parquet_exporter = exporters.ParquetExporter(self.run_tag, metadata={
+                    "benchmark_name": self.benchmark_name,
+                    "result_mode": self.result_mode,
+                    "concurrency": self.concurrency,
+                    "iterations": self.iterations if self.iteration_policy is None else None,
+                    "iteration_policy": None if self.iteration_policy is None else vars(self.iteration_policy),
+                    "resumed": self.resume,
+                })
+                parquet_exporter.export(results, self.output_dir)
+
         return results
 
     def _execute_setup_script(self, vendor: str):
@@ -325,6 +628,88 @@ class ConcurrentQueryResult:
     num_output_rows: int
     start_unix_time: float
     stop_unix_time: float
+    num_output_bytes: Optional[int] = None
+    engine_stats: Optional[Dict[str, Any]] = None
+    # In open-loop mode the time the dispatcher scheduled the query for; in closed-loop mode it
+    # equals `start_unix_time`. Latency is measured from this time to account for queueing.
+    intended_start_unix_time: Optional[float] = None
+    # Stream of a mixed workload the query belongs to
+    stream: Optional[str] = None
+    # Stage of the load profile at the intended start time of the query
+    stage: Optional[str] = None
+    # Index of the query variation, the values of its template parameters and their fingerprint
+    variation: Optional[int] = None
+    parameters: Optional[Dict[str, Any]] = None
+    fingerprint: Optional[str] = None
+
+    @property
+    def latency_secs(self) -> float:
+        return self.stop_unix_time - self.intended_start_unix_time
+
+
+@dataclass
+class WorkerState:
+    """Per-worker state of a concurrency run: its random stream, query picker and measurements."""
+    worker_id: int
+    rng: random.Random
+    # Mixed workload stream of the worker, if any
+    stream: Optional["StreamSpec"]
+    next_query_name: Callable[[], str]
+    histograms: QueryLatencyHistograms
+    results: List[ConcurrentQueryResult] = field(default_factory=list)
+    # Unix time at which the worker's stream ends, if earlier than the run
+    deadline: Optional[float] = None
+    # The query ID increases by one for each executed query
+    query_id: int = 0
+
+    def series(self, result: ConcurrentQueryResult) -> str:
+        """Latencies are recorded per stream in a mixed workload, otherwise per query."""
+        return self.stream.label if self.stream else result.query_name
+
+
+ARRIVAL_DISTRIBUTIONS = ("constant", "poisson")
+
+
+@dataclass
+class StreamSpec:
+    """One stream of a mixed workload: `workers` closed-loop workers repeatedly running one query."""
+    query_name: str
+    workers: int
+    # Defaults to the benchmark duration
+    duration_secs: Optional[float] = None
+    # Defaults to the query name
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return self.name or self.query_name
+
+
+def parse_stream_specs(value: str) -> List[StreamSpec]:
+    """
+    Parse mixed workload streams from a JSON file or an inline spec.
+
+    Args:
+        value: Path of a JSON file with a list of objects with the `StreamSpec` fields, or a
+            comma-separated list of `query_name:workers[:duration_secs]`.
+
+    Returns:
+        List[StreamSpec]: The streams
+    """
+    if os.path.isfile(value):
+        with open(value, "r") as f:
+            return [StreamSpec(**spec) for spec in json.load(f)]
+    streams = []
+    for item in value.split(","):
+        parts = item.strip().split(":")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Invalid stream spec '{item}', expected query_name:workers[:duration_secs]")
+        streams.append(StreamSpec(
+            query_name=parts[0],
+            workers=int(parts[1]),
+            duration_secs=float(parts[2]) if len(parts) == 3 else None,
+        ))
+    return streams
 
 
 class ConcurrentBenchmarkRunner:
@@ -338,7 +723,85 @@ class ConcurrentBenchmarkRunner:
         output_dir: str,
         benchmark_path: str,
         seed: int,
+        arrival_rate: Optional[float] = None,
+        arrival_distribution: str = "constant",
+        result_mode: str = "fetch",
+        run_tag: Optional[str] = None,
+        histogram_digits: int = 3,
+        keep_query_log: bool = True,
+        metrics_port: Optional[int] = None,
+        metrics_jsonl: Optional[str] = None,
+        selected_queries: Optional[List[str]] = None,
+        streams: Optional[List[StreamSpec]] = None,
+        workload: Optional[Workload] = None,
+        settle_secs: float = 0.0,
+        output_format: str = "csv",
+        load_profile: Optional[LoadProfile] = None,
     ):
+        """
+        Args:
+            concurrency: Number of worker threads. In closed-loop mode each worker issues its next
+                query as soon as the previous one returns. In open-loop mode it is the maximum
+                number of queries in flight.
+            arrival_rate: (Optional) Target arrival rate in queries per second. If set, queries
+                are scheduled at this rate independent of completions (open-loop mode).
+            arrival_distribution: Inter-arrival distribution for open-loop mode, either
+                'constant' or 'poisson'.
+            result_mode: 'fetch' to materialize query results or 'drain' to stream and count them.
+            run_tag: (Optional) Tag attached to every query for engine statistics lookups. A new
+                one is generated if not given.
+            histogram_digits: Significant digits of the per-query latency histograms the summary
+                is computed from.
+            keep_query_log: Whether to keep every query result for `<vendor>_concurrency.csv`.
+                Without it, memory use is constant regardless of the run length.
+            metrics_port: (Optional) Port to serve live Prometheus metrics on while the run lasts.
+            metrics_jsonl: (Optional) File to append live per-second metrics to as JSON lines.
+            selected_queries: (Optional) Names of the queries to run. All queries are run if not given.
+            streams: (Optional) Mixed workload: run every stream's query with its own number of
+                workers and duration, all at once. `concurrency` and the benchmark duration are
+                then derived from the streams.
+            workload: (Optional) Workload to run instead of the benchmark's `queries.json`. Query
+                weights set the mix of every worker, per-query rates make the run open-loop and
+                think time pauses closed-loop workers between queries.
+            settle_secs: Seconds the workers run before the measurement starts, so that caches,
+                connections and queues reach their steady state. Queries started earlier are not
+                included in the results.
+            output_format: Format of the query log: 'csv' for `<vendor>_concurrency.csv`, 'parquet'
+                for a Parquet partition of the run and vendor, or 'both'.
+            load_profile: (Optional) Stages to ramp the load through instead of starting all
+                workers at once. A 'vus' profile activates the closed-loop workers as its target
+                rises and pauses them as it falls, a 'rate' profile drives the open-loop arrival
+                rate. The benchmark duration is then the profile's, and `concurrency` the number
+                of virtual users it peaks at (the queries in flight of a 'rate' profile without
+                `max_vus`).
+        """
+        if arrival_rate is not None and arrival_rate <= 0:
+            raise ValueError(f"Arrival rate must be positive, got: {arrival_rate}")
+        if settle_secs < 0:
+            raise ValueError(f"Settle period must not be negative, got: {settle_secs}")
+        if arrival_distribution not in ARRIVAL_DISTRIBUTIONS:
+            raise ValueError(f"Unsupported arrival distribution: {arrival_distribution}")
+        if result_mode not in RESULT_MODES:
+            raise ValueError(f"Unsupported result mode: {result_mode}")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        if streams is not None:
+            if arrival_rate is not None:
+                raise ValueError("Mixed workload streams are closed-loop and cannot be combined with an arrival rate")
+            if not streams or any(stream.workers < 1 for stream in streams):
+                raise ValueError("Every mixed workload stream needs at least one worker")
+            labels = [stream.label for stream in streams]
+            if len(set(labels)) != len(labels):
+                raise ValueError(f"Mixed workload stream names must be unique, got: {labels}")
+            concurrency = sum(stream.workers for stream in streams)
+            benchmark_duration_secs = max(stream.duration_secs or benchmark_duration_secs for stream in streams)
+        if load_profile is not None:
+            if streams is not None or arrival_rate is not None:
+                raise ValueError("A load profile sets the load on its own and cannot be combined with streams or an arrival rate")
+            if settle_secs > 0:
+                raise ValueError("A load profile ramps up through its stages, use a first stage instead of a settle period")
+            concurrency = load_profile.concurrency or concurrency
+            benchmark_duration_secs = load_profile.duration_secs
         self.benchmark_name = benchmark_name
         self.vendor = vendor
         self.concurrency = concurrency
@@ -348,18 +811,50 @@ class ConcurrentBenchmarkRunner:
         self.logger = logging.getLogger(__name__)
         self.connector_class = connectors.get_connector_class(self.vendor)
         self.seed = seed
+        self.arrival_rate = arrival_rate
+        self.arrival_distribution = arrival_distribution
+        self.result_mode = result_mode
+        self.histogram_digits = histogram_digits
+        self.keep_query_log = keep_query_log
+        self.run_tag = run_tag or make_run_tag(benchmark_name)
+        self.metrics_port = metrics_port
+        self.metrics_jsonl = metrics_jsonl
+        # Extra labels of the live metrics series, e.g. the shard of a process
+        self.metrics_labels = {}
+        self.live_metrics = None
+        self.selected_queries = selected_queries
+        self.streams = streams
+        self.settle_secs = settle_secs
+        self.output_format = output_format
+        self.load_profile = load_profile
+        # Optional blocking callable invoked once all local workers are ready and before the
+        # measurement starts, e.g. to line up the start with other processes
+        self.start_gate = None
+        # Open-loop arrivals that were scheduled but never started, set after the run
+        self.unstarted_arrivals = 0
+        # Unix time at which the measurement starts: the end of the settle period after all
+        # workers are connected
+        self.measurement_start_time = None
+        # Journal the query log is appended to while the run lasts, so that a crash keeps the
+        # results measured so far
+        self.journal_path = os.path.join(output_dir, f"{vendor}_concurrency.jsonl")
+        self.journal = None
 
         # Load credentials
         with open(creds_file, "r") as f:
             all_credentials = json.load(f)
             if vendor not in all_credentials:
                 raise ValueError(f"No credentials found for vendor: {vendor}")
-            self.credentials = all_credentials[vendor]
+            # Tag every query of this run so engine-side statistics can be looked up afterwards
+            self.credentials = dict(all_credentials[vendor], query_tag=self.run_tag)
 
         # Load queries
-        queries_file = self._get_sql_file(vendor)
-        with open(queries_file, "r") as f:
-            self.queries = json.load(f)
+        self.workload = workload or load_workload(self._get_sql_file(vendor))
+        if selected_queries is not None:
+            self.workload = self.workload.select(selected_queries)
+        if self.workload.needs_parameter_sample:
+            self._sample_parameters()
+        self.queries = self.workload.variations
         if not self.queries:
             raise ValueError(f"No benchmark queries found for vendor: {vendor}")
 
@@ -369,76 +864,338 @@ class ConcurrentBenchmarkRunner:
             f"Loaded {len(self.query_names)} benchmark queries for: {vendor}"
         )
 
+        # The stream of every worker in a mixed workload
+        self.worker_streams = [None] * self.concurrency
+        if streams is not None:
+            unknown = [stream.query_name for stream in streams if stream.query_name not in self.queries]
+            if unknown:
+                raise ValueError(f"Unknown query names in streams: {unknown}. Available: {self.query_names}")
+            self.worker_streams = [stream for stream in streams for _ in range(stream.workers)]
+        elif self.workload.rates:
+            self.logger.info(f"Per-query arrival rates for {vendor}: {self.workload.rates}")
+        # Open loop: arrivals are scheduled at the global and per-query rates, independent of completions
+        self.open_loop = streams is None and (
+            arrival_rate is not None or bool(self.workload.rates) or bool(load_profile and load_profile.open_loop)
+        )
+        if load_profile is not None and not load_profile.open_loop and self.open_loop:
+            raise ValueError("A virtual user load profile is closed-loop and cannot be combined with per-query rates")
+        unrated = [name for name in self.query_names if name not in self.workload.rates]
+        if self.workload.rates and unrated and arrival_rate is None and load_profile is None and streams is None:
+            # Per-query rates are the only arrival streams, nothing would ever schedule the other queries
+            raise ValueError(
+                f"Queries without a rate are never run when only some queries have one: {unrated}. "
+                f"Set --arrival-rate or a rate for every query"
+            )
+
     def _get_sql_file(self, vendor):
         general_file = pathlib.Path(self.benchmark_path) / "queries.json"
         vendor_file = pathlib.Path(self.benchmark_path) / f"{vendor}" / "queries.json"
         return vendor_file if os.path.exists(vendor_file) else general_file
 
-    def _run_worker(self, worker_id: int, seed: int):
-        # Seed the random number generator for reproducibility
+    def _sample_parameters(self):
+        """Read the template parameter values that are sampled from a table, once per run."""
+        # Sample into a copy, the workload may be shared with the runners of other vendors
+        self.workload = copy.deepcopy(self.workload)
+        connector = self.connector_class(config=self.credentials)
+        connector.connect()
+        try:
+            self.workload.sample_parameters(connector.execute_query)
+        finally:
+            connector.close()
+        self.logger.info(f"Sampled the template parameter values of the workload for {self.vendor}")
+
+    def _stream_deadline(self, stream: Optional[StreamSpec]) -> Optional[float]:
+        """Unix time at which the workers of a mixed workload `stream` stop, if earlier than the benchmark end."""
+        if stream is None or stream.duration_secs is None:
+            return None
+        return self.measurement_start_time + stream.duration_secs
+
+    def _stage_at(self, unix_time: float) -> Optional[str]:
+        """Stage of the load profile at `unix_time`, if the run follows one."""
+        if self.load_profile is None:
+            return None
+        return self.load_profile.stage_at(unix_time - self.measurement_start_time)
+
+    def _inactive_secs(self, worker_id: int) -> Optional[float]:
+        """
+        Seconds until a closed-loop worker is part of the load profile's target again (0 if it is
+        now), or None if it is not until the end of the run.
+        """
+        if self.load_profile is None or self.open_loop:
+            return 0.0
+        elapsed_secs = time.time() - self.measurement_start_time
+        active_secs = self.load_profile.next_active_secs(worker_id, elapsed_secs)
+        return None if active_secs is None else max(active_secs - elapsed_secs, 0.0)
+
+    def _new_worker(self, worker_id: int, seed: int) -> "WorkerState":
+        """State of a worker, with its random number generator seeded for reproducibility."""
         rng = random.Random(seed)
-        # Each worker thread should execute the queries in a random order
-        query_names_random_permutation = rng.sample(
-            self.query_names, len(self.query_names)
+        # Each worker should execute the queries (only its stream's query in a mixed workload) in
+        # a random order, or sample them by weight in a weighted workload
+        stream = self.worker_streams[worker_id]
+        worker_query_names = [stream.query_name] if stream else self.query_names
+        return WorkerState(
+            worker_id=worker_id,
+            rng=rng,
+            stream=stream,
+            next_query_name=self.workload.query_picker(worker_query_names, rng),
+            histograms=QueryLatencyHistograms(self.histogram_digits),
         )
+
+    def _start_query(
+        self, worker: "WorkerState", query_name: str, intended_start_time: Optional[float]
+    ) -> Tuple[QueryInstance, ConcurrentQueryResult]:
+        """
+        Choose a random variation of the next query of a worker, draw its template parameters and
+        mark it in flight. Returns the query and its result, which `_query_done` completes.
+
+        `intended_start_time` is the scheduled start of an open-loop arrival; closed-loop queries
+        start right away.
+        """
+        instance = self.workload.instantiate(query_name, worker.rng)
+        start_time = time.time()
+        if intended_start_time is None:
+            intended_start_time = start_time
+        result = ConcurrentQueryResult(
+            query_name=query_name,
+            query_id=worker.query_id,
+            has_error=False,
+            num_output_rows=0,
+            start_unix_time=start_time,
+            stop_unix_time=start_time,
+            intended_start_unix_time=intended_start_time,
+            stream=worker.stream.label if worker.stream else None,
+            stage=self._stage_at(intended_start_time),
+            variation=instance.variation,
+            parameters=instance.parameters,
+            fingerprint=instance.fingerprint,
+        )
+        worker.query_id += 1
+        if self.live_metrics is not None:
+            self.live_metrics.query_started(self.vendor, worker.series(result))
+        return instance, result
+
+    def _query_done(
+        self,
+        worker: "WorkerState",
+        result: ConcurrentQueryResult,
+        error: Optional[Exception],
+        num_output_rows: int = 0,
+        num_output_bytes: Optional[int] = None,
+    ) -> None:
+        """Complete the result of a query that just returned (or failed with `error`)."""
+        result.stop_unix_time = time.time()
+        if error is None:
+            result.num_output_rows = num_output_rows
+            result.num_output_bytes = num_output_bytes
+        else:
+            result.has_error = True
+            self.logger.error(f"Error running query {result.query_name} for {self.vendor}: {str(error)}")
+        if self.live_metrics is not None:
+            self.live_metrics.query_finished(self.vendor, worker.series(result), result.latency_secs, result.has_error)
+
+    def _record_query(self, worker: "WorkerState", result: ConcurrentQueryResult) -> bool:
+        """
+        Add a query to the histograms and results of its worker, unless it started during the
+        settle period. Returns False if the worker has to stop instead: the run (or the worker's
+        mixed workload stream) ended while the query ran, and it is not included in the results.
+        """
+        if self.stop_event.is_set() or (worker.deadline is not None and result.stop_unix_time > worker.deadline):
+            return False
+        # Queries started during the settle period are not measured
+        if result.intended_start_unix_time < self.measurement_start_time:
+            return True
+        if result.has_error:
+            worker.histograms.record_error(worker.series(result))
+        else:
+            worker.histograms.record(worker.series(result), result.latency_secs)
+        if self.keep_query_log:
+            self._record_result(worker.worker_id, worker.results, result)
+        return True
+
+    def _think_time_secs(self, query_name: str) -> float:
+        """Pause of a closed-loop worker after `query_name`; open-loop workers wait for arrivals instead."""
+        return 0.0 if self.open_loop else self.workload.think_time(query_name)
+
+    def _end_worker(self, worker: "WorkerState"):
+        self.worker_thread_results[worker.worker_id] = worker.results
+        self.worker_histograms[worker.worker_id] = worker.histograms
+
+    def _run_worker(self, worker_id: int, seed: int):
+        worker = self._new_worker(worker_id, seed)
         # Connect to the database
         connector = self.connector_class(config=self.credentials)
         connector.connect()
-        results = []
 
         # Wait until all worker threads are ready
         self.start_barrier.wait()
+        worker.deadline = self._stream_deadline(worker.stream)
 
-        # The query ID increases by one for each executed query
-        query_id = 0
-
-        # Repeatedly iterate over the queries until the main thread sets `self.stop_event`
-        for query_name in itertools.cycle(query_names_random_permutation):
-            # Choose a random variation of the query
-            random_query_variation = rng.choice(self.queries[query_name])
+        # Repeatedly run queries until the main thread sets `self.stop_event`
+        while True:
+            # A load profile ramps the number of active workers: the others wait for their turn
+            inactive_secs = self._inactive_secs(worker_id)
+            if inactive_secs is None:
+                break
+            if inactive_secs > 0:
+                if self.stop_event.wait(inactive_secs):
+                    break
+                continue
+            intended_start_time = None
+            if self.open_loop:
+                # Open loop: wait for the dispatcher to release the next arrival
+                arrival = self.arrivals.get()
+                if arrival is None or self.stop_event.is_set():
+                    break
+                # Arrivals of a per-query rate name their query; the others follow the mix
+                intended_start_time, query_name = arrival
+                query_name = query_name or worker.next_query_name()
+            else:
+                query_name = worker.next_query_name()
+            instance, result = self._start_query(worker, query_name, intended_start_time)
+            error, num_output_rows, num_output_bytes = None, 0, None
             try:
-                has_error = False
-                start_time = time.time()
-                num_output_rows = len(connector.execute_query(random_query_variation))
-                stop_time = time.time()
+                num_output_rows, num_output_bytes = consume_query(connector, instance.text, self.result_mode)
             except Exception as e:
-                has_error = True
-                self.logger.error(
-                    f"Error running query {query_name} for {self.vendor}: {str(e)}"
-                )
+                error = e
+            self._query_done(worker, result, error, num_output_rows, num_output_bytes)
+            if not result.has_error and self.keep_query_log:
+                result.engine_stats = get_engine_stats(connector)
 
-            if self.stop_event.is_set():
-                # Stop the worker thread. The current query did not finish in time and should not
-                # be included in `self.worker_thread_results`.
-                self.worker_thread_results[worker_id] = results
-                connector.close()
-                return
-            else:
-                results.append(
-                    ConcurrentQueryResult(
-                        query_name=query_name,
-                        query_id=query_id,
-                        has_error=has_error,
-                        num_output_rows=0 if has_error else num_output_rows,
-                        start_unix_time=start_time,
-                        stop_unix_time=stop_time,
-                    )
-                )
-                query_id += 1
+            if not self._record_query(worker, result):
+                break
+            think_time_secs = self._think_time_secs(query_name)
+            if think_time_secs > 0 and self.stop_event.wait(think_time_secs):
+                break
+
+        self._end_worker(worker)
+        connector.close()
+
+    def _next_interarrival_secs(self, rng: random.Random, rate: float) -> float:
+        if self.arrival_distribution == "poisson":
+            return rng.expovariate(rate)
+        return 1.0 / rate
+
+    @property
+    def total_arrival_rate(self) -> float:
+        """Arrival rate of an open-loop run in queries per second; the peak rate of a load profile."""
+        profile_rate = self.load_profile.peak_target if self.load_profile and self.load_profile.open_loop else 0.0
+        return (self.arrival_rate or 0.0) + sum(self.workload.rates.values()) + profile_rate
+
+    def _arrival_schedule(self, start_time: float, rng: random.Random):
+        """
+        Yield the open-loop arrivals as (intended start time, query name) in time order.
+
+        Every query with its own rate is an independent arrival stream naming that query. Arrivals
+        at the global arrival rate have no query name; the worker picks one from the query mix.
+        The global rate of a 'rate' load profile changes over time: every arrival advances the
+        profile by one query (a random number of them with Poisson arrivals), until it ends.
+        """
+        rates = [(None, self.arrival_rate)] if self.arrival_rate is not None else []
+        rates.extend(self.workload.rates.items())
+        # Heap of the next arrival of every stream, with the stream index as a tie-breaker
+        upcoming = [(start_time, i) for i in range(len(rates))]
+        if self.load_profile is not None and self.load_profile.open_loop:
+            # The profile's stream has no constant rate; its first arrival depends on the start rate
+            rates.append((None, None))
+            first_secs = self.load_profile.advance(0.0, self._next_interarrival_secs(rng, 1.0))
+            if first_secs is not None:
+                upcoming.append((start_time + first_secs, len(rates) - 1))
+        heapq.heapify(upcoming)
+        while upcoming:
+            arrival_time, i = heapq.heappop(upcoming)
+            query_name, rate = rates[i]
+            yield arrival_time, query_name
+            if rate is not None:
+                heapq.heappush(upcoming, (arrival_time + self._next_interarrival_secs(rng, rate), i))
+                continue
+            next_secs = self.load_profile.advance(arrival_time - start_time, self._next_interarrival_secs(rng, 1.0))
+            if next_secs is not None:
+                heapq.heappush(upcoming, (start_time + next_secs, i))
+
+    def _run_dispatcher(self, seed: int):
+        """Release arrivals at the target rates for the open-loop workers, independent of completions."""
+        rng = random.Random(seed)
+        self.start_barrier.wait()
+
+        for arrival in self._arrival_schedule(time.time(), rng):
+            delay = arrival[0] - time.time()
+            if self.stop_event.is_set() or (delay > 0 and self.stop_event.wait(delay)):
+                break
+            self.arrivals.put(arrival)
+        # A load profile's schedule ends with the run, let the workers catch up until then
+        self.stop_event.wait()
+
+        # Arrivals still queued at the end were never started: the offered load exceeded what
+        # `self.concurrency` workers could sustain
+        backlog = self.unstarted_arrivals = self.arrivals.qsize()
+        if backlog:
+            self.logger.warning(
+                f"{backlog} scheduled queries were never started for {self.vendor}; "
+                f"consider increasing the concurrency for an arrival rate of {self.total_arrival_rate:g} QPS"
+            )
+        # Wake up the workers still waiting for an arrival
+        for _ in range(self.concurrency):
+            self.arrivals.put(None)
+
+    def _record_result(self, worker_id: int, results: List[ConcurrentQueryResult], result: ConcurrentQueryResult):
+        """Add a measured query to the worker's results and the journal."""
+        results.append(result)
+        if self.journal is not None:
+            self.journal.append(self._csv_row(worker_id, result))
+
+    def _csv_row(self, worker_id: int, result: ConcurrentQueryResult) -> Dict[str, Any]:
+        """Row of a query in `<vendor>_concurrency.csv` and the journal."""
+        return {
+            "worker_id": worker_id,
+            "stream": result.stream,
+            "stage": result.stage,
+            "query_name": result.query_name,
+            "query_id": result.query_id,
+            "has_error": result.has_error,
+            "num_output_rows": result.num_output_rows,
+            "num_output_bytes": result.num_output_bytes,
+            "result_mode": self.result_mode,
+            "start_unix_time": result.start_unix_time,
+            "stop_unix_time": result.stop_unix_time,
+            "intended_start_unix_time": result.intended_start_unix_time,
+            "latency_secs": result.latency_secs,
+            "variation": result.variation,
+            "fingerprint": result.fingerprint,
+            "parameters": json.dumps(result.parameters, default=str) if result.parameters else None,
+            **(result.engine_stats or dict.fromkeys(ENGINE_STATS_FIELDS)),
+        }
 
     def _write_csv(self):
         # Ensure the directory exists
         os.makedirs(self.output_dir, exist_ok=True)
+        if not self.keep_query_log:
+            self.logger.info("Per-query log disabled, only the concurrency summary is written")
+            return
+        if self.output_format != "csv":
+            self._write_parquet()
+        if self.output_format == "parquet":
+            return
         csv_file_path = os.path.join(self.output_dir, f"{self.vendor}_concurrency.csv")
         with open(csv_file_path, mode="w", newline="") as csv_file:
             field_names = [
                 "worker_id",
+                "stream",
+                "stage",
                 "query_name",
                 "query_id",
                 "has_error",
                 "num_output_rows",
+                "num_output_bytes",
+                "result_mode",
                 "start_unix_time",
                 "stop_unix_time",
+                "intended_start_unix_time",
+                "latency_secs",
+                "variation",
+                "fingerprint",
+                "parameters",
+                *ENGINE_STATS_FIELDS,
             ]
             writer = csv.DictWriter(csv_file, fieldnames=field_names)
             writer.writeheader()
@@ -446,44 +1203,232 @@ class ConcurrentBenchmarkRunner:
                 if not worker_results:
                     self.logger.warning(f"No results found for worker {worker_id}")
                 for result in worker_results:
-                    row = {
-                        "worker_id": worker_id,
-                        "query_name": result.query_name,
-                        "query_id": result.query_id,
-                        "has_error": result.has_error,
-                        "num_output_rows": result.num_output_rows,
-                        "start_unix_time": result.start_unix_time,
-                        "stop_unix_time": result.stop_unix_time,
-                    }
-                    writer.writerow(row)
+                    writer.writerow(self._csv_row(worker_id, result))
         self.logger.info(f"Concurrency benchmark results exported to {csv_file_path}")
 
-    def run_benchmark(self):
-        self.logger.info(f"Running concurrency benchmark for {self.vendor.upper()}...")
-        self.start_barrier = threading.Barrier(self.concurrency)
+    def _write_parquet(self):
+        """Write the query log to the Parquet partition of this run and vendor, one worker at a time."""
+        from exporters.parquet_exporter import CONCURRENCY_SCHEMA
+
+        parquet_exporter = exporters.ParquetExporter(self.run_tag, metadata={
+            "benchmark_name": self.benchmark_name,
+            "concurrency": self.concurrency,
+            "benchmark_duration_secs": self.benchmark_duration_secs,
+            "settle_secs": self.settle_secs,
+            "open_loop": self.open_loop,
+            "arrival_rate": self.total_arrival_rate if self.open_loop else None,
+            "arrival_distribution": self.arrival_distribution if self.open_loop else None,
+            "seed": self.seed,
+            "result_mode": self.result_mode,
+            "streams": [vars(stream) for stream in self.streams] if self.streams else None,
+            "load_profile": asdict(self.load_profile) if self.load_profile else None,
+        })
+        file_path = parquet_exporter.write_batches(
+            "concurrency",
+            self.vendor,
+            (
+                [self._csv_row(worker_id, result) for result in worker_results]
+                for worker_id, worker_results in enumerate(self.worker_thread_results)
+            ),
+            CONCURRENCY_SCHEMA,
+            self.output_dir,
+        )
+        self.logger.info(f"Concurrency benchmark results exported to {file_path}")
+
+    def _collect_engine_stats(self):
+        """Complete the engine stats of all results with the vendor's bulk lookup."""
+        self.logger.info(f"Fetching engine query statistics for run {self.run_tag}...")
+        try:
+            fetch_engine_stats(
+                connectors.get_connector_class(self.vendor),
+                self.credentials,
+                [result.engine_stats for worker_results in self.worker_thread_results for result in worker_results],
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not fetch engine query statistics for {self.vendor}: {str(e)}")
+
+    def summary_rows(self) -> List[Dict[str, Any]]:
+        """
+        Per-query (per-stream in a mixed workload) and overall ('ALL') throughput and latency
+        statistics from the merged histograms.
+        """
+        histograms = QueryLatencyHistograms.merged(self.worker_histograms, self.histogram_digits)
+        durations = {stream.label: stream.duration_secs for stream in self.streams or [] if stream.duration_secs}
+
+        def summarize(name, histogram, num_errors):
+            row = {
+                "stream" if self.streams else "query_name": name,
+                "count": histogram.total_count,
+                "errors": num_errors,
+                "qps": round(histogram.total_count / durations.get(name, self.benchmark_duration_secs), 2),
+                "mean": round(histogram.mean, 4) if histogram.total_count else None,
+            }
+            for percentile in REPORTED_PERCENTILES:
+                value = histogram.percentile(percentile)
+                row[f"p{percentile:g}"] = round(value, 4) if value is not None else None
+            return row
+
+        rows = [
+            summarize(name, histograms.histogram(name), histograms.errors.get(name, 0))
+            for name in histograms.query_names
+        ]
+        rows.append(summarize("ALL", histograms.overall(), sum(histograms.errors.values())))
+        return rows
+
+    def query_log_frame(self):
+        """The query log as a DataFrame with the columns of the steady-state analysis."""
+        import pandas as pd
+
+        from analysis import ANALYSIS_COLUMNS
+
+        return pd.DataFrame.from_records(
+            (
+                (worker_id, result.stream, result.query_name, result.has_error,
+                 result.start_unix_time, result.stop_unix_time, result.latency_secs)
+                for worker_id, worker_results in enumerate(self.worker_thread_results)
+                for result in worker_results
+            ),
+            columns=ANALYSIS_COLUMNS,
+        )
+
+    def _analyze_query_log(self):
+        """Steady-state analysis (`analysis.ConcurrencyAnalysis`) of the query log, if it was kept."""
+        from analysis import analyze_query_log
+
+        if not self.keep_query_log or not any(self.worker_thread_results):
+            return None
+        try:
+            return analyze_query_log(self.query_log_frame(), open_loop=self.open_loop)
+        except ValueError as e:
+            self.logger.warning(f"Skipping the steady-state analysis of {self.vendor}: {str(e)}")
+            return None
+
+    def _write_summary(self):
+        """
+        Write overall and per-query throughput and latency statistics of the successful queries,
+        followed by the steady-state analysis of the query log, also written as markdown tables.
+        """
+        rows = self.summary_rows()
+        num_errors = rows[-1]["errors"]
+        analysis = self._analyze_query_log()
+
+        summary_file_path = os.path.join(self.output_dir, f"{self.vendor}_concurrency_summary.txt")
+        with open(summary_file_path, "w") as f:
+            f.write(f"Concurrency Benchmark Summary for {self.vendor}\n")
+            f.write("=====================================\n")
+            f.write(f"Workers: {self.concurrency}, duration: {self.benchmark_duration_secs}s, errors: {num_errors}\n")
+            if self.load_profile is not None:
+                unit = "QPS" if self.load_profile.open_loop else "VUs"
+                f.write(f"Load profile ({unit}): {self.load_profile.start_target:g}")
+                for i, stage in enumerate(self.load_profile.stages):
+                    f.write(f" -> {stage.target:g} over {stage.duration_secs:g}s ({self.load_profile.stage_label(i)})")
+                f.write("\n")
+            f.write("\n")
+            f.write(tabulate(rows, headers="keys", tablefmt="grid"))
+            if analysis is not None:
+                f.write("\n\n" + analysis.to_text())
+        self.logger.info(f"Concurrency benchmark summary exported to {summary_file_path}")
+
+        if analysis is not None:
+            markdown_file_path = os.path.join(self.output_dir, f"{self.vendor}_concurrency_analysis.md")
+            with open(markdown_file_path, "w") as f:
+                f.write(analysis.to_markdown(f"{self.vendor} Steady-State Analysis ({self.concurrency} workers)"))
+            self.logger.info(f"Concurrency benchmark analysis exported to {markdown_file_path}")
+
+    def _start_journal(self):
+        if self.keep_query_log:
+            self.journal = ResultJournal(self.journal_path)
+
+    def _stop_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def _start_live_metrics(self):
+        if self.metrics_port is None and self.metrics_jsonl is None:
+            return
+        self.live_metrics = LiveMetrics(
+            port=self.metrics_port, jsonl_path=self.metrics_jsonl, labels=self.metrics_labels
+        )
+        self.live_metrics.start()
+
+    def _stop_live_metrics(self):
+        if self.live_metrics is not None:
+            self.live_metrics.stop()
+            self.live_metrics = None
+
+    def _on_workers_ready(self):
+        # Runs in exactly one thread once every party reached `self.start_barrier`
+        if self.start_gate is not None:
+            self.start_gate()
+        self.measurement_start_time = time.time() + self.settle_secs
+        self.started_event.set()
+
+    def run_workers(self):
+        """Run the workers for `self.benchmark_duration_secs` and collect `self.worker_thread_results`."""
+        open_loop = self.open_loop
+        # In open-loop mode the dispatcher thread also waits at the barrier
+        self.start_barrier = threading.Barrier(
+            self.concurrency + (1 if open_loop else 0), action=self._on_workers_ready
+        )
+        self.started_event = threading.Event()
         self.stop_event = threading.Event()
+        self.arrivals = Queue()
         self.worker_thread_results = [[] for _ in range(self.concurrency)]
+        self.worker_histograms = [None] * self.concurrency
+        self.unstarted_arrivals = 0
 
         # Get random seeds for the worker threads (but seed the random seed generator with `self.seed` for reproducibility)
         rng = random.Random(self.seed)
         random_seeds = rng.sample(range(42_000_000), self.concurrency)
+        dispatcher_seed = rng.randrange(42_000_000)
 
-        # Start `self.concurrency` worker threads
-        threads = []
-        for i in range(self.concurrency):
-            thread = threading.Thread(
-                target=self._run_worker, args=(i, random_seeds[i])
-            )
-            threads.append(thread)
-            thread.start()
+        self._start_journal()
+        self._start_live_metrics()
+        try:
+            # Start `self.concurrency` worker threads
+            threads = []
+            for i in range(self.concurrency):
+                thread = threading.Thread(
+                    target=self._run_worker, args=(i, random_seeds[i])
+                )
+                threads.append(thread)
+                thread.start()
+            if open_loop:
+                thread = threading.Thread(target=self._run_dispatcher, args=(dispatcher_seed,))
+                threads.append(thread)
+                thread.start()
+
+            # Let the worker threads work for `self.benchmark_duration_secs` seconds, after the
+            # settle period, once all of them are connected
+            self.started_event.wait()
+            time.sleep(self.settle_secs + self.benchmark_duration_secs)
+            self.stop_event.set()
+
+            # Wait for all worker threads to finish
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stop_live_metrics()
+            self._stop_journal()
 
-        # Let the worker threads work for `self.benchmark_duration_secs` seconds
-        time.sleep(self.benchmark_duration_secs)
-        self.stop_event.set()
+    def run_benchmark(self):
+        if self.load_profile is not None:
+            self.logger.info(
+                f"Running concurrency benchmark for {self.vendor.upper()} through {len(self.load_profile.stages)} "
+                f"load profile stages over {self.benchmark_duration_secs:g}s..."
+            )
+        elif self.open_loop:
+            self.logger.info(
+                f"Running open-loop concurrency benchmark for {self.vendor.upper()} at "
+                f"{self.total_arrival_rate:g} QPS ({self.arrival_distribution} arrivals)..."
+            )
+        else:
+            self.logger.info(f"Running concurrency benchmark for {self.vendor.upper()}...")
 
-        # Wait for all worker threads to finish
-        for thread in threads:
-            thread.join()
+        self.run_workers()
 
+        self._collect_engine_stats()
         self._write_csv()
+        self._write_summary()
         self.logger.info(f"Finished concurrency benchmark for {self.vendor.upper()}...")
@@ -0,0 +1,178 @@
+import logging
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from load_profile import LoadProfile
+from runner import ConcurrentBenchmarkRunner
+from workload import Workload
+
+# Seconds a shard waits for all other shards to be connected before giving up
+SHARD_START_TIMEOUT_SECS = 600
+
+
+def _run_shard(shard_id: int, driver: str, runner_kwargs: Dict, start_barrier) -> Tuple[List[List], List, int]:
+    """
+    Entry point of a shard process: run one concurrency runner and return its per-worker results
+    and histograms, and its number of unstarted open-loop arrivals.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - %(name)s[shard {shard_id}] - %(levelname)s - %(message)s'
+    )
+    if driver == 'asyncio':
+        from async_runner import AsyncConcurrentBenchmarkRunner
+        runner = AsyncConcurrentBenchmarkRunner(**runner_kwargs)
+    else:
+        runner = ConcurrentBenchmarkRunner(**runner_kwargs)
+    # Start measuring in all shards at the same time, once every shard has connected its workers
+    runner.start_gate = lambda: start_barrier.wait(SHARD_START_TIMEOUT_SECS)
+    runner.metrics_labels = {"shard": str(shard_id)}
+    # Every shard journals its own query log next to the merged one
+    runner.journal_path = os.path.join(runner.output_dir, f"{runner.vendor}_concurrency.shard{shard_id}.jsonl")
+    runner.run_workers()
+    return runner.worker_thread_results, runner.worker_histograms, runner.unstarted_arrivals
+
+
+class ShardedConcurrentBenchmarkRunner(ConcurrentBenchmarkRunner):
+    """
+    Concurrency benchmark fanned out over a pool of processes.
+
+    Each shard process runs `vus_per_process` workers with its own seed derived from `seed`, so the
+    client-side result processing is not serialized by a single GIL. The per-process results are
+    merged into one `<vendor>_concurrency.csv` and summary.
+    """
+
+    def __init__(
+        self,
+        benchmark_name: str,
+        creds_file: str,
+        vendor: str,
+        processes: int,
+        vus_per_process: int,
+        benchmark_duration_secs: int,
+        output_dir: str,
+        benchmark_path: str,
+        seed: int,
+        arrival_rate: Optional[float] = None,
+        arrival_distribution: str = "constant",
+        result_mode: str = "fetch",
+        histogram_digits: int = 3,
+        keep_query_log: bool = True,
+        metrics_port: Optional[int] = None,
+        metrics_jsonl: Optional[str] = None,
+        selected_queries: Optional[List[str]] = None,
+        workload: Optional[Workload] = None,
+        settle_secs: float = 0.0,
+        output_format: str = "csv",
+        driver: str = "threads",
+        driver_kwargs: Optional[Dict] = None,
+        load_profile: Optional[LoadProfile] = None,
+    ):
+        super().__init__(
+            benchmark_name=benchmark_name,
+            creds_file=creds_file,
+            vendor=vendor,
+            concurrency=processes * vus_per_process,
+            benchmark_duration_secs=benchmark_duration_secs,
+            output_dir=output_dir,
+            benchmark_path=benchmark_path,
+            seed=seed,
+            arrival_rate=arrival_rate,
+            arrival_distribution=arrival_distribution,
+            result_mode=result_mode,
+            histogram_digits=histogram_digits,
+            keep_query_log=keep_query_log,
+            metrics_port=metrics_port,
+            metrics_jsonl=metrics_jsonl,
+            selected_queries=selected_queries,
+            workload=workload,
+            settle_secs=settle_secs,
+            output_format=output_format,
+            load_profile=load_profile,
+        )
+        self.creds_file = creds_file
+        self.processes = processes
+        self.vus_per_process = vus_per_process
+        self.driver = driver
+        self.driver_kwargs = driver_kwargs or {}
+
+    @staticmethod
+    def split_concurrency(concurrency: int, processes: int) -> int:
+        """Number of VUs per process needed to reach at least `concurrency` VUs in total."""
+        return math.ceil(concurrency / processes)
+
+    def _shard_kwargs(self, shard_id: int, shard_seed: int) -> Dict:
+        return dict(
+            benchmark_name=self.benchmark_name,
+            creds_file=self.creds_file,
+            vendor=self.vendor,
+            concurrency=self.vus_per_process,
+            benchmark_duration_secs=self.benchmark_duration_secs,
+            output_dir=self.output_dir,
+            benchmark_path=self.benchmark_path,
+            seed=shard_seed,
+            # Every shard offers an equal share of the total arrival rate
+            arrival_rate=None if self.arrival_rate is None else self.arrival_rate / self.processes,
+            arrival_distribution=self.arrival_distribution,
+            result_mode=self.result_mode,
+            histogram_digits=self.histogram_digits,
+            keep_query_log=self.keep_query_log,
+            # Every shard serves its own endpoint on consecutive ports and appends to the same file,
+            # with a `shard` label on every series
+            metrics_port=None if self.metrics_port is None else self.metrics_port + shard_id,
+            metrics_jsonl=self.metrics_jsonl,
+            # The workload is already narrowed down to the selected queries; every shard offers an
+            # equal share of the per-query rates
+            workload=self.workload.scaled(1 / self.processes),
+            settle_secs=self.settle_secs,
+            # Every shard follows its share of the load profile
+            load_profile=None if self.load_profile is None else self.load_profile.share(shard_id, self.processes),
+            # All shards share the tag so that a single bulk lookup finds their engine statistics
+            run_tag=self.run_tag,
+            **self.driver_kwargs,
+        )
+
+    def run_workers(self):
+        # Each shard gets its own deterministic seed derived from `self.seed`
+        rng = random.Random(self.seed)
+        shard_seeds = rng.sample(range(42_000_000), self.processes)
+
+        # Spawn (rather than fork) the shards so they do not inherit locks held by other threads
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            start_barrier = manager.Barrier(self.processes)
+            with ProcessPoolExecutor(max_workers=self.processes, mp_context=context) as executor:
+                futures = [
+                    executor.submit(_run_shard, shard_id, self.driver, self._shard_kwargs(shard_id, shard_seed), start_barrier)
+                    for shard_id, shard_seed in enumerate(shard_seeds)
+                ]
+                # Worker IDs in the merged results are numbered consecutively across shards
+                self.worker_thread_results = []
+                self.worker_histograms = []
+                self.unstarted_arrivals = 0
+                for shard_id, future in enumerate(futures):
+                    shard_results, shard_histograms, unstarted_arrivals = future.result()
+                    self.logger.info(
+                        f"Shard {shard_id} finished with "
+                        f"{sum(h.overall().total_count + sum(h.errors.values()) for h in shard_histograms if h)} queries"
+                    )
+                    self.worker_thread_results.extend(shard_results)
+                    self.worker_histograms.extend(shard_histograms)
+                    self.unstarted_arrivals += unstarted_arrivals
+
+    def run_benchmark(self):
+        self.logger.info(
+            f"Running concurrency benchmark for {self.vendor.upper()} with {self.processes} processes "
+            f"x {self.vus_per_process} virtual users ({self.driver} driver)..."
+        )
+
+        self.run_workers()
+
+        self._collect_engine_stats()
+        self._write_csv()
+        self._write_summary()
+        self.logger.info(f"Finished concurrency benchmark for {self.vendor.upper()}...")
@@ -0,0 +1,266 @@
+"""
+Confidence intervals, the adaptive iteration stopping rule of the sequential benchmark and the
+two-sample tests of the run comparison.
+"""
+import math
+import statistics
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CI_STATISTICS = ("median", "mean")
+
+
+def median_ci(samples: Sequence[float], confidence: float = 0.95) -> Optional[Tuple[float, float]]:
+    """
+    Distribution-free confidence interval of the median from order statistics.
+
+    The number of samples below the median is Binomial(n, 1/2), so [x(j), x(n-j+1)] covers the
+    median with at least the requested confidence for the largest j with P(B < j) <= alpha / 2.
+    No assumption is made about the latency distribution, which is typically skewed.
+
+    Returns:
+        Optional[Tuple[float, float]]: The interval, or None if there are too few samples (fewer
+        than 6 at 95% confidence).
+    """
+    n = len(samples)
+    if n == 0:
+        return None
+    alpha = 1.0 - confidence
+    cumulative = 0.0
+    j = 0
+    # Grow j while P(B <= j) stays within alpha / 2
+    while j < n:
+        cumulative += math.comb(n, j) / 2 ** n
+        if cumulative > alpha / 2:
+            break
+        j += 1
+    if j == 0:
+        return None
+    ordered = sorted(samples)
+    return ordered[j - 1], ordered[n - j]
+
+
+def _t_quantile(p: float, degrees_of_freedom: int) -> float:
+    """Student t quantile from the Cornish-Fisher expansion around the normal quantile."""
+    z = statistics.NormalDist().inv_cdf(p)
+    v = degrees_of_freedom
+    return (
+        z
+        + (z ** 3 + z) / (4 * v)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3)
+    )
+
+
+def mean_ci(samples: Sequence[float], confidence: float = 0.95) -> Optional[Tuple[float, float]]:
+    """Student t confidence interval of the mean, or None with fewer than 2 samples."""
+    n = len(samples)
+    if n < 2:
+        return None
+    mean = statistics.fmean(samples)
+    half_width = _t_quantile(1 - (1 - confidence) / 2, n - 1) * statistics.stdev(samples) / math.sqrt(n)
+    return mean - half_width, mean + half_width
+
+
+def relative_ci_width(samples: Sequence[float], statistic: str = "median", confidence: float = 0.95) -> Optional[float]:
+    """Width of the confidence interval of `statistic` relative to the statistic itself, if defined."""
+    if not samples:
+        return None
+    if statistic == "median":
+        interval, center = median_ci(samples, confidence), statistics.median(samples)
+    else:
+        interval, center = mean_ci(samples, confidence), statistics.fmean(samples)
+    if interval is None or center == 0:
+        return None
+    return (interval[1] - interval[0]) / abs(center)
+
+
+@dataclass
+class IterationPolicy:
+    """
+    Adaptive number of iterations per query.
+
+    After one cold iteration, which is reported separately, a query is repeated until the
+    confidence interval of the warm `statistic` is narrower than `target_relative_width`, within
+    the iteration and time limits.
+    """
+    min_iterations: int = 5
+    max_iterations: int = 50
+    # E.g. 0.1 stops once the interval is narrower than 10% of the median
+    target_relative_width: float = 0.1
+    statistic: str = "median"
+    confidence: float = 0.95
+    # (Optional) Wall-clock budget of the warm iterations of one query
+    time_budget_secs: Optional[float] = None
+
+    def __post_init__(self):
+        if self.statistic not in CI_STATISTICS:
+            raise ValueError(f"Unsupported statistic: {self.statistic}, expected one of {CI_STATISTICS}")
+        if not 1 <= self.min_iterations <= self.max_iterations:
+            raise ValueError(
+                f"Iteration limits must satisfy 1 <= min <= max, got: {self.min_iterations}, {self.max_iterations}"
+            )
+        if self.target_relative_width <= 0:
+            raise ValueError(f"Target relative width must be positive, got: {self.target_relative_width}")
+        if not 0 < self.confidence < 1:
+            raise ValueError(f"Confidence must be between 0 and 1, got: {self.confidence}")
+
+    def stop_reason(self, iterations: int, samples: List[float], elapsed_secs: float) -> Optional[str]:
+        """
+        Decide whether to stop after `iterations` warm iterations.
+
+        Args:
+            iterations: Warm iterations run so far.
+            samples: Warm latencies of the successful executions so far.
+            elapsed_secs: Time spent on the warm iterations so far.
+
+        Returns:
+            Optional[str]: 'max_iterations', 'time_budget' or 'converged', or None to continue
+        """
+        if iterations >= self.max_iterations:
+            return "max_iterations"
+        if self.time_budget_secs is not None and iterations > 0:
+            # Stop if the next iteration is expected to overrun the budget
+            if elapsed_secs + elapsed_secs / iterations > self.time_budget_secs:
+                return "time_budget"
+        if iterations < self.min_iterations:
+            return None
+        width = relative_ci_width(samples, self.statistic, self.confidence)
+        if width is not None and width <= self.target_relative_width:
+            return "converged"
+        return None
+
+
+# Largest n1 * n2 for which the Mann-Whitney U test uses the exact distribution (without ties)
+MANN_WHITNEY_EXACT_MAX_PRODUCT = 2500
+
+# Upper bound on the number of values drawn at once in the bootstrap, to bound its memory use
+BOOTSTRAP_CHUNK_VALUES = 2_000_000
+
+
+def _average_ranks(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """1-based ranks of `values` with ties sharing their average rank, and the size of every tie group."""
+    unique_values, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    group_ends = np.cumsum(counts)
+    average_ranks = group_ends - (counts - 1) / 2
+    return average_ranks[inverse], counts
+
+
+def _mann_whitney_exact_cdf(n1: int, n2: int) -> List[float]:
+    """
+    P(U <= u) for every u of the exact null distribution of U without ties.
+
+    The number of arrangements with U = u is the coefficient of q^u of the Gaussian binomial
+    coefficient [n1 + n2 choose n1], the product over k = 1..n1 of (1 - q^(n2 + k)) / (1 - q^k).
+    """
+    coefficients = [1]
+    for k in range(1, n1 + 1):
+        # Multiply by (1 - q^(n2 + k))
+        shifted = [0] * (n2 + k) + coefficients
+        coefficients = [
+            (coefficients[i] if i < len(coefficients) else 0) - shifted[i] for i in range(len(shifted))
+        ]
+        # Divide exactly by (1 - q^k)
+        for i in range(k, len(coefficients)):
+            coefficients[i] += coefficients[i - k]
+        coefficients = coefficients[:n1 * n2 + 1]
+    total = sum(coefficients)
+    cumulative = 0
+    cdf = []
+    for count in coefficients:
+        cumulative += count
+        cdf.append(cumulative / total)
+    return cdf
+
+
+def mann_whitney_u(first: Sequence[float], second: Sequence[float]) -> Tuple[float, float]:
+    """
+    Two-sided Mann-Whitney U test of whether one sample tends to have larger values than the other.
+
+    Non-parametric, so it suits skewed latency distributions. The p-value is exact for small
+    samples without ties and otherwise from the normal approximation with tie and continuity
+    corrections.
+
+    Returns:
+        Tuple[float, float]: U of `first` and the two-sided p-value
+    """
+    n1, n2 = len(first), len(second)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("The Mann-Whitney U test needs two non-empty samples")
+    ranks, tie_counts = _average_ranks(np.concatenate([np.asarray(first, float), np.asarray(second, float)]))
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2)
+    has_ties = bool((tie_counts > 1).any())
+
+    if not has_ties and n1 * n2 <= MANN_WHITNEY_EXACT_MAX_PRODUCT:
+        cdf = _mann_whitney_exact_cdf(n1, n2)
+        u_rounded = round(u)
+        lower = cdf[u_rounded]
+        upper = 1.0 - (cdf[u_rounded - 1] if u_rounded > 0 else 0.0)
+        return u, min(1.0, 2 * min(lower, upper))
+
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    tie_term = float((tie_counts ** 3 - tie_counts).sum()) / (n * (n - 1))
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term)
+    if variance <= 0:
+        # All values are equal
+        return u, 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return u, min(1.0, 2 * (1 - statistics.NormalDist().cdf(max(z, 0.0))))
+
+
+def mann_whitney_min_p_value(n1: int, n2: int) -> float:
+    """
+    Smallest two-sided p-value `mann_whitney_u` can return for samples of `n1` and `n2` values
+    without ties, i.e. when every value of one sample is below every value of the other.
+    """
+    if n1 * n2 <= MANN_WHITNEY_EXACT_MAX_PRODUCT:
+        return min(1.0, 2 / math.comb(n1 + n2, n1))
+    z = (n1 * n2 / 2 - 0.5) / math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    return min(1.0, 2 * (1 - statistics.NormalDist().cdf(z)))
+
+
+def bootstrap_median_ratio_ci(
+    baseline: Sequence[float],
+    candidate: Sequence[float],
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 1,
+) -> Tuple[float, float]:
+    """
+    Percentile bootstrap confidence interval of median(candidate) / median(baseline).
+
+    Both samples are resampled independently with replacement, in chunks that hold at most
+    `BOOTSTRAP_CHUNK_VALUES` values, so large concurrency samples do not exhaust memory.
+    """
+    rng = np.random.default_rng(seed)
+    baseline = np.asarray(baseline, float)
+    candidate = np.asarray(candidate, float)
+    chunk = max(1, BOOTSTRAP_CHUNK_VALUES // max(len(baseline), len(candidate)))
+    ratios = []
+    for start in range(0, resamples, chunk):
+        size = min(chunk, resamples - start)
+        baseline_medians = np.median(rng.choice(baseline, (size, len(baseline))), axis=1)
+        candidate_medians = np.median(rng.choice(candidate, (size, len(candidate))), axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios.append(candidate_medians / baseline_medians)
+    ratios = np.concatenate(ratios)
+    ratios = ratios[np.isfinite(ratios)]
+    if not len(ratios):
+        return math.nan, math.nan
+    alpha = 1 - confidence
+    low, high = np.quantile(ratios, [alpha / 2, 1 - alpha / 2])
+    return float(low), float(high)
+
+
+def holm_adjust(p_values: Sequence[float]) -> List[float]:
+    """Holm-Bonferroni adjusted p-values, which control the family-wise error rate of many comparisons."""
+    order = sorted(range(len(p_values)), key=lambda i: p_values[i])
+    adjusted = [0.0] * len(p_values)
+    running_max = 0.0
+    for position, i in enumerate(order):
+        running_max = max(running_max, min(1.0, (len(p_values) - position) * p_values[i]))
+        adjusted[i] = running_max
+    return adjusted
@@ -0,0 +1,198 @@
+"""
+Concurrency sweep: one concurrency benchmark per level, combined into a throughput-latency curve.
+"""
+import csv
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from tabulate import tabulate
+
+from runner import ConcurrentBenchmarkRunner
+
+# A step from one level to the next saturates if less than this share of the added concurrency
+# turns into additional throughput...
+KNEE_MIN_SCALING_EFFICIENCY = 0.5
+# ...while the tail latency grows by at least this factor
+KNEE_MIN_LATENCY_GROWTH = 1.2
+
+# Latency percentile the knee detection and the curve use for the tail
+TAIL_LATENCY_KEY = "p95"
+
+
+def parse_concurrency_levels(value: str) -> List[int]:
+    """
+    Parse the concurrency levels of a sweep.
+
+    Args:
+        value: Comma-separated list such as `60,120,240,480`, or a geometric series
+            `start:stop:factor` such as `8:512:2` (8, 16, ..., 512).
+
+    Returns:
+        List[int]: Distinct levels in increasing order
+    """
+    if ":" in value:
+        parts = value.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Invalid geometric series '{value}', expected start:stop:factor")
+        start, stop, factor = int(parts[0]), int(parts[1]), float(parts[2])
+        if start < 1 or stop < start or factor <= 1:
+            raise ValueError(f"Invalid geometric series '{value}', expected 1 <= start <= stop and factor > 1")
+        levels = []
+        level = float(start)
+        while round(level) <= stop:
+            levels.append(round(level))
+            level *= factor
+    else:
+        levels = [int(item) for item in value.split(",") if item.strip()]
+    if not levels or any(level < 1 for level in levels):
+        raise ValueError(f"Concurrency levels must be positive, got: {value}")
+    return sorted(set(levels))
+
+
+def find_knee(
+    points: List[Dict[str, Any]],
+    min_scaling_efficiency: float = KNEE_MIN_SCALING_EFFICIENCY,
+    min_latency_growth: float = KNEE_MIN_LATENCY_GROWTH,
+    latency_key: str = TAIL_LATENCY_KEY,
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the saturation knee of a sweep: the last level before QPS stops scaling and tail latency climbs.
+
+    For every step between consecutive levels, the scaling efficiency is the relative QPS gain
+    divided by the relative concurrency gain (1.0 is linear scaling). The knee is the level
+    before the first step whose efficiency drops below `min_scaling_efficiency` while the
+    latency at `latency_key` grows by at least `min_latency_growth`.
+
+    Args:
+        points: Overall sweep results with `concurrency`, `qps` and `latency_key`, by concurrency.
+
+    Returns:
+        Optional[Dict[str, Any]]: The point at the knee, or None if throughput kept scaling
+    """
+    for previous, current in zip(points, points[1:]):
+        if not previous["qps"] or not previous[latency_key] or current[latency_key] is None:
+            continue
+        efficiency = (current["qps"] / previous["qps"] - 1) / (current["concurrency"] / previous["concurrency"] - 1)
+        latency_growth = current[latency_key] / previous[latency_key]
+        if efficiency < min_scaling_efficiency and latency_growth >= min_latency_growth:
+            return previous
+    return None
+
+
+class ConcurrencySweep:
+    """
+    Run a concurrency benchmark per level and combine the results.
+
+    Every level runs for the benchmark duration after its settle period and writes its usual CSV
+    and summary to `<output_dir>/<vendor>_sweep/concurrency_<level>/`. The per-level summaries
+    are combined into `<vendor>_sweep.csv`, `<vendor>_sweep_summary.txt` and the throughput-latency
+    curve `<vendor>_sweep.png`.
+    """
+
+    def __init__(
+        self,
+        vendor: str,
+        levels: List[int],
+        make_runner: Callable[[int, str], ConcurrentBenchmarkRunner],
+        output_dir: str,
+    ):
+        """
+        Args:
+            vendor: Benchmarked vendor.
+            levels: Concurrency levels, run in this order.
+            make_runner: Builds the runner of a level from the concurrency and its output directory.
+            output_dir: Directory of the combined results.
+        """
+        self.vendor = vendor
+        self.levels = levels
+        self.make_runner = make_runner
+        self.output_dir = output_dir
+        self.logger = logging.getLogger(__name__)
+
+    def run(self) -> List[Dict[str, Any]]:
+        """Run all levels and return the combined rows, one per level and query plus an 'ALL' row per level."""
+        rows = []
+        for step, concurrency in enumerate(self.levels, 1):
+            self.logger.info(f"Sweep step {step}/{len(self.levels)}: concurrency {concurrency} for {self.vendor}")
+            level_dir = os.path.join(self.output_dir, f"{self.vendor}_sweep", f"concurrency_{concurrency}")
+            runner = self.make_runner(concurrency, level_dir)
+            runner.run_benchmark()
+            rows.extend({"concurrency": runner.concurrency, **row} for row in runner.summary_rows())
+
+        overall = [row for row in rows if row.get("query_name", row.get("stream")) == "ALL"]
+        knee = find_knee(overall)
+        if knee is None:
+            self.logger.info(f"No saturation knee found for {self.vendor}: throughput kept scaling up to the last level")
+        else:
+            self.logger.info(
+                f"Saturation knee of {self.vendor} at concurrency {knee['concurrency']}: "
+                f"{knee['qps']} QPS, {TAIL_LATENCY_KEY} {knee[TAIL_LATENCY_KEY]}s"
+            )
+        for row in rows:
+            row["knee"] = knee is not None and row["concurrency"] == knee["concurrency"]
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._write_csv(rows)
+        self._write_summary(overall, knee)
+        self._plot(overall, knee)
+        return rows
+
+    def _write_csv(self, rows: List[Dict[str, Any]]):
+        csv_file_path = os.path.join(self.output_dir, f"{self.vendor}_sweep.csv")
+        field_names = list(dict.fromkeys(key for row in rows for key in row))
+        with open(csv_file_path, mode="w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=field_names)
+            writer.writeheader()
+            writer.writerows(rows)
+        self.logger.info(f"Sweep results exported to {csv_file_path}")
+
+    def _write_summary(self, overall: List[Dict[str, Any]], knee: Optional[Dict[str, Any]]):
+        summary_file_path = os.path.join(self.output_dir, f"{self.vendor}_sweep_summary.txt")
+        with open(summary_file_path, "w") as f:
+            f.write(f"Concurrency Sweep Summary for {self.vendor}\n")
+            f.write("=====================================\n")
+            if knee is None:
+                f.write("Saturation knee: not reached\n\n")
+            else:
+                f.write(f"Saturation knee: concurrency {knee['concurrency']} ({knee['qps']} QPS)\n\n")
+            f.write(tabulate(
+                [{key: value for key, value in row.items() if key not in ("query_name", "stream")} for row in overall],
+                headers="keys", tablefmt="grid",
+            ))
+        self.logger.info(f"Sweep summary exported to {summary_file_path}")
+
+    def _plot(self, overall: List[Dict[str, Any]], knee: Optional[Dict[str, Any]]):
+        """Plot QPS by concurrency and the throughput-latency curve side by side."""
+        import matplotlib.pyplot as plt
+
+        concurrency = [row["concurrency"] for row in overall]
+        qps = [row["qps"] for row in overall]
+
+        fig, (scaling_axis, curve_axis) = plt.subplots(1, 2, figsize=(12, 5))
+        scaling_axis.plot(concurrency, qps, marker="o")
+        scaling_axis.set_xlabel("Concurrency")
+        scaling_axis.set_ylabel("QPS")
+        scaling_axis.set_title("Throughput by Concurrency")
+
+        for key in ("p50", TAIL_LATENCY_KEY, "p99"):
+            curve_axis.plot(qps, [row[key] for row in overall], marker="o", label=key)
+        for row in overall:
+            curve_axis.annotate(str(row["concurrency"]), (row["qps"], row[TAIL_LATENCY_KEY] or 0),
+                                textcoords="offset points", xytext=(4, 4), fontsize=8)
+        curve_axis.set_xlabel("QPS")
+        curve_axis.set_ylabel("Latency (seconds)")
+        curve_axis.set_title("Throughput-Latency Curve")
+
+        if knee is not None:
+            scaling_axis.axvline(knee["concurrency"], color="#f72a30", linestyle="--", label="knee")
+            curve_axis.axvline(knee["qps"], color="#f72a30", linestyle="--", label="knee")
+            scaling_axis.legend()
+        curve_axis.legend()
+        fig.suptitle(f"Concurrency Sweep for {self.vendor}")
+        fig.tight_layout()
+
+        plot_file_path = os.path.join(self.output_dir, f"{self.vendor}_sweep.png")
+        fig.savefig(plot_file_path, dpi=200)
+        plt.close(fig)
+        self.logger.info(f"Sweep curve saved to {plot_file_path}")
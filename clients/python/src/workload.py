@@ -0,0 +1,213 @@
+import bisect
+import itertools
+import json
+import os
+import random
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional
+
+from parameters import (
+    ParameterGenerator, fingerprint, parse_parameter, render_template, sample_parameter_values,
+    template_parameters,
+)
+
+# Version of the workload specification format
+WORKLOAD_SPEC_VERSION = 1
+
+
+@dataclass
+class QuerySpec:
+    name: str
+    # Equivalent variations of the query; one is chosen at random for every execution
+    variations: List[str]
+    # Relative share of the query in the mix; None if the specification did not set one
+    weight: Optional[float] = None
+    # (Optional) Target arrival rate of this query in queries per second for open-loop runs
+    rate: Optional[float] = None
+    # (Optional) Pause of a closed-loop worker after each execution of this query
+    think_time_secs: Optional[float] = None
+
+
+@dataclass
+class QueryInstance:
+    """One execution of a query: the variation chosen, its parameter values and the final text."""
+    query_name: str
+    text: str
+    # Index of the variation in `QuerySpec.variations`
+    variation: int
+    parameters: Dict[str, Any]
+    # Short hash of the query name, variation and parameter values, see `parameters.fingerprint`
+    fingerprint: str
+
+
+@dataclass
+class Workload:
+    """
+    Benchmark workload: the queries with their variations, weights, target rates and think time.
+
+    Loaded from a `queries.json` file in any of these shapes:
+
+    - Mapping from query name to a list of variations (or a single query):
+      `{"q1": ["SELECT ...", "SELECT ..."], "q2": "SELECT ..."}`
+    - List of named queries: `[{"name": "q1", "query": "SELECT ..."}, ...]`
+    - Versioned specification:
+      `{"version": 1, "think_time_secs": 0.5, "queries": [{"name": "q1", "query": "SELECT ...",
+      "weight": 80, "rate": 10, "think_time_secs": 1}, ...]}`, where `query` may also be a list
+      of variations. The list shape accepts the same per-query fields.
+
+    The versioned specification may also define `"parameters"` for query templates, see
+    `parameters.parse_parameter`.
+    """
+    queries: Dict[str, QuerySpec]
+    # Default think time of queries that do not set their own
+    think_time_secs: float = 0.0
+    version: int = WORKLOAD_SPEC_VERSION
+    # Generators of the `{{name}}` placeholders in the query variations
+    parameters: Dict[str, ParameterGenerator] = field(default_factory=dict)
+
+    @property
+    def query_names(self) -> List[str]:
+        return list(self.queries)
+
+    @property
+    def variations(self) -> Dict[str, List[str]]:
+        return {name: query.variations for name, query in self.queries.items()}
+
+    @property
+    def weighted(self) -> bool:
+        """Whether the workers sample the queries by weight instead of cycling through them."""
+        return any(query.weight is not None for query in self.queries.values())
+
+    @property
+    def rates(self) -> Dict[str, float]:
+        """Target arrival rates of the queries that set one."""
+        return {name: query.rate for name, query in self.queries.items() if query.rate is not None}
+
+    def think_time(self, query_name: str) -> float:
+        think_time_secs = self.queries[query_name].think_time_secs
+        return self.think_time_secs if think_time_secs is None else think_time_secs
+
+    def select(self, query_names: List[str]) -> "Workload":
+        """Workload with only the named queries, in that order."""
+        unknown = [name for name in query_names if name not in self.queries]
+        if unknown:
+            raise ValueError(f"Unknown query names: {unknown}. Available: {self.query_names}")
+        return replace(self, queries={name: self.queries[name] for name in query_names})
+
+    def scaled(self, factor: float) -> "Workload":
+        """Workload with all target rates multiplied by `factor`, e.g. to split it over processes."""
+        return replace(self, queries={
+            name: replace(query, rate=None if query.rate is None else query.rate * factor)
+            for name, query in self.queries.items()
+        })
+
+    def instantiate(self, query_name: str, rng: random.Random) -> QueryInstance:
+        """Choose a random variation of a query and fill in its template parameters."""
+        variations = self.queries[query_name].variations
+        variation = rng.randrange(len(variations))
+        text, values = render_template(variations[variation], self.parameters, rng)
+        return QueryInstance(
+            query_name=query_name,
+            text=text,
+            variation=variation,
+            parameters=values,
+            fingerprint=fingerprint(query_name, variation, values),
+        )
+
+    def sample_parameters(self, execute_query: Callable[[str], List[Any]]) -> None:
+        """Read the values of the parameters defined by a `sample_query` from the engine."""
+        sample_parameter_values(self.parameters, execute_query)
+
+    @property
+    def needs_parameter_sample(self) -> bool:
+        return any(parameter.needs_sample for parameter in self.parameters.values())
+
+    def query_picker(self, query_names: List[str], rng: random.Random) -> Callable[[], str]:
+        """
+        Return a function choosing the next query of a worker among `query_names`.
+
+        Weighted workloads sample every query independently by weight (queries without a weight
+        count as weight 1). Otherwise the worker cycles through a random permutation of the queries.
+        """
+        if not self.weighted:
+            return itertools.cycle(rng.sample(query_names, len(query_names))).__next__
+        cumulative_weights = list(itertools.accumulate(
+            1.0 if self.queries[name].weight is None else self.queries[name].weight for name in query_names
+        ))
+        total_weight = cumulative_weights[-1]
+        return lambda: query_names[bisect.bisect_right(cumulative_weights, rng.random() * total_weight)]
+
+
+def _query_spec(name: str, item: Any) -> QuerySpec:
+    if not isinstance(item, dict):
+        item = {"query": item}
+    query = item.get("variations", item.get("query"))
+    if query is None:
+        raise ValueError(f"Query '{name}' has no 'query' or 'variations'")
+    spec = QuerySpec(
+        name=name,
+        variations=query if isinstance(query, list) else [query],
+        weight=item.get("weight"),
+        rate=item.get("rate"),
+        think_time_secs=item.get("think_time_secs"),
+    )
+    if spec.weight is not None and spec.weight < 0:
+        raise ValueError(f"Weight of query '{name}' must not be negative, got: {spec.weight}")
+    if spec.rate is not None and spec.rate <= 0:
+        raise ValueError(f"Rate of query '{name}' must be positive, got: {spec.rate}")
+    return spec
+
+
+def parse_workload(data: Any, base_dir: str = ".") -> Workload:
+    """
+    Build a workload from the parsed JSON of any supported `queries.json` shape.
+
+    Args:
+        data: Parsed specification.
+        base_dir: Directory that parameter value files are resolved against.
+    """
+    think_time_secs = 0.0
+    parameters = {}
+    if isinstance(data, dict) and "version" in data:
+        if data["version"] != WORKLOAD_SPEC_VERSION:
+            raise ValueError(
+                f"Unsupported workload specification version: {data['version']} "
+                f"(supported: {WORKLOAD_SPEC_VERSION})"
+            )
+        think_time_secs = float(data.get("think_time_secs", 0.0))
+        parameters = {
+            name: parse_parameter(name, spec, base_dir) for name, spec in data.get("parameters", {}).items()
+        }
+        data = data.get("queries", [])
+
+    if isinstance(data, list):
+        items = [
+            (str(item["name"]), item) if isinstance(item, dict) and "name" in item else (str(i), item)
+            for i, item in enumerate(data, 1)
+        ]
+    elif isinstance(data, dict):
+        items = list(data.items())
+    else:
+        raise ValueError(f"Unsupported workload specification of type {type(data).__name__}")
+
+    queries = {}
+    for name, item in items:
+        if name in queries:
+            raise ValueError(f"Duplicate query name in workload specification: {name}")
+        queries[name] = _query_spec(name, item)
+    workload = Workload(queries=queries, think_time_secs=think_time_secs, parameters=parameters)
+    for query in workload.queries.values():
+        for variation in query.variations:
+            unknown = [name for name in template_parameters(variation) if name not in parameters]
+            if unknown:
+                raise ValueError(f"Query '{query.name}' refers to undefined parameters: {unknown}")
+    if workload.weighted and not any(
+        query.weight is None or query.weight > 0 for query in workload.queries.values()
+    ):
+        raise ValueError("At least one query needs a positive weight")
+    return workload
+
+
+def load_workload(path) -> Workload:
+    with open(path, "r") as f:
+        return parse_workload(json.load(f), base_dir=os.path.dirname(os.path.abspath(path)))